@@ -1,12 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Medium, CambonePool, Gira, Funcao, Historico
+from django.utils import timezone
+from .models import User, Medium, CambonePool, Gira, Funcao, Historico, GiraFuncaoHistorico
+from . import auditoria, geracao, mediuns, rodizio, sessao, snapshots
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('celular', 'nome', 'is_staff')
     search_fields = ('celular', 'nome')
     ordering = ('celular',)
+    # gira_user não tem groups/user_permissions (ver User.has_perm)
+    list_filter = ('is_staff', 'is_superuser', 'is_active')
+    filter_horizontal = ()
+    actions = ['encerrar_sessoes']
     fieldsets = (
         (None, {'fields': ('celular', 'password')}),
         ('Informações pessoais', {'fields': ('nome', 'email')}),
@@ -19,8 +25,122 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
-admin.site.register(Medium)
+    @admin.action(description='Encerrar as sessões (deslogar em todos os aparelhos)')
+    def encerrar_sessoes(self, request, queryset):
+        user_ids = list(queryset.values_list('id', flat=True))
+        sessao.revogar(*user_ids)
+        self.message_user(request, f"Sessões encerradas para {len(user_ids)} usuário(s).")
+
+@admin.register(Medium)
+class MediumAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'habilitado', 'user')
+    list_filter = ('habilitado',)
+    list_select_related = ('user',)
+    search_fields = ('nome',)
+    ordering = ('nome',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # busca (e autocomplete de pessoa/medium_de_linha nas funções) pelo
+        # índice de prefixos em memória: sem acentos, sem LIKE na tabela
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(id__in=mediuns.ids(search_term)), False
+
 admin.site.register(CambonePool)
-admin.site.register(Gira)
-admin.site.register(Funcao)
-admin.site.register(Historico)
+
+
+class AuditoriaAdminMixin:
+    """Registra criação, edição e exclusão feitas no admin na auditoria da gira."""
+
+    def _registrar(self, request, obj, acao, campos=None):
+        gira_id = obj.pk if isinstance(obj, Gira) else obj.gira_id
+        auditoria.registrar(
+            acao,
+            gira_id,
+            # a linha de Funcao some no delete: não dá para apontar a FK para ela
+            funcao_id=obj.pk if isinstance(obj, Funcao) and acao != auditoria.ADMIN_EXCLUIR else None,
+            usuario_id=request.user.pk,
+            info={'modelo': obj._meta.model_name, 'id': obj.pk, 'campos': campos or [], 'repr': str(obj)},
+        )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        acao = auditoria.ADMIN_EDITAR if change else auditoria.ADMIN_CRIAR
+        self._registrar(request, obj, acao, list(form.changed_data))
+
+    def delete_model(self, request, obj):
+        # a auditoria da gira é apagada junto com ela (CASCADE): nada a registrar
+        if not isinstance(obj, Gira):
+            self._registrar(request, obj, auditoria.ADMIN_EXCLUIR)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        if queryset.model is not Gira:
+            for obj in queryset:
+                self._registrar(request, obj, auditoria.ADMIN_EXCLUIR)
+        super().delete_queryset(request, queryset)
+
+
+@admin.register(Gira)
+class GiraAdmin(AuditoriaAdminMixin, admin.ModelAdmin):
+    list_display = ('titulo', 'linha', 'data_hora', 'status')
+    ordering = ('-data_hora',)
+    actions = ['gerar_funcoes', 'distribuir_cambones', 'congelar', 'reabrir']
+
+    @admin.action(description='Gerar funções do modelo padrão (cambones do pool pelo rodízio)')
+    def gerar_funcoes(self, request, queryset):
+        criadas = geracao.gerar_funcoes(list(queryset), usuario_id=request.user.pk)
+        resumo = ', '.join(f"{total} em {tabela}" for tabela, total in criadas.items())
+        self.message_user(request, f"Funções criadas: {resumo}. Giras que já tinham funções foram ignoradas.")
+
+    @admin.action(description='Distribuir cambones do pool (rodízio)')
+    def distribuir_cambones(self, request, queryset):
+        gira_ids = list(queryset.order_by('data_hora', 'id').values_list('id', flat=True))
+        planos = rodizio.distribuir(gira_ids, usuario_id=request.user.pk)
+        resumo = ', '.join(f"{len(plano)} em {tabela}" for tabela, plano in planos.items())
+        self.message_user(request, f"Vagas de cambone preenchidas: {resumo}.")
+
+    @admin.action(description='Congelar o quadro final (giras encerradas)')
+    def congelar(self, request, queryset):
+        hoje = timezone.localdate()
+        gira_ids = [g.id for g in queryset if timezone.localdate(g.data_hora) < hoje]
+        for gira_id in gira_ids:
+            snapshots.congelar(gira_id, usuario_id=request.user.pk)
+        self.message_user(request, f"{len(gira_ids)} gira(s) congelada(s). Giras de hoje ou futuras foram ignoradas.")
+
+    @admin.action(description='Reabrir (descartar o quadro congelado)')
+    def reabrir(self, request, queryset):
+        gira_ids = list(queryset.values_list('id', flat=True))
+        for gira_id in gira_ids:
+            snapshots.reabrir(gira_id, usuario_id=request.user.pk)
+        self.message_user(request, f"{len(gira_ids)} gira(s) reaberta(s); congele de novo depois de corrigir.")
+
+
+
+@admin.register(Funcao)
+class FuncaoAdmin(AuditoriaAdminMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'gira', 'chave', 'pessoa', 'medium_de_linha')
+    list_filter = ('gira',)
+    list_select_related = ()  # o select_related vem de for_board()
+    autocomplete_fields = ('pessoa', 'medium_de_linha')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_board()
+
+
+@admin.register(GiraFuncaoHistorico)
+class GiraFuncaoHistoricoAdmin(AuditoriaAdminMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'gira', 'chave', 'pessoa', 'medium_de_linha')
+    list_filter = ('gira',)
+    list_select_related = ()  # o select_related vem de for_board()
+    autocomplete_fields = ('pessoa', 'medium_de_linha')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_board()
+
+
+@admin.register(Historico)
+class HistoricoAdmin(admin.ModelAdmin):
+    list_display = ('data', 'acao', 'gira', 'usuario')
+    list_filter = ('acao',)
+    list_select_related = ('gira', 'usuario')
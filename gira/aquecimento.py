@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# 🔹 Aquecimento do worker (cold start no plano free do Render)
+# -------------------------------------------------------------------
+# O Render desliga o serviço parado; quem abria o quadro depois disso
+# pagava o setup inteiro: templates compilados na hora, a primeira
+# conexão com o Postgres (com o truque de IPv4 do settings) e todos os
+# caches vazios. aquecer() faz esse trabalho ANTES de o worker aceitar
+# requisições — o gunicorn.conf.py chama no post_worker_init:
+#   - 'templates' → compila os templates das páginas do quadro (o loader
+#                   em cache do Django guarda o resultado no processo);
+#   - 'banco'     → abre e valida a conexão (SELECT 1) e a deixa aberta
+#                   (CONN_MAX_AGE no settings) para as requisições;
+#   - 'quadro'    → monta o quadro da gira atual no cache
+#                   (views.aquecer_quadro, o mesmo de lista_funcoes) e o
+#                   índice da busca de médiuns (gira/mediuns.py).
+# Cada etapa é medida; uma que falha não impede as outras.
+#
+# /pronto/ (views.pronto) responde 200 com as medições quando terminou
+# sem erro e 503 enquanto não — e tenta de novo se a última tentativa
+# falhou (banco ainda acordando) ou se o servidor não chamou o hook
+# (runserver). `processo_ms` é o tempo do início do processo (fork do
+# worker) até ficar pronto: o número a acompanhar no log e no /pronto/.
+
+TEMPLATES = getattr(settings, 'GIRA_AQUECER_TEMPLATES', (
+    'gira/base.html',
+    'gira/login.html',
+    'gira/lista_funcoes.html',
+    'gira/_quadro_funcoes.html',
+    'gira/lista_funcoes_dev.html',
+    'gira/minhas_funcoes.html',
+))
+
+_lock = threading.Lock()
+_estado = {
+    'pronto': False,
+    'etapas': {},
+    'erros': {},
+    'aquecimento_ms': None,
+    'processo_ms': None,
+    'tentativas': 0,
+}
+
+
+def _idade_do_processo():
+    """Segundos desde o início do processo (Linux: /proc); None fora dele."""
+    try:
+        with open('/proc/self/stat') as f:
+            # starttime é o 22º campo; depois do ")" do nome começa o 3º
+            inicio = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - inicio / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _templates():
+    from django.template.loader import get_template
+
+    for nome in TEMPLATES:
+        get_template(nome)
+
+
+def _banco():
+    from django.db import connection
+
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def _quadro():
+    from . import mediuns, views
+
+    views.aquecer_quadro()
+    mediuns.indice()
+
+
+ETAPAS = (
+    ('templates', _templates),
+    ('banco', _banco),
+    ('quadro', _quadro),
+)
+
+
+def aquecer():
+    """Roda as etapas (uma vez por processo, ou de novo se falhou). Retorna estado()."""
+    with _lock:
+        if _estado['pronto']:
+            return estado()
+
+        _estado['tentativas'] += 1
+        etapas, erros = {}, {}
+        inicio = time.perf_counter()
+        for nome, etapa in ETAPAS:
+            t0 = time.perf_counter()
+            try:
+                etapa()
+            except Exception as exc:  # o worker sobe mesmo assim; /pronto/ tenta de novo
+                erros[nome] = f'{type(exc).__name__}: {exc}'
+                logger.warning("Aquecimento: etapa %s falhou: %s", nome, exc)
+            etapas[nome] = round((time.perf_counter() - t0) * 1000, 1)
+
+        idade = _idade_do_processo()
+        _estado.update({
+            'pronto': not erros,
+            'etapas': etapas,
+            'erros': erros,
+            'aquecimento_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'processo_ms': round(idade * 1000) if idade is not None else None,
+        })
+
+        logger.info(
+            "Aquecimento %s em %s ms (processo pronto %s ms após iniciar): %s",
+            'concluído' if not erros else 'com erros', _estado['aquecimento_ms'], _estado['processo_ms'], etapas,
+        )
+        return estado()
+
+
+def estado():
+    """Cópia do estado do aquecimento deste processo."""
+    return {**_estado, 'etapas': dict(_estado['etapas']), 'erros': dict(_estado['erros']), 'pid': os.getpid()}
+
+
+def publico(atual):
+    """O que /pronto/ mostra sem login: só se o worker está pronto."""
+    return {'pronto': atual['pronto']}
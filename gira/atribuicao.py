@@ -0,0 +1,403 @@
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from . import auditoria, estatisticas, eventos, minhas, quadro_cache, sql, versoes
+
+
+# -------------------------------------------------------------------
+# 🔹 Serviço de atribuição (assumir / desistir) de funções
+# -------------------------------------------------------------------
+# Usado tanto por Funcao (gira_funcao) quanto por GiraFuncaoHistorico
+# (gira_funcao_historico): as duas tabelas têm as mesmas colunas
+# gira_id, chave, tipo, status e pessoa_id.
+#
+# A escrita é um único UPDATE condicional (WHERE pessoa_id IS NULL /
+# WHERE pessoa_id = eu) que grava só pessoa_id e status (e a versão) e
+# devolve a linha (RETURNING). Quem vence a corrida é decidido pelo banco,
+# nunca pelo Python.
+
+STATUS_VAGA = 'Vaga'
+STATUS_PREENCHIDA = 'Preenchida'
+
+# Motivos de falha devolvidos em Resultado.motivo
+INEXISTENTE = 'inexistente'
+GIRA_PASSADA = 'gira_passada'
+CAMBONE = 'cambone'
+OCUPADA = 'ocupada'
+NAO_RESPONSAVEL = 'nao_responsavel'
+
+
+class Resultado:
+    """Resultado de uma tentativa de assumir/desistir."""
+
+    __slots__ = ('ok', 'motivo', 'funcao_id', 'gira_id', 'chave', 'pessoa_id', 'pessoa_nome', 'status')
+
+    def __init__(self, ok, motivo=None, funcao_id=None, gira_id=None, chave=None,
+                 pessoa_id=None, pessoa_nome=None, status=None):
+        self.ok = ok
+        self.motivo = motivo
+        self.funcao_id = funcao_id
+        self.gira_id = gira_id
+        self.chave = chave
+        self.pessoa_id = pessoa_id
+        self.pessoa_nome = pessoa_nome
+        self.status = status
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f"Resultado(ok={self.ok}, motivo={self.motivo}, funcao_id={self.funcao_id}, pessoa_id={self.pessoa_id})"
+
+
+def alvo(model, funcao_id=None, chave=None, gira_id=None):
+    """
+    Monta o filtro que identifica UMA função.
+    - funcao_id numérico tem prioridade;
+    - senão usa a chave (escopada pela gira quando informada), pegando a
+      primeira por id — mesmo comportamento do antigo .filter(...).first().
+    Retorna None se não houver parâmetro suficiente.
+    """
+    if funcao_id and str(funcao_id).isdigit():
+        return Q(pk=int(funcao_id))
+    if chave:
+        qs = model.objects.filter(chave=chave)
+        if gira_id and str(gira_id).isdigit():
+            qs = qs.filter(gira_id=int(gira_id))
+        return Q(pk=Subquery(qs.order_by('pk').values('pk')[:1]))
+    return None
+
+
+def _filtro_gira_aberta():
+    return Q(gira__data_hora__date__gte=timezone.localdate())
+
+
+def _estado(model, filtro):
+    """Lê o estado atual da função (vencedor + status) após o UPDATE."""
+    return (
+        model.objects.filter(filtro)
+        .values('id', 'gira_id', 'chave', 'pessoa_id', 'pessoa__nome', 'status', 'tipo', 'categoria',
+                'gira__data_hora', 'gira__linha')
+        .first()
+    )
+
+
+# anterior=LER: quem estava na função é lido (FOR UPDATE) antes do UPDATE
+LER = object()
+
+# colunas devolvidas pelo UPDATE da função (mesmas chaves de _estado)
+_RETORNO = (
+    'id, gira_id, chave, pessoa_id, status, tipo, categoria, '
+    '(SELECT nome FROM gira_medium WHERE gira_medium.id = pessoa_id) AS nome_pessoa'
+)
+
+
+def _executar(model, filtro, condicoes, anterior=None, **valores):
+    """
+    A atribuição numa transação curta, sem savepoint e sem SELECT para
+    quem ganha. Em gira_funcao_historico são três comandos:
+      1. UPDATE gira_gira SET versao = versao + 1 ... RETURNING, só se a
+         função está disponível agora (trava a gira: versões em ordem);
+      2. UPDATE condicional da função, já com a versão nova, RETURNING;
+      3. o delta da participação (INSERT ... ON CONFLICT, estatisticas).
+    Quem perde (inclusive quem perdeu a corrida depois do passo 1: a
+    versão só sobe à toa) lê o estado para o diagnóstico.
+    `anterior` é quem estava na função quando o UPDATE pega (None = vaga).
+    Retorna (ganhou, estado, anterior).
+    """
+    from .models import Gira
+
+    historico = model._meta.db_table == 'gira_funcao_historico'
+    disponivel = model.objects.filter(filtro & condicoes)
+    with transaction.atomic(savepoint=False):
+        if anterior is LER:
+            anterior = model.objects.select_for_update().filter(filtro).values_list('pessoa_id', flat=True).first()
+        gira = None
+        if historico:
+            gira = versoes.incrementar(
+                Gira.objects.filter(pk=Subquery(disponivel.order_by().values('gira_id')[:1])),
+                'id, versao, data_hora, linha',
+            )
+            if gira is not None:
+                valores['versao'] = gira.versao
+        linha = sql.atualizar_retornando(disponivel, _RETORNO, **valores) if gira or not historico else None
+        if linha is None:
+            return 0, _estado(model, filtro), anterior
+
+        estado = {
+            'id': linha.id, 'gira_id': linha.gira_id, 'chave': linha.chave, 'pessoa_id': linha.pessoa_id,
+            'pessoa__nome': linha.nome_pessoa, 'status': linha.status, 'tipo': linha.tipo,
+            'categoria': linha.categoria,
+        }
+        if historico:
+            estado.update({'gira__data_hora': gira.data_hora, 'gira__linha': gira.linha})
+            estatisticas.registrar(
+                gira.data_hora, gira.linha, linha.categoria,
+                anterior, linha.pessoa_id, liberada=linha.pessoa_id is None,
+            )
+    return 1, estado, anterior
+
+
+def _resultado(ganhou, estado):
+    return Resultado(
+        bool(ganhou),
+        funcao_id=estado['id'],
+        gira_id=estado['gira_id'],
+        chave=estado['chave'],
+        pessoa_id=estado['pessoa_id'],
+        pessoa_nome=estado['pessoa__nome'],
+        status=estado['status'],
+    )
+
+
+def _apos_mudanca(model, res, acao, medium_id, usuario_id, anterior_id=None, categoria=None):
+    """
+    Efeitos de uma atribuição bem-sucedida, disparados após o commit.
+    `anterior_id` é quem estava na função antes, quando se sabe.
+    """
+    origem = 'funcao' if model._meta.db_table == 'gira_funcao' else 'historico'
+    info = {'origem': origem, 'funcao_id': res.funcao_id, 'chave': res.chave, 'medium_id': medium_id}
+    if anterior_id:
+        # quem saiu e a categoria: reconstruir_participacao conta as desistências por aqui
+        info['anterior_id'] = anterior_id
+    if categoria is not None:
+        info['categoria'] = categoria
+
+    def efeitos():
+        quadro_cache.invalidar(res.gira_id)
+        minhas.invalidar(res.pessoa_id, medium_id, anterior_id)
+        eventos.publicar(res.gira_id, origem, res.funcao_id, res.chave, res.status, res.pessoa_id, res.pessoa_nome)
+        # Historico.funcao aponta para gira_funcao; a linha do histórico vai no info
+        auditoria.registrar(
+            acao,
+            res.gira_id,
+            funcao_id=res.funcao_id if origem == 'funcao' else None,
+            usuario_id=usuario_id,
+            info=info,
+        )
+
+    transaction.on_commit(efeitos)
+
+
+def _diagnostico(estado, so_futuras):
+    if not estado:
+        return INEXISTENTE
+    if so_futuras and timezone.localdate(estado['gira__data_hora']) < timezone.localdate():
+        return GIRA_PASSADA
+    return None
+
+
+def assumir(model, filtro, medium_id, *, bloquear_cambone=True, so_futuras=False, usuario_id=None):
+    """
+    Assume a função identificada por `filtro` para o médium `medium_id`.
+    Só grava se a função estiver vaga (e, opcionalmente, não for cambone
+    e a gira não for passada). `usuario_id` vai para a auditoria.
+    """
+    condicoes = Q(pessoa_id__isnull=True)
+    if bloquear_cambone:
+        condicoes &= ~Q(tipo__istartswith='cambone')
+    if so_futuras:
+        condicoes &= _filtro_gira_aberta()
+
+    ganhou, estado, _ = _executar(model, filtro, condicoes, pessoa_id=medium_id, status=STATUS_PREENCHIDA)
+
+    if not estado:
+        return Resultado(False, INEXISTENTE)
+
+    res = _resultado(ganhou, estado)
+    if ganhou:
+        _apos_mudanca(model, res, auditoria.ASSUMIR, medium_id, usuario_id, categoria=estado['categoria'])
+        return res
+
+    # Não ganhou: descobre o motivo a partir do estado já lido
+    res.motivo = _diagnostico(estado, so_futuras)
+    if not res.motivo:
+        if estado['pessoa_id']:
+            res.motivo = OCUPADA
+        elif bloquear_cambone and (estado['tipo'] or '').lower().startswith('cambone'):
+            res.motivo = CAMBONE
+        else:
+            res.motivo = OCUPADA
+    return res
+
+
+def desistir(model, filtro, medium_id, *, qualquer_pessoa=False, so_futuras=False, usuario_id=None):
+    """
+    Libera a função identificada por `filtro`. Só grava se o médium for o
+    responsável (ou, com qualquer_pessoa=True, se houver alguém nela).
+    """
+    condicoes = Q(pessoa_id__isnull=False) if qualquer_pessoa else Q(pessoa_id=medium_id)
+    if so_futuras:
+        condicoes &= _filtro_gira_aberta()
+
+    ganhou, estado, anterior = _executar(
+        model, filtro, condicoes, anterior=LER if qualquer_pessoa else medium_id, pessoa_id=None, status=STATUS_VAGA
+    )
+
+    if not estado:
+        return Resultado(False, INEXISTENTE)
+
+    res = _resultado(ganhou, estado)
+    if ganhou:
+        _apos_mudanca(model, res, auditoria.DESISTIR, medium_id, usuario_id, anterior, estado['categoria'])
+    else:
+        res.motivo = _diagnostico(estado, so_futuras) or NAO_RESPONSAVEL
+    return res
+
+
+# -------------------------------------------------------------------
+# 🔹 Lote (vários assumir/desistir de uma gira numa transação)
+# -------------------------------------------------------------------
+ASSUMIR = 'assumir'
+DESISTIR = 'desistir'
+
+# Motivos extras do lote
+NAO_PERMITIDO = 'nao_permitido'
+MEDIUM_INEXISTENTE = 'medium_inexistente'
+OPERACAO_INVALIDA = 'operacao_invalida'
+FUNCAO_INVALIDA = 'funcao_invalida'
+MEDIUM_INVALIDO = 'medium_invalido'
+DUPLICADA = 'duplicada'
+JA_VAGA = 'ja_vaga'
+
+
+def _id(valor):
+    """Id inteiro positivo vindo do JSON (número ou texto só de dígitos), ou None."""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor if valor > 0 else None
+    if isinstance(valor, str) and valor.isdigit() and int(valor) > 0:
+        return int(valor)
+    return None
+
+
+def aplicar_lote(model, gira_id, operacoes, medium_id, *, coordenador=False, usuario_id=None):
+    """
+    Aplica uma lista de operações numa gira, na mesma transação.
+    Cada operação é um dict com 'funcao_id' ou 'chave', 'acao'
+    ('assumir'/'desistir') e, opcionalmente, 'medium_id' (só coordenador
+    pode atribuir a outro médium; sem coordenador vale o próprio).
+
+    As escritas são UPDATEs em conjunto (um por ação/médium) com as mesmas
+    condições do assumir/desistir unitário; o resultado de cada item sai
+    do estado lido antes e depois. Assumir o que já é do médium conta
+    como sucesso; desistir do que já estava vago é JA_VAGA (nada mudou).
+    Item com funcao_id/medium_id que não é id, ou sem chave válida, volta
+    com FUNCAO_INVALIDA/MEDIUM_INVALIDO sem tocar nos outros. Regras:
+      - gira passada: nada é feito (Resultado GIRA_PASSADA para todos);
+      - cambone: só coordenador;
+      - desistir: só da própria função, a não ser coordenador.
+    Retorna a lista de Resultado, na ordem das operações.
+    """
+    from .models import Gira, Medium
+
+    resultados = [None] * len(operacoes)
+
+    gira = Gira.objects.filter(id=gira_id).values('id', 'data_hora', 'linha').first()
+    if not gira:
+        return [Resultado(False, INEXISTENTE) for _ in operacoes]
+    if timezone.localdate(gira['data_hora']) < timezone.localdate():
+        return [Resultado(False, GIRA_PASSADA, gira_id=gira_id) for _ in operacoes]
+
+    # 1) resolve chave -> id (uma consulta) e valida cada item
+    def chave_de(op):
+        chave = op.get('chave')
+        return chave if isinstance(chave, str) and chave else None
+
+    chaves = {chave_de(op) for op in operacoes if op.get('funcao_id') is None and chave_de(op)}
+    por_chave = dict(
+        model.objects.filter(gira_id=gira_id, chave__in=chaves).values_list('chave', 'id')
+    ) if chaves else {}
+
+    pedidos = {}  # funcao_id -> (indice, acao, medium alvo)
+    for i, op in enumerate(operacoes):
+        acao = op.get('acao')
+        chave = chave_de(op)
+        if op.get('funcao_id') is not None:
+            fid = _id(op['funcao_id'])
+            fid_invalido = fid is None
+        else:
+            fid = por_chave.get(chave)
+            fid_invalido = op.get('chave') is not None and chave is None
+        alvo_medium = _id(op['medium_id']) if op.get('medium_id') is not None else medium_id
+        if acao not in (ASSUMIR, DESISTIR):
+            resultados[i] = Resultado(False, OPERACAO_INVALIDA, chave=chave)
+        elif fid_invalido:
+            resultados[i] = Resultado(False, FUNCAO_INVALIDA, chave=chave)
+        elif alvo_medium is None:
+            resultados[i] = Resultado(False, MEDIUM_INVALIDO, funcao_id=fid, chave=chave)
+        elif not fid:
+            resultados[i] = Resultado(False, INEXISTENTE, chave=chave)
+        elif fid in pedidos:
+            resultados[i] = Resultado(False, DUPLICADA, funcao_id=fid)
+        elif acao == ASSUMIR and not coordenador and alvo_medium != medium_id:
+            resultados[i] = Resultado(False, NAO_PERMITIDO, funcao_id=fid)
+        else:
+            pedidos[fid] = (i, acao, alvo_medium if acao == ASSUMIR else None)
+
+    alvos = {m for _, acao, m in pedidos.values() if acao == ASSUMIR}
+    validos = set(Medium.objects.filter(id__in=alvos).values_list('id', flat=True)) if alvos else set()
+    for fid, (i, acao, m) in list(pedidos.items()):
+        if acao == ASSUMIR and m not in validos:
+            resultados[i] = Resultado(False, MEDIUM_INEXISTENTE, funcao_id=fid)
+            del pedidos[fid]
+
+    # 2) UPDATEs em conjunto + estado antes/depois, tudo na mesma transação
+    campos = ('id', 'gira_id', 'chave', 'pessoa_id', 'pessoa__nome', 'status', 'tipo', 'categoria')
+    with transaction.atomic():
+        linhas = model.objects.select_for_update().filter(gira_id=gira_id, id__in=pedidos)
+        antes = dict(linhas.values_list('id', 'pessoa_id'))
+
+        grupos = {}
+        for fid, (_, acao, m) in pedidos.items():
+            if fid in antes:
+                grupos.setdefault((acao, m), []).append(fid)
+        for (acao, m), ids in grupos.items():
+            qs = model.objects.filter(gira_id=gira_id, id__in=ids)
+            if acao == ASSUMIR:
+                condicoes = Q(pessoa_id__isnull=True)
+                if not coordenador:
+                    condicoes &= ~Q(tipo__istartswith='cambone')
+                qs.filter(condicoes).update(pessoa_id=m, status=STATUS_PREENCHIDA)
+            else:
+                condicoes = Q(pessoa_id__isnull=False) if coordenador else Q(pessoa_id=medium_id)
+                qs.filter(condicoes).update(pessoa_id=None, status=STATUS_VAGA)
+
+        depois = {l['id']: l for l in model.objects.filter(gira_id=gira_id, id__in=antes).values(*campos)}
+        mudaram = [fid for fid in depois if depois[fid]['pessoa_id'] != antes[fid]]
+        if mudaram and model._meta.db_table == 'gira_funcao_historico':
+            versoes.registrar_mudanca(gira_id, mudaram)
+            for fid in mudaram:
+                estatisticas.registrar(
+                    gira['data_hora'], gira['linha'], depois[fid]['categoria'],
+                    antes[fid], depois[fid]['pessoa_id'], liberada=depois[fid]['pessoa_id'] is None,
+                )
+
+    # 3) resultado de cada item
+    for fid, (i, acao, m) in pedidos.items():
+        estado = depois.get(fid)
+        if estado is None:
+            resultados[i] = Resultado(False, INEXISTENTE, funcao_id=fid)
+            continue
+        desejado = m if acao == ASSUMIR else None
+        if acao == DESISTIR and antes.get(fid) is None:
+            res = _resultado(False, estado)
+            res.motivo = JA_VAGA
+            resultados[i] = res
+            continue
+        res = _resultado(estado['pessoa_id'] == desejado, estado)
+        if res:
+            if fid in mudaram:
+                _apos_mudanca(model, res, acao, m or medium_id, usuario_id, antes.get(fid), estado['categoria'])
+        elif acao == DESISTIR:
+            res.motivo = NAO_RESPONSAVEL
+        elif estado['pessoa_id']:
+            res.motivo = OCUPADA
+        elif not coordenador and (estado['tipo'] or '').lower().startswith('cambone'):
+            res.motivo = CAMBONE
+        else:
+            res.motivo = OCUPADA
+        resultados[i] = res
+    return resultados
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# 🔹 Auditoria (tabela gira_historico)
+# -------------------------------------------------------------------
+# Cada assumir/desistir e cada edição no admin vira uma linha de
+# Historico. Para não pesar no AJAX, registrar() só põe a linha num
+# buffer em memória; o buffer é gravado com bulk_create quando chega a
+# GIRA_AUDITORIA_LOTE linhas, a cada GIRA_AUDITORIA_INTERVALO segundos
+# (thread em segundo plano) e quando o worker encerra (atexit).
+#
+# Com GIRA_AUDITORIA_SINCRONA = True a linha é gravada na hora (útil em
+# testes e scripts). Se o processo morrer sem encerrar direito, o que
+# estava no buffer se perde: é um log de auditoria, não o dado em si.
+
+ASSUMIR = 'assumir'
+DESISTIR = 'desistir'
+ADMIN_CRIAR = 'admin_criar'
+ADMIN_EDITAR = 'admin_editar'
+ADMIN_EXCLUIR = 'admin_excluir'
+
+LOTE_PADRAO = 50
+INTERVALO_PADRAO = 2.0
+PAGINA = 50
+
+
+class Buffer:
+    """Fila de linhas de Historico ainda não gravadas. Thread-safe."""
+
+    def __init__(self, lote=LOTE_PADRAO, intervalo=INTERVALO_PADRAO):
+        self.lote = lote
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pendentes = []
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def adicionar(self, linha):
+        with self._lock:
+            self._pendentes.append(linha)
+            cheio = len(self._pendentes) >= self.lote
+            if self._thread is None:
+                self._iniciar()
+        if cheio:
+            self._acordar.set()
+
+    def _iniciar(self):
+        self._thread = threading.Thread(target=self._loop, name='gira-auditoria', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.gravar()
+            finally:
+                # thread própria = conexão própria; não deixa aberta entre lotes
+                connection.close()
+
+    def gravar(self):
+        """Grava tudo o que está pendente. Retorna quantas linhas gravou."""
+        with self._lock:
+            linhas, self._pendentes = self._pendentes, []
+        if not linhas:
+            return 0
+        return _gravar(linhas)
+
+    def __len__(self):
+        return len(self._pendentes)
+
+
+def _gravar(linhas):
+    from .models import Historico
+
+    try:
+        Historico.objects.bulk_create(linhas)
+        return len(linhas)
+    except Exception:
+        # uma linha ruim (ex.: função apagada nesse meio tempo) não pode
+        # derrubar o lote inteiro: tenta uma a uma
+        logger.exception("Falha ao gravar lote de auditoria; gravando linha a linha")
+    gravadas = 0
+    for linha in linhas:
+        try:
+            _inserir(linha)
+        except Exception:
+            if linha.funcao_id is None:
+                logger.exception("Linha de auditoria descartada: %s %s", linha.acao, linha.info)
+                continue
+            # função apagada antes do flush: grava sem a FK (o id fica no info)
+            linha.info = dict(linha.info or {}, funcao_id=linha.funcao_id)
+            linha.funcao_id = None
+            try:
+                _inserir(linha)
+            except Exception:
+                logger.exception("Linha de auditoria descartada: %s %s", linha.acao, linha.info)
+                continue
+        gravadas += 1
+    return gravadas
+
+
+def _inserir(linha):
+    linha.pk = None
+    linha.save(force_insert=True)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def buffer():
+    """Buffer (único por processo)."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = Buffer(
+                    lote=getattr(settings, 'GIRA_AUDITORIA_LOTE', LOTE_PADRAO),
+                    intervalo=getattr(settings, 'GIRA_AUDITORIA_INTERVALO', INTERVALO_PADRAO),
+                )
+                atexit.register(_buffer.gravar)
+    return _buffer
+
+
+def registrar(acao, gira_id, *, funcao_id=None, usuario_id=None, info=None):
+    """Registra uma ação na auditoria da gira (no buffer ou na hora)."""
+    from .models import Historico
+
+    linha = Historico(gira_id=gira_id, funcao_id=funcao_id, usuario_id=usuario_id, acao=acao, info=info)
+    if getattr(settings, 'GIRA_AUDITORIA_SINCRONA', False):
+        _gravar([linha])
+    else:
+        buffer().adicionar(linha)
+
+
+def gravar_pendentes():
+    """Força a gravação do buffer (ex.: antes de ler em scripts)."""
+    return buffer().gravar() if _buffer is not None else 0
+
+
+def pagina(gira_id, antes=None, limite=PAGINA):
+    """
+    Página da auditoria da gira, da mais nova para a mais antiga.
+    `antes` é o id da última linha da página anterior. Retorna
+    {'itens': [...], 'antes': <id para a próxima página ou None>}.
+    """
+    from .models import Historico
+
+    qs = Historico.objects.filter(gira_id=gira_id)
+    if antes:
+        qs = qs.filter(id__lt=antes)
+    linhas = list(
+        qs.order_by('-id')
+        .values('id', 'acao', 'data', 'funcao_id', 'usuario_id', 'usuario__nome', 'info')[:limite + 1]
+    )
+    itens = [
+        {
+            'id': l['id'],
+            'acao': l['acao'],
+            'data': l['data'].isoformat(),
+            'funcao_id': l['funcao_id'],
+            'usuario_id': l['usuario_id'],
+            'usuario_nome': l['usuario__nome'],
+            'info': l['info'],
+        }
+        for l in linhas[:limite]
+    ]
+    return {'itens': itens, 'antes': itens[-1]['id'] if len(linhas) > limite else None}
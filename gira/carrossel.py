@@ -0,0 +1,72 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# -------------------------------------------------------------------
+# 🔹 Índice de giras do carrossel (paginação por cursor / keyset)
+# -------------------------------------------------------------------
+# Em vez de mandar todas as giras para a página, o carrossel recebe uma
+# janela em volta da gira atual e pede as vizinhas sob demanda.
+# Cursor = "<data_hora ISO>|<id>" da gira na ponta da página; o id
+# desempata giras no mesmo horário. Usa o índice (data_hora, id).
+
+TAMANHO_PAGINA = 10
+CAMPOS = ('id', 'data_hora', 'linha', 'versao')  # versao: ?v= do JSON congelado (snapshots.py)
+
+
+def cursor(gira):
+    return f"{gira['data_hora'].isoformat()}|{gira['id']}"
+
+
+def ler_cursor(valor):
+    """Converte o cursor em (data_hora, id); None se inválido."""
+    if not valor or '|' not in valor:
+        return None
+    data, _, gid = valor.rpartition('|')
+    data_hora = parse_datetime(data)
+    if data_hora is None or not gid.isdigit():
+        return None
+    return data_hora, int(gid)
+
+
+def antes(pos, limite=TAMANHO_PAGINA):
+    """Até `limite` giras imediatamente antes de `pos`, em ordem crescente, e se há mais."""
+    from .models import Gira
+
+    data_hora, gid = pos
+    linhas = list(
+        Gira.objects.filter(Q(data_hora__lt=data_hora) | Q(data_hora=data_hora, id__lt=gid))
+        .order_by('-data_hora', '-id')
+        .values(*CAMPOS)[:limite + 1]
+    )
+    return linhas[:limite][::-1], len(linhas) > limite
+
+
+def depois(pos, limite=TAMANHO_PAGINA):
+    """Até `limite` giras imediatamente depois de `pos`, em ordem crescente, e se há mais."""
+    from .models import Gira
+
+    data_hora, gid = pos
+    linhas = list(
+        Gira.objects.filter(Q(data_hora__gt=data_hora) | Q(data_hora=data_hora, id__gt=gid))
+        .order_by('data_hora', 'id')
+        .values(*CAMPOS)[:limite + 1]
+    )
+    return linhas[:limite], len(linhas) > limite
+
+
+def pagina(giras, mais_antes, mais_depois):
+    """Formato devolvido ao JS: as giras e os cursores das pontas (None = fim)."""
+    return {
+        'giras': giras,
+        'antes': cursor(giras[0]) if giras and mais_antes else None,
+        'depois': cursor(giras[-1]) if giras and mais_depois else None,
+    }
+
+
+def janela(gira, limite=TAMANHO_PAGINA // 2):
+    """Página centrada na gira (dict com id, data_hora, linha e versao)."""
+    pos = (gira['data_hora'], gira['id'])
+    anteriores, mais_antes = antes(pos, limite)
+    proximas, mais_depois = depois(pos, limite)
+    return pagina(anteriores + [gira] + proximas, mais_antes, mais_depois)
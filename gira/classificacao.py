@@ -0,0 +1,134 @@
+import unicodedata
+
+from django.db.models import Case, F, Value, When
+
+
+# -------------------------------------------------------------------
+# 🔹 Classificação das funções (Cambones / Organização / Limpeza)
+# -------------------------------------------------------------------
+# Calculada uma única vez, quando a linha de gira_funcao ou
+# gira_funcao_historico é gravada. As views só fazem
+# ORDER BY categoria, ordem_exibicao.
+
+CAMBONE = 0
+ORGANIZACAO = 1
+LIMPEZA = 2
+
+CATEGORIAS = [
+    (CAMBONE, 'Cambones'),
+    (ORGANIZACAO, 'Organização'),
+    (LIMPEZA, 'Limpeza'),
+]
+
+# nome usado nos contextos/JSON ('cambones', 'organizacao', 'limpeza')
+GRUPOS = {CAMBONE: 'cambones', ORGANIZACAO: 'organizacao', LIMPEZA: 'limpeza'}
+
+# Palavras que jogam a função para "Organização" ("portão" composto e decomposto)
+_PALAVRAS_ORGANIZACAO = ['organ', 'senha', 'port\u00e3o', 'porta\u0303o', 'lojinh', 'chamar']
+
+# Organização – ordem fixa (o que não casar vai para o fim)
+ORDEM_ORGANIZACAO = ['portao', 'distribuir senha', 'lojinha', 'chamar senha']
+
+
+def normalizar(s: str) -> str:
+    """Remove acentos e normaliza texto para comparação."""
+    if not s:
+        return ''
+    s = s.lower()
+    s = unicodedata.normalize('NFKD', s)
+    return ''.join(ch for ch in s if not unicodedata.combining(ch))
+
+
+def normalizar_nome(nome: str) -> str:
+    """normalizar() com os espaços colapsados (coluna Medium.nome_normalizado)."""
+    return ' '.join(normalizar(nome).split())
+
+
+def _eh_mae_bruna(nome_normalizado):
+    n = nome_normalizado
+    return 'mae bruna' in n or ('mae' in n and 'bruna' in n)
+
+
+def classificar(tipo, chave, descricao, medium_de_linha_nome=None):
+    """
+    Retorna (categoria, ordem_exibicao, display_descricao, medium_nome_normalizado).
+    - Cambones: "Mãe Bruna" primeiro (ordem 0), demais em ordem 1 (e por nome);
+    - Organização: posição na ORDEM_ORGANIZACAO;
+    - Limpeza: descrição padronizada "Limpeza".
+    """
+    t = (tipo or '').lower()
+    c = (chave or '').lower()
+    d = (descricao or '').lower()
+    nome_normalizado = normalizar(medium_de_linha_nome)
+
+    if 'cambone' in t or 'cambone' in c or 'cambone' in d:
+        categoria = CAMBONE
+    elif any(k in t or k in c or k in d for k in _PALAVRAS_ORGANIZACAO):
+        categoria = ORGANIZACAO
+    elif 'limp' in t or 'limp' in c or 'limp' in d:
+        categoria = LIMPEZA
+    else:
+        categoria = ORGANIZACAO
+
+    display = descricao or tipo or ''
+    if categoria == CAMBONE:
+        ordem = 0 if _eh_mae_bruna(nome_normalizado) else 1
+    elif categoria == ORGANIZACAO:
+        descr = normalizar(descricao or tipo or '')
+        ordem = next(
+            (i for i, key in enumerate(ORDEM_ORGANIZACAO) if key in descr),
+            len(ORDEM_ORGANIZACAO),
+        )
+    else:
+        ordem = 0
+        display = 'Limpeza' if 'limp' in display.lower() else display or 'Limpeza'
+
+    return categoria, ordem, display, nome_normalizado
+
+
+def aplicar(funcao):
+    """Preenche os campos derivados de uma Funcao/GiraFuncaoHistorico (sem salvar)."""
+    medium = funcao.medium_de_linha if funcao.medium_de_linha_id else None
+    (
+        funcao.categoria,
+        funcao.ordem_exibicao,
+        funcao.display_descricao,
+        funcao.medium_nome_normalizado,
+    ) = classificar(funcao.tipo, funcao.chave, funcao.descricao, medium.nome if medium else None)
+    return funcao
+
+
+CAMPOS_DERIVADOS = ['categoria', 'ordem_exibicao', 'display_descricao', 'medium_nome_normalizado']
+CAMPOS_ORIGEM = {'tipo', 'chave', 'descricao', 'medium_de_linha', 'medium_de_linha_id'}
+
+# Ordem do quadro. O nome do médium de linha só desempata cambones
+# (organização e limpeza seguem a posição).
+ORDEM_QUADRO = (
+    'categoria',
+    'ordem_exibicao',
+    Case(When(categoria=CAMBONE, then=F('medium_nome_normalizado')), default=Value('')),
+    'posicao',
+)
+
+
+def atualizar_medium(medium):
+    """
+    Propaga a troca de nome de um médium para as funções em que ele é
+    médium de linha (nome normalizado e a regra "Mãe Bruna primeiro").
+    """
+    from .models import Funcao, GiraFuncaoHistorico
+
+    nome_normalizado = normalizar(medium.nome)
+    ordem_cambone = 0 if _eh_mae_bruna(nome_normalizado) else 1
+    for model in (Funcao, GiraFuncaoHistorico):
+        qs = model.objects.filter(medium_de_linha_id=medium.id)
+        qs.exclude(medium_nome_normalizado=nome_normalizado).update(medium_nome_normalizado=nome_normalizado)
+        qs.filter(categoria=CAMBONE).exclude(ordem_exibicao=ordem_cambone).update(ordem_exibicao=ordem_cambone)
+
+
+def agrupar(funcoes):
+    """Separa uma lista JÁ ORDENADA por ORDEM_QUADRO em cambones/organização/limpeza."""
+    grupos = {CAMBONE: [], ORGANIZACAO: [], LIMPEZA: []}
+    for f in funcoes:
+        grupos[f.categoria].append(f)
+    return grupos[CAMBONE], grupos[ORGANIZACAO], grupos[LIMPEZA]
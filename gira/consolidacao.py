@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from . import estatisticas, minhas, quadro_cache, versoes
+
+
+# -------------------------------------------------------------------
+# 🔹 Consolidação de gira_funcao em gira_funcao_historico
+# -------------------------------------------------------------------
+# O quadro de /funcoes/ lia gira_funcao e o de /funcoes_dev/ lia
+# gira_funcao_historico: duas tabelas quase iguais, cada uma com a sua
+# consulta, o seu cache e os seus assumir/desistir, e os dados divergindo.
+# Agora as duas URLs leem e gravam só gira_funcao_historico; gira_funcao
+# fica como legado (admin e consulta).
+#
+# `manage.py consolidar_funcoes` copia gira_funcao para lá:
+#   - lê gira_funcao em lotes, por id;
+#   - casa cada linha com a de gira_funcao_historico de mesma (gira, chave)
+#     (a restrição única da tabela);
+#   - relata o que falta, o que difere (por campo) e o que só existe no
+#     histórico;
+#   - com gravar=True faz upsert do lote (INSERT ... ON CONFLICT (gira_id,
+#     chave) DO UPDATE) e marca as funções alteradas na versão da gira.
+# Roda UMA vez, na troca: a migração 0005_consolidar_funcoes (cópia
+# congelada desta regra, com os models históricos) grava no build
+# (migrate), antes de o código novo subir. Depois dela gira_funcao
+# não recebe mais assumir/desistir, e gravar de novo desfaria o que mudou
+# no histórico; o comando fica para relatar diferenças.
+
+CAMPOS = (
+    'tipo', 'descricao', 'status', 'posicao', 'pessoa_id', 'medium_de_linha_id',
+    'categoria', 'ordem_exibicao', 'display_descricao', 'medium_nome_normalizado',
+)
+LOTE = 500
+EXEMPLOS = 20
+
+
+def _normalizar(campo, valor):
+    # descricao: TextField em gira_funcao, varchar(255) no histórico
+    if campo == 'descricao' and valor:
+        return valor[:255]
+    return valor
+
+
+def consolidar(gira_ids=None, lote=LOTE, gravar=False):
+    """
+    Compara (e, com gravar=True, copia) gira_funcao em
+    gira_funcao_historico. Retorna o relatório:
+      {'lidas', 'novas', 'alteradas', 'iguais', 'sem_chave', 'repetidas',
+       'so_no_historico', 'campos': {campo: n}, 'exemplos': [...]}
+    """
+    from .models import Funcao, GiraFuncaoHistorico
+
+    relatorio = {
+        'lidas': 0, 'novas': 0, 'alteradas': 0, 'iguais': 0, 'sem_chave': 0, 'repetidas': 0,
+        'so_no_historico': 0, 'campos': Counter(), 'exemplos': [],
+    }
+    funcoes = Funcao.objects.order_by('pk')
+    if gira_ids:
+        funcoes = funcoes.filter(gira_id__in=gira_ids)
+
+    vistas = set()
+    ultimo = 0
+    mudou_participacao = False
+    while True:
+        linhas = list(funcoes.filter(pk__gt=ultimo).values('id', 'gira_id', 'chave', *CAMPOS)[:lote])
+        if not linhas:
+            break
+        ultimo = linhas[-1]['id']
+        relatorio['lidas'] += len(linhas)
+
+        copiar = []
+        for l in linhas:
+            if not l['chave']:
+                relatorio['sem_chave'] += 1
+            elif (l['gira_id'], l['chave']) in vistas:
+                # mesma (gira, chave) repetida em gira_funcao: vale a de menor id
+                relatorio['repetidas'] += 1
+            else:
+                vistas.add((l['gira_id'], l['chave']))
+                copiar.append(l)
+
+        existentes = {
+            (h['gira_id'], h['chave']): h
+            for h in GiraFuncaoHistorico.objects.filter(
+                gira_id__in={l['gira_id'] for l in copiar}, chave__in={l['chave'] for l in copiar}
+            ).order_by().values('id', 'gira_id', 'chave', *CAMPOS)
+        }
+
+        gravar_lote = []
+        for l in copiar:
+            valores = {campo: _normalizar(campo, l[campo]) for campo in CAMPOS}
+            atual = existentes.get((l['gira_id'], l['chave']))
+            if atual is None:
+                relatorio['novas'] += 1
+                diferentes = list(CAMPOS)
+            else:
+                diferentes = [campo for campo in CAMPOS if atual[campo] != valores[campo]]
+                if not diferentes:
+                    relatorio['iguais'] += 1
+                    continue
+                relatorio['alteradas'] += 1
+                relatorio['campos'].update(diferentes)
+            if len(relatorio['exemplos']) < EXEMPLOS:
+                relatorio['exemplos'].append({
+                    'gira_id': l['gira_id'],
+                    'chave': l['chave'],
+                    'funcao_id': l['id'],
+                    'historico_id': atual['id'] if atual else None,
+                    'campos': {c: [atual[c] if atual else None, valores[c]] for c in diferentes},
+                })
+            tinha_pessoa = valores['pessoa_id'] or (atual or {}).get('pessoa_id')
+            if tinha_pessoa and {'pessoa_id', 'categoria'}.intersection(diferentes):
+                mudou_participacao = True
+            gravar_lote.append((l['gira_id'], l['chave'], valores, atual))
+
+        if gravar and gravar_lote:
+            _gravar(gravar_lote)
+
+    if gravar and mudou_participacao:
+        estatisticas.reconstruir()
+
+    historico = GiraFuncaoHistorico.objects.exclude(chave__isnull=True).exclude(
+        Exists(Funcao.objects.filter(gira_id=OuterRef('gira_id'), chave=OuterRef('chave')))
+    )
+    if gira_ids:
+        historico = historico.filter(gira_id__in=gira_ids)
+    relatorio['so_no_historico'] = historico.count()
+    relatorio['campos'] = dict(relatorio['campos'])
+    return relatorio
+
+
+def _gravar(linhas):
+    """Upsert de um lote por (gira, chave) + versão/caches das giras tocadas."""
+    from .models import GiraFuncaoHistorico
+
+    objetos = [GiraFuncaoHistorico(gira_id=gira_id, chave=chave, **valores) for gira_id, chave, valores, _ in linhas]
+    por_gira = defaultdict(set)
+    pessoas = set()
+    for gira_id, chave, valores, atual in linhas:
+        por_gira[gira_id].add(chave)
+        pessoas.update([valores['pessoa_id'], atual['pessoa_id'] if atual else None])
+
+    with transaction.atomic():
+        # bulk_create não passa pelo save(): os campos derivados já vêm de gira_funcao
+        GiraFuncaoHistorico.objects.bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=['gira', 'chave'],
+            update_fields=[campo.removesuffix('_id') for campo in CAMPOS],
+            batch_size=LOTE,
+        )
+        for gira_id, chaves in por_gira.items():
+            ids = list(
+                GiraFuncaoHistorico.objects.filter(gira_id=gira_id, chave__in=chaves).values_list('id', flat=True)
+            )
+            versoes.registrar_mudanca(gira_id, ids)
+
+    def efeitos():
+        minhas.invalidar(*pessoas)
+        for gira_id in por_gira:
+            quadro_cache.invalidar(gira_id)
+
+    transaction.on_commit(efeitos)
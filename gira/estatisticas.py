@@ -0,0 +1,271 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, F, IntegerField, OuterRef, Subquery
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce, TruncMonth
+from django.utils import timezone
+
+from . import auditoria, classificacao
+
+
+# -------------------------------------------------------------------
+# 🔹 Participação dos médiuns (tabela-resumo gira_participacao)
+# -------------------------------------------------------------------
+# Uma linha por (médium, mês da gira, linha, categoria) com:
+#   servidas  → funções de gira_funcao_historico com pessoa = médium;
+#   liberadas → desistências de uma função que era do médium.
+#
+# O painel lê só esta tabela. Ela é mantida por delta, na mesma
+# transação da mudança:
+#   - assumir / desistir / lote (gira/atribuicao.py);
+#   - rodízio de cambones (gira/rodizio.py);
+#   - saves e exclusões do admin/scripts (gira/signals.py), inclusive
+#     a gira que muda de data ou de linha.
+# `manage.py reconstruir_participacao` apaga e recalcula tudo com dois
+# GROUP BY (funções e auditoria) — para a carga inicial ou se o resumo
+# ficar torto. As desistências saem da auditoria (gira_historico), que é
+# gravada em lote: antes de ler, o buffer deste processo é gravado
+# (auditoria.gravar_pendentes); o dos outros workers vai para o banco em
+# até GIRA_AUDITORIA_INTERVALO segundos.
+#
+# Giras futuras também contam (a função já foi assumida); o painel
+# separa por mês.
+
+_DELTA_VAZIO = (0, 0)
+
+
+def mes(data_hora):
+    """Primeiro dia do mês (no fuso local) da data/hora da gira."""
+    return timezone.localdate(data_hora).replace(day=1)
+
+
+def _aplicar(linhas):
+    """
+    Soma [(medium_id, mes, linha, categoria, servidas, liberadas)] no resumo
+    num só comando: INSERT ... ON CONFLICT DO UPDATE SET x = x + delta.
+    """
+    from .models import Participacao
+
+    if not linhas:
+        return
+    tabela = Participacao._meta.db_table
+    params = []
+    for medium_id, mes_, linha, categoria, servidas, liberadas in linhas:
+        params += [medium_id, connection.ops.adapt_datefield_value(mes_), linha, categoria, servidas, liberadas]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {tabela} (medium_id, mes, linha, categoria, servidas, liberadas) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(linhas))} "
+            f"ON CONFLICT (medium_id, mes, linha, categoria) DO UPDATE SET "
+            f"servidas = {tabela}.servidas + EXCLUDED.servidas, "
+            f"liberadas = {tabela}.liberadas + EXCLUDED.liberadas",
+            params,
+        )
+
+
+def acumular(deltas, medium_id, categoria, servidas=0, liberadas=0):
+    """Soma um delta em {(medium_id, categoria): (servidas, liberadas)}."""
+    s, l = deltas.get((medium_id, categoria), _DELTA_VAZIO)
+    deltas[(medium_id, categoria)] = (s + servidas, l + liberadas)
+
+
+def _linhas(data_hora, linha, deltas):
+    mes_ = mes(data_hora)
+    return [
+        (medium_id, mes_, linha or '', categoria, servidas, liberadas)
+        for (medium_id, categoria), (servidas, liberadas) in deltas.items()
+        if medium_id and (servidas or liberadas)
+    ]
+
+
+def somar(data_hora, linha, deltas):
+    """Aplica {(medium_id, categoria): (servidas, liberadas)} no mês/linha da gira."""
+    _aplicar(_linhas(data_hora, linha, deltas))
+
+
+def somar_varias(itens):
+    """somar() de várias giras num comando só: itens = [(data_hora, linha, deltas)]."""
+    _aplicar([l for data_hora, linha, deltas in itens for l in _linhas(data_hora, linha, deltas)])
+
+
+def somar_gira(gira_id, deltas):
+    """somar() buscando a data e a linha da gira."""
+    from .models import Gira
+
+    gira = Gira.objects.filter(id=gira_id).values_list('data_hora', 'linha').first()
+    if gira and deltas:
+        somar(gira[0], gira[1], deltas)
+
+
+def registrar(data_hora, linha, categoria, anterior_id, novo_id, liberada=False):
+    """
+    Uma função que passou de `anterior_id` para `novo_id` (None = vaga).
+    liberada=True conta a saída do anterior como desistência.
+    """
+    if anterior_id == novo_id:
+        return
+    deltas = {}
+    if anterior_id:
+        acumular(deltas, anterior_id, categoria, -1, 1 if liberada else 0)
+    if novo_id:
+        acumular(deltas, novo_id, categoria, 1)
+    somar(data_hora, linha, deltas)
+
+
+def trocar(antes, depois):
+    """
+    Edição fora do assumir/desistir (admin, scripts): `antes` e `depois`
+    são (gira_id, categoria, pessoa_id) da função, ou None.
+    """
+    if antes == depois:
+        return
+    por_gira = defaultdict(dict)
+    if antes and antes[2]:
+        acumular(por_gira[antes[0]], antes[2], antes[1], -1)
+    if depois and depois[2]:
+        acumular(por_gira[depois[0]], depois[2], depois[1], 1)
+    for gira_id, deltas in por_gira.items():
+        somar_gira(gira_id, deltas)
+
+
+# -------------------------------------------------------------------
+# 🔹 Recalcular a partir das tabelas de origem (GROUP BY)
+# -------------------------------------------------------------------
+def _servidas(por_mes, **filtro):
+    from .models import GiraFuncaoHistorico
+
+    campos = ['pessoa_id', 'categoria']
+    qs = GiraFuncaoHistorico.objects.filter(pessoa_id__isnull=False, **filtro).order_by()
+    if por_mes:
+        qs = qs.annotate(mes=TruncMonth('gira__data_hora', output_field=DateField()), linha=F('gira__linha'))
+        campos += ['mes', 'linha']
+    return qs.values(*campos).annotate(n=Count('id')).values_list('n', *campos)
+
+
+def _liberadas(por_mes, **filtro):
+    from .models import GiraFuncaoHistorico, Historico
+
+    # desistências ainda no buffer da auditoria também contam
+    auditoria.gravar_pendentes()
+
+    # quem saiu: info.anterior_id (desistências mais antigas só têm o medium_id de quem pediu);
+    # categoria: info.categoria ou, nas mais antigas, a da função
+    categoria_funcao = GiraFuncaoHistorico.objects.filter(pk=OuterRef('funcao_historico')).values('categoria')[:1]
+    qs = (
+        Historico.objects.filter(acao=auditoria.DESISTIR, info__origem='historico', **filtro)
+        .order_by()
+        .annotate(
+            funcao_historico=Cast(KeyTextTransform('funcao_id', 'info'), IntegerField()),
+            medium=Cast(Coalesce(KeyTextTransform('anterior_id', 'info'), KeyTextTransform('medium_id', 'info')),
+                        IntegerField()),
+        )
+        .annotate(cat=Coalesce(
+            Cast(KeyTextTransform('categoria', 'info'), IntegerField()), Subquery(categoria_funcao),
+            output_field=IntegerField(),
+        ))
+        .filter(medium__isnull=False, cat__isnull=False)
+    )
+    campos = ['medium', 'cat']
+    if por_mes:
+        qs = qs.annotate(mes=TruncMonth('gira__data_hora', output_field=DateField()), linha=F('gira__linha'))
+        campos += ['mes', 'linha']
+    return qs.values(*campos).annotate(n=Count('id')).values_list('n', *campos)
+
+
+def contribuicao(gira_id):
+    """{(medium_id, categoria): (servidas, liberadas)} de uma gira."""
+    deltas = {}
+    for n, medium_id, categoria in _servidas(False, gira_id=gira_id):
+        acumular(deltas, medium_id, categoria, servidas=n)
+    for n, medium_id, categoria in _liberadas(False, gira_id=gira_id):
+        acumular(deltas, medium_id, categoria, liberadas=n)
+    return deltas
+
+
+def _negativo(deltas):
+    return {chave: (-s, -l) for chave, (s, l) in deltas.items()}
+
+
+def mover_gira(gira_id, antes, depois):
+    """A gira mudou de mês ou de linha: `antes`/`depois` são (data_hora, linha)."""
+    if (mes(antes[0]), antes[1]) == (mes(depois[0]), depois[1]):
+        return
+    deltas = contribuicao(gira_id)
+    somar(antes[0], antes[1], _negativo(deltas))
+    somar(depois[0], depois[1], deltas)
+
+
+def remover_gira(data_hora, linha, gira_id):
+    """Tira do resumo tudo o que a gira contava (antes de ela ser apagada)."""
+    somar(data_hora, linha, _negativo(contribuicao(gira_id)))
+
+
+def reconstruir():
+    """Apaga e recalcula gira_participacao inteira. Retorna o número de linhas gravadas."""
+    from .models import Participacao
+
+    linhas = defaultdict(lambda: [0, 0])
+    for n, medium_id, categoria, mes_, linha in _servidas(True):
+        linhas[(medium_id, mes_, linha or '', categoria)][0] += n
+    for n, medium_id, categoria, mes_, linha in _liberadas(True):
+        linhas[(medium_id, mes_, linha or '', categoria)][1] += n
+
+    with transaction.atomic():
+        Participacao.objects.all().delete()
+        Participacao.objects.bulk_create(
+            [
+                Participacao(medium_id=m, mes=mes_, linha=linha, categoria=c, servidas=s, liberadas=l)
+                for (m, mes_, linha, c), (s, l) in linhas.items()
+            ],
+            batch_size=1000,
+        )
+    return len(linhas)
+
+
+# -------------------------------------------------------------------
+# 🔹 Painel (lê só gira_participacao)
+# -------------------------------------------------------------------
+def resumo(de=None, ate=None, linha=None, medium_id=None):
+    """
+    Totais por médium entre os meses `de` e `ate` (datas, inclusive), com
+    a quebra por grupo, por linha e por mês. Uma consulta, na tabela-resumo.
+    """
+    from .models import Participacao
+
+    qs = Participacao.objects.all()
+    if de:
+        qs = qs.filter(mes__gte=de.replace(day=1))
+    if ate:
+        qs = qs.filter(mes__lte=ate.replace(day=1))
+    if linha:
+        qs = qs.filter(linha__icontains=linha)
+    if medium_id:
+        qs = qs.filter(medium_id=medium_id)
+
+    mediuns = {}
+    meses = set()
+    for l in qs.values('medium_id', 'medium__nome', 'mes', 'linha', 'categoria', 'servidas', 'liberadas'):
+        m = mediuns.get(l['medium_id'])
+        if m is None:
+            m = mediuns[l['medium_id']] = {
+                'medium_id': l['medium_id'],
+                'nome': l['medium__nome'],
+                'servidas': 0,
+                'liberadas': 0,
+                'por_grupo': dict.fromkeys(classificacao.GRUPOS.values(), 0),
+                'por_linha': {},
+                'por_mes': {},
+            }
+        mes_ = l['mes'].strftime('%Y-%m')
+        meses.add(mes_)
+        m['servidas'] += l['servidas']
+        m['liberadas'] += l['liberadas']
+        m['por_grupo'][classificacao.GRUPOS[l['categoria']]] += l['servidas']
+        m['por_linha'][l['linha']] = m['por_linha'].get(l['linha'], 0) + l['servidas']
+        m['por_mes'][mes_] = m['por_mes'].get(mes_, 0) + l['servidas']
+
+    return {
+        'meses': sorted(meses),
+        'mediuns': sorted(mediuns.values(), key=lambda m: (-m['servidas'], m['nome'] or '')),
+    }
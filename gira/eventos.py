@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# -------------------------------------------------------------------
+# 🔹 Eventos do quadro (SSE / long-poll)
+# -------------------------------------------------------------------
+# Cada assumir/desistir confirmado publica um evento pequeno
+#   {instancia, seq, origem, funcao_id, chave, status, pessoa_id, pessoa_nome}
+# no canal da gira. O broker padrão é em memória, no próprio processo:
+# funciona sem Redis, mas só entrega eventos para conexões do mesmo
+# worker. Para trocar de implementação, aponte GIRA_EVENTOS_BROKER para
+# outra classe com a mesma interface (instancia, publicar, desde, ultimo,
+# cursor, assinar, cancelar).
+#
+# `seq` só vale dentro de uma `instancia` do broker: o em memória começa
+# de 0 a cada worker que sobe (deploy, restart) e cada worker tem a sua.
+# Por isso o cliente guarda o cursor "<instancia>:<seq>"; quando a
+# instancia muda, os views mandam 'recarregar' e o JS relê o quadro
+# (gira/static/js/eventos.js) em vez de ignorar os eventos "velhos".
+
+HISTORICO_POR_GIRA = 200
+
+
+class BrokerEmMemoria:
+    """Fan-out em memória. Thread-safe; assinantes são filas asyncio."""
+
+    def __init__(self, historico=HISTORICO_POR_GIRA):
+        self._lock = threading.Lock()
+        self.instancia = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._historico = historico
+        self._recentes = {}    # gira_id -> deque[(seq, evento)]
+        self._assinantes = {}  # gira_id -> {fila: loop}
+
+    def publicar(self, gira_id, evento):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            evento = dict(evento, instancia=self.instancia, seq=seq)
+            self._recentes.setdefault(gira_id, deque(maxlen=self._historico)).append((seq, evento))
+            assinantes = list(self._assinantes.get(gira_id, {}).items())
+        for fila, loop in assinantes:
+            try:
+                loop.call_soon_threadsafe(fila.put_nowait, (seq, evento))
+            except RuntimeError:
+                # loop já encerrado: a conexão caiu sem cancelar
+                self.cancelar(gira_id, fila)
+        return seq
+
+    def ultimo(self):
+        """Número do último evento publicado (qualquer gira)."""
+        return self._seq
+
+    def cursor(self):
+        """Cursor para o cliente continuar daqui: "<instancia>:<seq>"."""
+        return formatar_cursor(self.instancia, self._seq)
+
+    def desde(self, gira_id, seq):
+        """Eventos da gira com número maior que `seq` (dentro do histórico)."""
+        with self._lock:
+            return [item for item in self._recentes.get(gira_id, ()) if item[0] > seq]
+
+    def assinar(self, gira_id):
+        """Cria a fila de um assinante. Deve ser chamado dentro do event loop."""
+        fila = asyncio.Queue()
+        with self._lock:
+            self._assinantes.setdefault(gira_id, {})[fila] = asyncio.get_running_loop()
+        return fila
+
+    def cancelar(self, gira_id, fila):
+        with self._lock:
+            assinantes = self._assinantes.get(gira_id)
+            if assinantes is not None:
+                assinantes.pop(fila, None)
+                if not assinantes:
+                    self._assinantes.pop(gira_id, None)
+
+
+def formatar_cursor(instancia, seq):
+    return f'{instancia}:{seq}'
+
+
+def ler_cursor(valor):
+    """
+    (instancia, seq) de um cursor "<instancia>:<seq>". Um número sozinho
+    (páginas antigas) vem com instancia None; lixo vira (None, 0).
+    """
+    instancia, _, seq = str(valor or '').rpartition(':')
+    if not seq.isdigit():
+        return None, 0
+    return instancia or None, int(seq)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def broker():
+    """Instância (única por processo) do broker configurado."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                classe = getattr(settings, 'GIRA_EVENTOS_BROKER', 'gira.eventos.BrokerEmMemoria')
+                _broker = import_string(classe)()
+    return _broker
+
+
+def publicar(gira_id, origem, funcao_id, chave, status, pessoa_id, pessoa_nome):
+    """Publica a mudança de uma função. `origem`: 'funcao' ou 'historico'."""
+    return broker().publicar(gira_id, {
+        'origem': origem,
+        'funcao_id': funcao_id,
+        'chave': chave,
+        'status': status,
+        'pessoa_id': pessoa_id,
+        'pessoa_nome': pessoa_nome,
+    })
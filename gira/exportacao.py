@@ -0,0 +1,139 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import classificacao
+
+
+# -------------------------------------------------------------------
+# 🔹 Exportação do histórico (CSV / JSONL, em streaming)
+# -------------------------------------------------------------------
+# Relatório de participação para todo o histórico, sem montar o arquivo
+# na memória: values() com os JOINs necessários, lido com
+# iterator(chunk_size=...) (cursor no servidor no PostgreSQL) e escrito
+# linha a linha. A memória fica do tamanho de um lote, não do arquivo.
+#
+# Fontes:
+#   'funcoes'   → gira_funcao_historico já preenchidas (quem serviu o quê);
+#   'auditoria' → gira_historico (assumir, desistir, admin...).
+# Filtros: de / ate (datas, inclusive) e linha (contém, sem diferenciar
+# maiúsculas). Em 'funcoes' as datas são da gira; em 'auditoria', da ação.
+#
+# Usado pela view exportar_historico e pelo comando exportar_historico.
+
+FONTES = ('funcoes', 'auditoria')
+FORMATOS = ('csv', 'jsonl')
+LOTE = 2000
+
+COLUNAS = {
+    'funcoes': (
+        'gira_id', 'data_gira', 'linha', 'funcao_id', 'chave', 'funcao', 'grupo',
+        'pessoa_id', 'pessoa', 'medium_de_linha_id', 'medium_de_linha',
+    ),
+    'auditoria': (
+        'id', 'data', 'acao', 'gira_id', 'data_gira', 'linha', 'funcao_id', 'usuario_id', 'usuario', 'info',
+    ),
+}
+
+
+def _funcoes(de, ate, linha):
+    from .models import GiraFuncaoHistorico
+
+    qs = GiraFuncaoHistorico.objects.filter(pessoa_id__isnull=False)
+    if de:
+        qs = qs.filter(gira__data_hora__date__gte=de)
+    if ate:
+        qs = qs.filter(gira__data_hora__date__lte=ate)
+    if linha:
+        qs = qs.filter(gira__linha__icontains=linha)
+    qs = qs.order_by('gira__data_hora', 'gira_id', 'id').values_list(
+        'gira_id', 'gira__data_hora', 'gira__linha', 'id', 'chave', 'display_descricao', 'categoria',
+        'pessoa_id', 'pessoa__nome', 'medium_de_linha_id', 'medium_de_linha__nome',
+    )
+    for valores in qs.iterator(chunk_size=LOTE):
+        valores = list(valores)
+        valores[6] = classificacao.GRUPOS.get(valores[6], '')  # categoria -> nome do grupo
+        yield valores
+
+
+def _auditoria(de, ate, linha):
+    from .models import Historico
+
+    qs = Historico.objects.all()
+    if de:
+        qs = qs.filter(data__date__gte=de)
+    if ate:
+        qs = qs.filter(data__date__lte=ate)
+    if linha:
+        qs = qs.filter(gira__linha__icontains=linha)
+    qs = qs.order_by('id').values_list(
+        'id', 'data', 'acao', 'gira_id', 'gira__data_hora', 'gira__linha', 'funcao_id', 'usuario_id',
+        'usuario__nome', 'info',
+    )
+    yield from qs.iterator(chunk_size=LOTE)
+
+
+def linhas(fonte, de=None, ate=None, linha=None):
+    """Gerador de tuplas na ordem de COLUNAS[fonte]."""
+    if fonte == 'funcoes':
+        return _funcoes(de, ate, linha)
+    if fonte == 'auditoria':
+        return _auditoria(de, ate, linha)
+    raise ValueError(f"Fonte desconhecida: {fonte}")
+
+
+class _Eco:
+    """'Arquivo' do csv.writer que só devolve o texto escrito."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def texto(fonte, formato, de=None, ate=None, linha=None):
+    """Gerador de pedaços de texto do arquivo (cabeçalho incluso no CSV)."""
+    colunas = COLUNAS[fonte]
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(colunas)
+        for valores in linhas(fonte, de, ate, linha):
+            yield escritor.writerow([_valor_csv(v) for v in valores])
+    elif formato == 'jsonl':
+        codificador = DjangoJSONEncoder(ensure_ascii=False)
+        for valores in linhas(fonte, de, ate, linha):
+            yield codificador.encode(dict(zip(colunas, valores))) + '\n'
+    else:
+        raise ValueError(f"Formato desconhecido: {formato}")
+
+
+def _proximos(gerador, quantidade):
+    pedacos = []
+    for pedaco in gerador:
+        pedacos.append(pedaco)
+        if len(pedacos) >= quantidade:
+            break
+    return ''.join(pedacos)
+
+
+async def assincrono(gerador, quantidade=LOTE):
+    """
+    Versão async de um gerador síncrono, lote a lote. Sob ASGI o Django
+    leria um iterador síncrono inteiro para a memória antes de enviar;
+    assim o banco é lido na thread de sempre (thread_sensitive) e cada
+    lote sai assim que fica pronto.
+    """
+    proximos = sync_to_async(_proximos, thread_sensitive=True)
+    while True:
+        parte = await proximos(gerador, quantidade)
+        if not parte:
+            break
+        yield parte
@@ -1,4 +1,7 @@
 from django import forms
+from django.urls import reverse_lazy
+
+from . import mediuns
 from .models import Funcao, Gira, Medium
 
 class LoginPhoneForm(forms.Form):
@@ -16,7 +19,32 @@ class GiraForm(forms.ModelForm):
         model = Gira
         fields = ['titulo','data_hora','linha']
 
+class MediumAutocompletar(forms.Widget):
+    """
+    Campo de médium por digitação (static/js/busca_medium.js) no lugar do
+    <select> com todos os médiuns: o id vai num input oculto e o nome
+    vem do índice em memória (gira/mediuns.py), sem consulta.
+    """
+    template_name = 'gira/widgets/medium_autocompletar.html'
+
+    class Media:
+        js = ('js/busca_medium.js',)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        medium_id = int(value) if str(value or '').isdigit() else None
+        context['widget'].update({
+            'nome': mediuns.nome(medium_id) if medium_id else '',
+            'url': reverse_lazy('gira:mediuns_autocompletar'),
+        })
+        return context
+
+
 class FuncaoEditForm(forms.ModelForm):
     class Meta:
         model = Funcao
         fields = ['posicao','medium_de_linha','pessoa','status','descricao']
+        widgets = {
+            'medium_de_linha': MediumAutocompletar,
+            'pessoa': MediumAutocompletar,
+        }
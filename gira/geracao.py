@@ -0,0 +1,118 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import classificacao, quadro_cache, rodizio
+
+
+# -------------------------------------------------------------------
+# 🔹 Geração de giras a partir de modelos
+# -------------------------------------------------------------------
+# Um modelo descreve as funções de uma gira: as vagas de cambone e as
+# fixas (organização, limpeza). O CambonePool é a lista de quem FAZ
+# cambone — o mesmo sentido do rodízio (gira/rodizio.py): depois de
+# criadas, as vagas de cambone das giras de hoje em diante são
+# preenchidas (pessoa) por rodizio.distribuir(), que segue a `ordem` do
+# pool ativo e equilibra a carga pelo histórico.
+#
+# Tudo é gravado com bulk_create numa transação só: 50 giras × 40 funções
+# custam poucas consultas em vez de milhares de save(). Como bulk_create
+# não chama save(), os campos derivados são preenchidos aqui com
+# classificacao.aplicar().
+
+# (tipo, descrição, quantidade)
+MODELOS = {
+    'padrao': [
+        ('Cambone', 'Cambone', 4),
+        ('Organização', 'Portão', 2),
+        ('Organização', 'Distribuir senha', 1),
+        ('Organização', 'Lojinha', 2),
+        ('Organização', 'Chamar senha', 1),
+        ('Limpeza', 'Limpeza', 4),
+    ],
+}
+
+TABELAS = ('funcao', 'historico')
+# o quadro lê só gira_funcao_historico; gira_funcao é legado (só com --tabela funcao)
+TABELAS_PADRAO = ('historico',)
+
+
+def itens(modelo='padrao'):
+    """Lista de dicts com os campos de cada função que o modelo gera."""
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo de gira desconhecido: {modelo}")
+
+    resultado = []
+    for tipo, descricao, quantidade in MODELOS[modelo]:
+        base = slugify(descricao).replace('-', '_')
+        for n in range(1, quantidade + 1):
+            resultado.append({
+                'chave': f"{base}_{n}",
+                'tipo': tipo,
+                'descricao': descricao,
+                'medium_de_linha': None,
+            })
+    for posicao, item in enumerate(resultado, start=1):
+        item['posicao'] = str(posicao)
+    return resultado
+
+
+def gerar_funcoes(giras, modelo='padrao', tabelas=TABELAS_PADRAO, cambones=True, usuario_id=None):
+    """
+    Cria as funções do modelo para cada gira (sem funções ainda) nas
+    tabelas pedidas e, com `cambones`, distribui o CambonePool nas vagas
+    de cambone das giras de hoje em diante. Retorna {tabela: quantidade criada}.
+    """
+    from .models import Funcao, GiraFuncaoHistorico
+
+    models = {'funcao': Funcao, 'historico': GiraFuncaoHistorico}
+    base = itens(modelo)
+    criadas = {}
+    novas = set()
+    with transaction.atomic():
+        for tabela in tabelas:
+            model = models[tabela]
+            com_funcoes = set(
+                model.objects.filter(gira__in=giras).values_list('gira_id', flat=True).distinct()
+            )
+            linhas = [
+                classificacao.aplicar(model(gira=gira, status='Vaga', **item))
+                for gira in giras if gira.id not in com_funcoes
+                for item in base
+            ]
+            model.objects.bulk_create(linhas, batch_size=500)
+            criadas[tabela] = len(linhas)
+            novas.update(gira.id for gira in giras if gira.id not in com_funcoes)
+        if cambones:
+            inicio_de_hoje = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+            futuras = [gira.id for gira in giras if gira.id in novas and gira.data_hora >= inicio_de_hoje]
+            if futuras:
+                rodizio.distribuir(futuras, [models[tabela] for tabela in tabelas], usuario_id=usuario_id)
+        for gira in giras:
+            transaction.on_commit(lambda gira_id=gira.id: quadro_cache.invalidar(gira_id))
+    return criadas
+
+
+def gerar_giras(titulo, linha, inicio, quantidade=1, intervalo_dias=7, modelo='padrao',
+                tabelas=TABELAS_PADRAO, criado_por=None, cambones=True):
+    """
+    Cria `quantidade` giras a partir de `inicio`, uma a cada
+    `intervalo_dias`, já com as funções do modelo. Retorna (giras, criadas).
+    """
+    from .models import Gira
+
+    with transaction.atomic():
+        giras = Gira.objects.bulk_create([
+            Gira(
+                titulo=titulo,
+                linha=linha,
+                data_hora=inicio + timedelta(days=intervalo_dias * i),
+                criado_por=criado_por,
+            )
+            for i in range(quantidade)
+        ])
+        criadas = gerar_funcoes(giras, modelo, tabelas, cambones, criado_por.pk if criado_por else None)
+        transaction.on_commit(quadro_cache.invalidar_gira_atual)
+    return giras, criadas
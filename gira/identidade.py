@@ -0,0 +1,67 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+
+# -------------------------------------------------------------------
+# 🔹 Cache de identidade (gira_user + gira_medium)
+# -------------------------------------------------------------------
+# Resolve o usuário da sessão e o médium vinculado em UMA query
+# (User + JOIN gira_medium) e guarda o resultado num cache local do
+# processo, com TTL. Os signals de User/Medium (gira/signals.py)
+# invalidam a entrada, então um worker só fica desatualizado, no máximo,
+# pelo TTL quando a alteração foi feita em outro worker.
+
+TTL = getattr(settings, 'GIRA_IDENTIDADE_TTL', 300)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _buscar(user_id):
+    from .models import User
+
+    user = User.objects.select_related('medium').filter(id=user_id, is_active=True).first()
+    if not user:
+        return None, None
+    return user, user.medium_vinculado()
+
+
+def resolver(user_id):
+    """Retorna (user, medium) para o id da sessão; (None, None) se não existir ou estiver inativo."""
+    if not user_id:
+        return None, None
+
+    agora = time.monotonic()
+    entrada = _cache.get(user_id)
+    if entrada is None or entrada[0] < agora:
+        user, medium = _buscar(user_id)
+        with _lock:
+            _cache[user_id] = (agora + TTL, user, medium)
+    else:
+        _, user, medium = entrada
+
+    # cópias rasas: cada request pode mexer no seu objeto sem afetar o cache
+    return copy.copy(user), copy.copy(medium)
+
+
+def invalidar_usuario(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def invalidar_medium(medium_id, user_id=None):
+    """Remove do cache o usuário do médium (inclusive se ele trocou de usuário)."""
+    with _lock:
+        if user_id:
+            _cache.pop(user_id, None)
+        for uid, (_, _, medium) in list(_cache.items()):
+            if medium is not None and medium.id == medium_id:
+                _cache.pop(uid, None)
+
+
+def limpar():
+    with _lock:
+        _cache.clear()
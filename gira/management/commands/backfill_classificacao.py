@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gira import classificacao, quadro_cache, versoes
+from gira.models import Funcao, GiraFuncaoHistorico, Medium
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula categoria, ordem_exibicao, display_descricao e nome normalizado das funções "
+        "e o nome normalizado (busca) dos médiuns. Só grava as linhas que mudaram; as giras de "
+        "gira_funcao_historico alteradas ganham versão nova e saem do cache do quadro."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Tamanho do lote do bulk_update.')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        for model in (Funcao, GiraFuncaoHistorico):
+            alteradas = self._reclassificar(model, lote)
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.db_table}: {alteradas} linhas reclassificadas."))
+
+        mediuns = []
+        for medium in Medium.objects.only('id', 'nome', 'nome_normalizado'):
+            normalizado = classificacao.normalizar_nome(medium.nome)
+            if medium.nome_normalizado != normalizado:
+                medium.nome_normalizado = normalizado
+                mediuns.append(medium)
+        Medium.objects.bulk_update(mediuns, ['nome_normalizado'], batch_size=lote)
+        self.stdout.write(self.style.SUCCESS(f"gira_medium: {len(mediuns)} nomes normalizados."))
+
+    def _reclassificar(self, model, lote):
+        """bulk_update só das funções cujos campos derivados mudaram. Retorna quantas."""
+        por_gira = defaultdict(list)
+        total = 0
+        pendentes = []
+
+        def gravar():
+            model.objects.bulk_update(pendentes, classificacao.CAMPOS_DERIVADOS)
+            pendentes.clear()
+
+        qs = model.objects.select_related('medium_de_linha').order_by('pk')
+        with transaction.atomic():
+            for funcao in qs.iterator(chunk_size=lote):
+                antes = [getattr(funcao, campo) for campo in classificacao.CAMPOS_DERIVADOS]
+                classificacao.aplicar(funcao)
+                if antes == [getattr(funcao, campo) for campo in classificacao.CAMPOS_DERIVADOS]:
+                    continue
+                pendentes.append(funcao)
+                por_gira[funcao.gira_id].append(funcao.pk)
+                total += 1
+                if len(pendentes) >= lote:
+                    gravar()
+            if pendentes:
+                gravar()
+            # só gira_funcao_historico alimenta o quadro (delta / ETag / cache)
+            if model is GiraFuncaoHistorico and por_gira:
+                versoes.registrar_mudancas(por_gira)
+
+                def efeitos():
+                    for gira_id in por_gira:
+                        quadro_cache.invalidar(gira_id)
+
+                transaction.on_commit(efeitos)
+        return total
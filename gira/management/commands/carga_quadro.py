@@ -0,0 +1,291 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from gira import auditoria, classificacao
+from gira.models import Gira, GiraFuncaoHistorico, Historico, Medium, User
+
+
+# -------------------------------------------------------------------
+# 🔹 Teste de carga: abertura da gira (corrida pelas funções)
+# -------------------------------------------------------------------
+# Cria N usuários/médiuns e uma gira futura com F funções, e solta N
+# sessões ao mesmo tempo (threading.Barrier) fazendo:
+#   login → /funcoes/ → get_gira_data → assumir/desistir (normal e dev)
+# As requisições passam pelo Client do Django no próprio processo (sem
+# rede), então o número mede a app + banco.
+#
+# Por padrão tudo roda num banco de TESTE criado e destruído pelo comando
+# (o test_<nome> do Django, no mesmo servidor do DATABASE_URL) e com um
+# cache em memória só dele: a gira de carga é a única gira, e nada do
+# banco ou do cache de verdade é tocado. --banco-atual usa o banco
+# configurado; é recusado fora do DEBUG (sem --permitir-producao) e
+# quando não há gira futura de verdade — senão a gira de carga viraria a
+# "gira atual" (quadro_cache.gira_atual_id) enquanto o teste roda.
+#
+# O resultado vai para um JSON (--saida); com --comparar, os p95 são
+# comparados com um resultado anterior.
+
+PREFIXO_CELULAR = '99000'
+TOLERANCIA_P95 = 1.2  # 20% mais lento que o baseline = regressão
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    k = (len(valores) - 1) * p / 100
+    baixo = int(k)
+    alto = min(baixo + 1, len(valores) - 1)
+    return valores[baixo] + (valores[alto] - valores[baixo]) * (k - baixo)
+
+
+class Medicoes:
+    """Amostras por endpoint (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.amostras = defaultdict(list)  # endpoint -> [(ms, consultas, resultado)]
+
+    def adicionar(self, endpoint, ms, consultas, resultado):
+        with self._lock:
+            self.amostras[endpoint].append((ms, consultas, resultado))
+
+    def resumo(self, duracao):
+        saida = {}
+        for endpoint, linhas in sorted(self.amostras.items()):
+            tempos = [l[0] for l in linhas]
+            total = len(linhas)
+            saida[endpoint] = {
+                'requisicoes': total,
+                'por_segundo': round(total / duracao, 1) if duracao else 0,
+                'p50_ms': round(_percentil(tempos, 50), 2),
+                'p95_ms': round(_percentil(tempos, 95), 2),
+                'p99_ms': round(_percentil(tempos, 99), 2),
+                'consultas_media': round(statistics.mean(l[1] for l in linhas), 1),
+                'consultas_max': max(l[1] for l in linhas),
+                'conflitos': round(sum(1 for l in linhas if l[2] == 'conflito') / total, 3),
+                'erros': sum(1 for l in linhas if l[2] == 'erro'),
+            }
+        return saida
+
+
+class Command(BaseCommand):
+    help = "Teste de carga da abertura da gira: N sessões simultâneas assumindo/desistindo de funções."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessoes', type=int, default=30, help='Sessões simultâneas (médiuns).')
+        parser.add_argument('--funcoes', type=int, default=40, help='Funções na gira de teste.')
+        parser.add_argument('--rodadas', type=int, default=3, help='Tentativas de assumir por sessão.')
+        parser.add_argument('--semente', type=int, default=1, help='Semente do sorteio das funções.')
+        parser.add_argument('--saida', default='carga_quadro.json', help='Arquivo JSON do resultado.')
+        parser.add_argument('--comparar', help='JSON de uma execução anterior (baseline).')
+        parser.add_argument('--banco-atual', action='store_true',
+                            help='Roda no banco configurado em vez de um banco de teste descartável.')
+        parser.add_argument('--permitir-producao', action='store_true',
+                            help='Aceita --banco-atual mesmo com DEBUG desligado.')
+        parser.add_argument('--manter', action='store_true', help='Com --banco-atual: não apaga os dados criados.')
+
+    def handle(self, *args, **options):
+        if options['sessoes'] < 1 or options['funcoes'] < 1:
+            raise CommandError("--sessoes e --funcoes devem ser pelo menos 1.")
+
+        if options['banco_atual']:
+            resultado = self._medir_no_banco_atual(options)
+        else:
+            resultado = self._medir_em_banco_de_teste(options)
+
+        self._imprimir(resultado)
+        with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Resultado salvo em {options['saida']}")
+
+        if options['comparar']:
+            self._comparar(resultado, options['comparar'])
+
+    def _medir_em_banco_de_teste(self, options):
+        cache_proprio = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'carga-quadro'}}
+        teste = connection.settings_dict['TEST']
+        if connection.vendor == 'sqlite' and not teste.get('NAME'):
+            # o SQLite de teste em memória (cache compartilhado) dá "table is
+            # locked" com várias threads; em arquivo vale o busy timeout
+            teste['NAME'] = os.path.join(tempfile.gettempdir(), 'carga_quadro.sqlite3')
+        with override_settings(CACHES=cache_proprio):
+            bancos = setup_databases(verbosity=options['verbosity'], interactive=False, aliases={'default'})
+            try:
+                return self._medir(options, limpar=False)
+            finally:
+                auditoria.gravar_pendentes()
+                teardown_databases(bancos, verbosity=options['verbosity'])
+
+    def _medir_no_banco_atual(self, options):
+        if not settings.DEBUG and not options['permitir_producao']:
+            raise CommandError(
+                "--banco-atual com DEBUG desligado grava no banco de produção; "
+                "rode sem --banco-atual (banco de teste) ou passe --permitir-producao."
+            )
+        if not Gira.objects.filter(data_hora__gte=timezone.now()).exists():
+            raise CommandError(
+                "Nenhuma gira futura no banco: a gira de carga viraria a gira atual do quadro. "
+                "Rode sem --banco-atual (banco de teste)."
+            )
+        if User.objects.filter(celular__startswith=PREFIXO_CELULAR).exists():
+            raise CommandError(f"Já existem usuários {PREFIXO_CELULAR}*; apague-os (execução anterior com --manter?).")
+        return self._medir(options, limpar=not options['manter'])
+
+    def _medir(self, options, limpar):
+        usuarios, gira = self._semear(options['sessoes'], options['funcoes'])
+        try:
+            medicoes, duracao = self._rodar(usuarios, gira, options)
+        finally:
+            if limpar:
+                self._limpar(gira)
+
+        return {
+            'quando': timezone.now().isoformat(),
+            'banco': connection.vendor,
+            'banco_de_teste': not options['banco_atual'],
+            'sessoes': options['sessoes'],
+            'funcoes': options['funcoes'],
+            'rodadas': options['rodadas'],
+            'duracao_s': round(duracao, 3),
+            'endpoints': medicoes.resumo(duracao),
+        }
+
+    # 🔹 Dados de teste ------------------------------------------------
+    def _semear(self, sessoes, quantidade):
+        usuarios = User.objects.bulk_create([
+            User(username=f"carga{i}", celular=f"{PREFIXO_CELULAR}{i:06d}", nome=f"Carga {i}")
+            for i in range(sessoes)
+        ])
+        Medium.objects.bulk_create([
+            Medium(nome=f"Médium carga {u.id}", nome_normalizado=f"medium carga {u.id}", user=u) for u in usuarios
+        ])
+        # futura (as views recusam assumir em gira passada), mas depois de
+        # todas as de verdade: a "gira atual" é a próxima, e esta nunca é
+        gira = Gira.objects.create(
+            titulo='Gira de carga', linha='Caboclo', data_hora=timezone.now() + timedelta(days=3650),
+        )
+        GiraFuncaoHistorico.objects.bulk_create([
+            classificacao.aplicar(GiraFuncaoHistorico(
+                gira=gira, chave=f"carga_{i}", tipo='Organização', descricao=f"Função {i}",
+                posicao=str(i), status='Vaga',
+            ))
+            for i in range(quantidade)
+        ])
+        return usuarios, gira
+
+    def _limpar(self, gira):
+        auditoria.gravar_pendentes()
+        Historico.objects.filter(gira=gira).delete()
+        gira.delete()
+        User.objects.filter(celular__startswith=PREFIXO_CELULAR).delete()
+
+    # 🔹 Execução ------------------------------------------------------
+    def _rodar(self, usuarios, gira, options):
+        medicoes = Medicoes()
+        barreira = threading.Barrier(len(usuarios))
+        # as duas URLs (normal e dev) disputam as mesmas funções de gira_funcao_historico
+        ids = list(GiraFuncaoHistorico.objects.filter(gira=gira).values_list('id', 'chave'))
+        threads = [
+            threading.Thread(
+                target=self._sessao,
+                args=(u, gira.id, ids, barreira, medicoes, options['rodadas'], options['semente'] + n),
+            )
+            for n, u in enumerate(usuarios)
+        ]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return medicoes, time.perf_counter() - inicio
+
+    def _sessao(self, usuario, gira_id, ids, barreira, medicoes, rodadas, semente):
+        sorteio = random.Random(semente)
+        cliente = Client()
+
+        def chamar(endpoint, metodo, url, dados=None):
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                try:
+                    resposta = getattr(cliente, metodo)(url, dados or {})
+                    status = resposta.status_code
+                except Exception:
+                    status = 500
+                ms = (time.perf_counter() - inicio) * 1000
+            if status == 409:
+                resultado = 'conflito'
+            elif status >= 500:
+                resultado = 'erro'
+            else:
+                resultado = 'ok'
+            medicoes.adicionar(endpoint, ms, len(consultas), resultado)
+            return status
+
+        try:
+            chamar('login', 'post', '/', {'celular': usuario.celular})
+            barreira.wait()  # todo mundo abre o quadro no mesmo instante
+            chamar('lista_funcoes', 'get', '/funcoes/')
+            chamar('get_gira_data', 'get', f'/funcoes_dev/data/{gira_id}/')
+            for _ in range(rodadas):
+                funcao_id, _chave = sorteio.choice(ids)
+                if chamar('assumir_funcao', 'post', '/assumir-funcao/', {'funcao_id': funcao_id}) == 200:
+                    chamar('desistir_funcao', 'post', '/desistir-funcao/', {'funcao_id': funcao_id})
+                funcao_id, chave = sorteio.choice(ids)
+                dados = {'funcao_chave': chave, 'gira_id': gira_id}
+                if chamar('assumir_funcao_dev', 'post', '/assumir_funcao_dev/', dados) == 200:
+                    chamar('desistir_funcao_dev', 'post', '/desistir_funcao_dev/', {'funcao_id': funcao_id})
+        finally:
+            connection.close()
+
+    # 🔹 Relatório -----------------------------------------------------
+    def _imprimir(self, resultado):
+        self.stdout.write(
+            f"{resultado['sessoes']} sessões, {resultado['funcoes']} funções, "
+            f"{resultado['duracao_s']}s ({resultado['banco']})"
+        )
+        self.stdout.write(
+            f"{'endpoint':<22}{'req':>6}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'sql':>6}{'confl.':>8}{'erros':>7}"
+        )
+        for endpoint, r in resultado['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<22}{r['requisicoes']:>6}{r['por_segundo']:>8}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                f"{r['p99_ms']:>9}{r['consultas_media']:>6}{r['conflitos']:>8.1%}{r['erros']:>7}"
+            )
+
+    def _comparar(self, resultado, caminho):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+        except (OSError, ValueError) as erro:
+            raise CommandError(f"Não foi possível ler o baseline {caminho}: {erro}")
+
+        regressoes = []
+        for endpoint, atual in resultado['endpoints'].items():
+            base = anterior.get('endpoints', {}).get(endpoint)
+            if not base:
+                continue
+            if base['p95_ms'] and atual['p95_ms'] > base['p95_ms'] * TOLERANCIA_P95:
+                regressoes.append(f"{endpoint}: p95 {base['p95_ms']} → {atual['p95_ms']} ms")
+            if atual['consultas_max'] > base['consultas_max']:
+                regressoes.append(f"{endpoint}: consultas {base['consultas_max']} → {atual['consultas_max']}")
+
+        if regressoes:
+            for linha in regressoes:
+                self.stdout.write(self.style.ERROR(f"✗ {linha}"))
+            raise CommandError(f"{len(regressoes)} regressão(ões) em relação a {caminho}.")
+        self.stdout.write(self.style.SUCCESS(f"Sem regressões em relação a {caminho}."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from gira import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Congela o quadro final das giras encerradas em gira_snapshot (leitura por chave primária). "
+        "Rodar uma vez por dia (cron) e no build."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gira', type=int, action='append',
+                            help='Congela (de novo) esta gira, mesmo reaberta no admin. Pode repetir.')
+        parser.add_argument('--dry-run', action='store_true', help='Só lista as giras que seriam congeladas.')
+
+    def handle(self, *args, **options):
+        gira_ids = options['gira'] or snapshots.encerradas()
+        if not gira_ids:
+            self.stdout.write("Nenhuma gira encerrada para congelar.")
+            return
+
+        if options['dry_run']:
+            self.stdout.write(f"Seriam congeladas {len(gira_ids)} giras: {', '.join(map(str, gira_ids))}")
+            return
+
+        congeladas = [gira_id for gira_id in gira_ids if snapshots.congelar(gira_id) is not None]
+        if options['verbosity'] > 1:
+            for gira_id in congeladas:
+                self.stdout.write(f"  gira {gira_id} congelada")
+        self.stdout.write(self.style.SUCCESS(f"{len(congeladas)} gira(s) congelada(s)."))
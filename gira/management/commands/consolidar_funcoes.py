@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from gira import consolidacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara gira_funcao com gira_funcao_historico (por gira e chave) e, com --aplicar, copia "
+        "gira_funcao para o histórico em lotes (upsert). A cópia da troca já é feita pela migração "
+        "0005_consolidar_funcoes; --aplicar de novo sobrescreve o que mudou no histórico depois dela."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aplicar', action='store_true',
+                            help='Grava as diferenças no histórico (sem isto, só relata).')
+        parser.add_argument('--gira', type=int, action='append', help='Só esta gira. Pode repetir.')
+        parser.add_argument('--lote', type=int, default=consolidacao.LOTE, help='Linhas de gira_funcao por lote.')
+
+    def handle(self, *args, **options):
+        r = consolidacao.consolidar(options['gira'], lote=options['lote'], gravar=options['aplicar'])
+
+        self.stdout.write(
+            f"gira_funcao: {r['lidas']} linhas lidas, {r['iguais']} iguais no histórico, "
+            f"{r['novas']} faltando, {r['alteradas']} diferentes "
+            f"({r['sem_chave']} sem chave e {r['repetidas']} repetidas ignoradas)."
+        )
+        if r['campos']:
+            campos = ', '.join(f"{campo}: {n}" for campo, n in sorted(r['campos'].items(), key=lambda c: -c[1]))
+            self.stdout.write(f"Campos diferentes: {campos}")
+        if r['so_no_historico']:
+            self.stdout.write(f"{r['so_no_historico']} funções só existem em gira_funcao_historico (mantidas).")
+        if options['verbosity'] > 1:
+            for exemplo in r['exemplos']:
+                self.stdout.write(json.dumps(exemplo, ensure_ascii=False, default=str))
+
+        if options['aplicar']:
+            self.stdout.write(self.style.SUCCESS(f"{r['novas'] + r['alteradas']} funções gravadas no histórico."))
+        elif r['novas'] or r['alteradas']:
+            self.stdout.write(self.style.WARNING("Nada gravado (rode com --aplicar)."))
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models import Count
+
+from django.core.management.base import BaseCommand
+
+from gira.models import GiraFuncaoHistorico
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove linhas repetidas (mesma gira e chave) de gira_funcao_historico, "
+        "para que a restrição única (gira, chave) possa ser criada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Só lista as duplicatas, sem apagar.')
+
+    def handle(self, *args, **options):
+        repetidas = (
+            GiraFuncaoHistorico.objects.exclude(chave__isnull=True)
+            .values('gira_id', 'chave')
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+        )
+        removidas = 0
+        for grupo in repetidas:
+            linhas = list(
+                GiraFuncaoHistorico.objects.filter(gira_id=grupo['gira_id'], chave=grupo['chave'])
+                .order_by('pk')
+                .values('id', 'pessoa_id')
+            )
+            # fica a primeira linha já assumida por alguém; senão a mais antiga
+            manter = next((l for l in linhas if l['pessoa_id']), linhas[0])
+            apagar = [l['id'] for l in linhas if l['id'] != manter['id']]
+            self.stdout.write(
+                f"gira {grupo['gira_id']} / {grupo['chave']}: mantém {manter['id']}, remove {apagar}"
+            )
+            if not options['dry_run']:
+                with transaction.atomic():
+                    # delete() um a um para os sinais gerarem os registros de remoção
+                    for funcao in GiraFuncaoHistorico.objects.filter(pk__in=apagar):
+                        funcao.delete()
+            removidas += len(apagar)
+
+        acao = 'seriam removidas' if options['dry_run'] else 'removidas'
+        self.stdout.write(self.style.SUCCESS(f"{removidas} linhas duplicadas {acao}."))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from gira import exportacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta o histórico (funções servidas ou auditoria) em CSV ou JSONL, em streaming "
+        "(memória constante, qualquer tamanho de histórico)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fonte', choices=exportacao.FONTES, default='funcoes')
+        parser.add_argument('--formato', choices=exportacao.FORMATOS, default='csv')
+        parser.add_argument('--de', help='Data inicial (AAAA-MM-DD, inclusive).')
+        parser.add_argument('--ate', help='Data final (AAAA-MM-DD, inclusive).')
+        parser.add_argument('--linha', help='Só giras cuja linha contém este texto.')
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: stdout).')
+
+    def handle(self, *args, **options):
+        datas = {}
+        for campo in ('de', 'ate'):
+            valor = options[campo]
+            datas[campo] = parse_date(valor) if valor else None
+            if valor and datas[campo] is None:
+                raise CommandError(f"Data inválida em --{campo}: {valor} (use AAAA-MM-DD).")
+
+        pedacos = exportacao.texto(options['fonte'], options['formato'], datas['de'], datas['ate'], options['linha'])
+        if not options['saida']:
+            for pedaco in pedacos:
+                sys.stdout.write(pedaco)
+            return
+
+        with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+            for pedaco in pedacos:
+                arquivo.write(pedaco)
+        self.stderr.write(self.style.SUCCESS(f"Exportado para {options['saida']}."))
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gira import geracao
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria giras (uma ou uma temporada inteira) já com as funções do modelo; "
+        "as vagas de cambone das giras futuras recebem o CambonePool ativo (rodízio)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('inicio', help='Data/hora da primeira gira (AAAA-MM-DD HH:MM).')
+        parser.add_argument('--titulo', default='Gira')
+        parser.add_argument('--linha', required=True)
+        parser.add_argument('--quantidade', type=int, default=1, help='Número de giras da temporada.')
+        parser.add_argument('--intervalo', type=int, default=7, help='Dias entre uma gira e a próxima.')
+        parser.add_argument('--modelo', default='padrao', choices=sorted(geracao.MODELOS))
+        parser.add_argument('--tabela', action='append', choices=geracao.TABELAS,
+                            help='Tabela(s) onde criar as funções (padrão: historico; funcao é legado).')
+        parser.add_argument('--sem-cambones', action='store_true',
+                            help='Deixa as vagas de cambone vazias (sem rodar o rodízio).')
+
+    def handle(self, *args, **options):
+        try:
+            inicio = datetime.strptime(options['inicio'], '%Y-%m-%d %H:%M')
+        except ValueError:
+            raise CommandError("Data inválida; use AAAA-MM-DD HH:MM.")
+        if options['quantidade'] < 1:
+            raise CommandError("--quantidade deve ser pelo menos 1.")
+
+        giras, criadas = geracao.gerar_giras(
+            options['titulo'],
+            options['linha'],
+            timezone.make_aware(inicio),
+            quantidade=options['quantidade'],
+            intervalo_dias=options['intervalo'],
+            modelo=options['modelo'],
+            tabelas=options['tabela'] or geracao.TABELAS_PADRAO,
+            cambones=not options['sem_cambones'],
+        )
+        resumo = ', '.join(f"{total} em {tabela}" for tabela, total in criadas.items())
+        self.stdout.write(self.style.SUCCESS(f"{len(giras)} gira(s) criada(s); funções: {resumo}."))
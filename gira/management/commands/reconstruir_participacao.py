@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from gira import estatisticas
+from gira.models import Participacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula do zero a tabela-resumo de participação (gira_participacao) a partir de "
+        "gira_funcao_historico e da auditoria. Carga inicial ou conserto; no dia a dia ela é mantida por delta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--se-vazia', action='store_true', help='Só recalcula se a tabela estiver vazia (build).')
+
+    def handle(self, *args, **options):
+        if options['se_vazia'] and Participacao.objects.exists():
+            self.stdout.write("gira_participacao já preenchida; nada a fazer.")
+            return
+
+        linhas = estatisticas.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"gira_participacao recalculada: {linhas} linha(s)."))
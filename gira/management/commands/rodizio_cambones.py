@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gira import rodizio
+from gira.models import Funcao, GiraFuncaoHistorico
+
+
+class Command(BaseCommand):
+    help = "Distribui o CambonePool ativo nas vagas de cambone das próximas giras (rodízio balanceado)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--giras', type=int, help='Quantidade de próximas giras (padrão: todas).')
+        parser.add_argument('--ate', help='Só giras até esta data (AAAA-MM-DD).')
+        parser.add_argument('--tabela', choices=('funcao', 'historico'), action='append',
+                            help='Tabela(s) a preencher (padrão: só historico; funcao é legado).')
+        parser.add_argument('--dry-run', action='store_true', help='Só mostra o plano, sem gravar.')
+
+    def handle(self, *args, **options):
+        ate = None
+        if options['ate']:
+            try:
+                ate = datetime.strptime(options['ate'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Data inválida; use AAAA-MM-DD.")
+
+        gira_ids = rodizio.proximas_giras(options['giras'], ate)
+        if not gira_ids:
+            self.stdout.write("Nenhuma gira futura no período.")
+            return
+
+        tabelas = {'funcao': Funcao, 'historico': GiraFuncaoHistorico}
+        models = [tabelas[t] for t in options['tabela']] if options['tabela'] else None
+        planos = rodizio.distribuir(gira_ids, models, gravar=not options['dry_run'])
+
+        for tabela, plano in planos.items():
+            if options['verbosity'] > 1:
+                for funcao_id, medium_id in plano.items():
+                    self.stdout.write(f"  {tabela} #{funcao_id} → médium {medium_id}")
+            acao = 'planejadas' if options['dry_run'] else 'preenchidas'
+            self.stdout.write(self.style.SUCCESS(f"{tabela}: {len(plano)} vagas de cambone {acao} em {len(gira_ids)} giras."))
@@ -0,0 +1,123 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from . import classificacao
+
+
+# -------------------------------------------------------------------
+# 🔹 Busca de médiuns por nome (autocompletar)
+# -------------------------------------------------------------------
+# O admin e o quadro escolhiam o médium num <select> com TODOS os
+# médiuns. Agora a escolha é por digitação: o texto vai por
+# classificacao.normalizar_nome() (sem acentos/maiúsculas) e é procurado
+# como prefixo
+#   - do nome inteiro ("ana" → "Ana Maria"), e
+#   - de cada palavra dali em diante ("mar" → "Ana Maria").
+#
+# O índice fica na memória do processo: duas listas ordenadas (nomes
+# inteiros e "restos" a partir da 2ª palavra), lidas com bisect — um
+# bisect + k passos por busca, sem ir ao banco. Sai de Medium.nome_normalizado
+# (coluna pré-calculada no save) em UMA consulta e é descartado pelos
+# signals de Medium (gira/signals.py); o TTL cobre as mudanças feitas em
+# outro worker.
+
+TTL = getattr(settings, 'GIRA_MEDIUNS_TTL', 300)
+LIMITE = 10
+LIMITE_MAXIMO = 50
+
+_indice = None
+_lock = threading.Lock()
+
+
+class Indice:
+    """Índice de prefixos de um instantâneo de gira_medium."""
+
+    def __init__(self, linhas, validade):
+        # linhas: (id, nome, nome_normalizado, habilitado)
+        self.validade = validade
+        self.nomes = {}
+        self.habilitados = set()
+        inteiros, restos = [], []
+        for medium_id, nome, normalizado, habilitado in linhas:
+            self.nomes[medium_id] = nome
+            if habilitado:
+                self.habilitados.add(medium_id)
+            palavras = (normalizado or classificacao.normalizar_nome(nome)).split()
+            if not palavras:
+                continue
+            inteiros.append((' '.join(palavras), nome, medium_id))
+            for i in range(1, len(palavras)):
+                restos.append((' '.join(palavras[i:]), nome, medium_id))
+        inteiros.sort()
+        restos.sort()
+        self._listas = [
+            ([c for c, _, _ in inteiros], [m for _, _, m in inteiros]),
+            ([c for c, _, _ in restos], [m for _, _, m in restos]),
+        ]
+
+    def buscar(self, termo, k=LIMITE, so_habilitados=False):
+        """
+        Ids dos médiuns cujo nome (ou uma palavra dele) começa com `termo`:
+        primeiro os que casam pelo início do nome, depois pelas outras
+        palavras, cada grupo em ordem alfabética. k=None devolve todos.
+        """
+        termo = classificacao.normalizar_nome(termo)
+        if not termo:
+            return []
+        achados = []
+        vistos = set()
+        for chaves, ids in self._listas:
+            i = bisect_left(chaves, termo)
+            while i < len(chaves) and chaves[i].startswith(termo):
+                medium_id = ids[i]
+                i += 1
+                if medium_id in vistos or (so_habilitados and medium_id not in self.habilitados):
+                    continue
+                vistos.add(medium_id)
+                achados.append(medium_id)
+                if k is not None and len(achados) >= k:
+                    return achados
+        return achados
+
+
+def _construir():
+    from .models import Medium
+
+    linhas = Medium.objects.order_by().values_list('id', 'nome', 'nome_normalizado', 'habilitado')
+    return Indice(list(linhas), time.monotonic() + TTL)
+
+
+def indice():
+    """O índice do processo (reconstruído se foi invalidado ou passou do TTL)."""
+    global _indice
+    atual = _indice
+    if atual is None or atual.validade < time.monotonic():
+        atual = _construir()
+        with _lock:
+            _indice = atual
+    return atual
+
+
+def buscar(termo, k=LIMITE, so_habilitados=True):
+    """Top-k [{id, nome}] para o texto digitado."""
+    atual = indice()
+    return [{'id': m, 'nome': atual.nomes[m]} for m in atual.buscar(termo, k, so_habilitados)]
+
+
+def ids(termo, k=None, so_habilitados=False):
+    """Só os ids (busca do admin)."""
+    return indice().buscar(termo, k, so_habilitados)
+
+
+def nome(medium_id):
+    """Nome do médium pelo índice (None se não existir)."""
+    return indice().nomes.get(medium_id)
+
+
+def invalidar():
+    global _indice
+    with _lock:
+        _indice = None
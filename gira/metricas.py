@@ -0,0 +1,151 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# 🔹 Métricas por view (tempo, consultas SQL, consultas lentas)
+# -------------------------------------------------------------------
+# O MetricasMiddleware mede cada requisição e acumula aqui, por nome de
+# URL ('gira:lista_funcoes', ...): quantidade, tempo total/máximo,
+# número de consultas e tempo de SQL. Consultas acima de
+# GIRA_SQL_LENTO_MS entram numa amostra (as últimas AMOSTRA_LENTAS).
+#
+# GIRA_ORCAMENTO_SQL = {'gira:lista_funcoes': 6, ...} define um limite de
+# consultas por view: quem passar gera um WARNING no log.
+#
+# Os números são do processo (cada worker tem os seus) e zeram quando
+# ele reinicia. Ver /metricas/ (superuser) e o header Server-Timing
+# (só para staff, ou para todos com DEBUG ligado).
+
+SQL_LENTO_MS = 100
+AMOSTRA_LENTAS = 50
+
+
+class Registro:
+    """Acumulador thread-safe das métricas por view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self._views = {}
+            self._lentas = deque(maxlen=AMOSTRA_LENTAS)
+            self._desde = time.time()
+
+    def registrar(self, view, ms, consultas, sql_ms, lentas=()):
+        with self._lock:
+            v = self._views.get(view)
+            if v is None:
+                v = self._views[view] = {
+                    'requisicoes': 0, 'tempo_ms': 0.0, 'tempo_max_ms': 0.0,
+                    'consultas': 0, 'consultas_max': 0, 'sql_ms': 0.0,
+                }
+            v['requisicoes'] += 1
+            v['tempo_ms'] += ms
+            v['tempo_max_ms'] = max(v['tempo_max_ms'], ms)
+            v['consultas'] += consultas
+            v['consultas_max'] = max(v['consultas_max'], consultas)
+            v['sql_ms'] += sql_ms
+            for sql, duracao in lentas:
+                self._lentas.append({'view': view, 'sql': sql[:500], 'ms': round(duracao, 2), 'quando': time.time()})
+
+    def resumo(self):
+        with self._lock:
+            views = {}
+            for nome, v in sorted(self._views.items()):
+                n = v['requisicoes']
+                views[nome] = {
+                    'requisicoes': n,
+                    'tempo_medio_ms': round(v['tempo_ms'] / n, 2),
+                    'tempo_max_ms': round(v['tempo_max_ms'], 2),
+                    'consultas_media': round(v['consultas'] / n, 2),
+                    'consultas_max': v['consultas_max'],
+                    'sql_medio_ms': round(v['sql_ms'] / n, 2),
+                }
+            return {'desde': self._desde, 'views': views, 'consultas_lentas': list(self._lentas)}
+
+
+registro = Registro()
+
+
+class Medidor:
+    """execute_wrapper que conta e cronometra as consultas de uma requisição."""
+
+    def __init__(self, limite_lento_ms):
+        self.limite_lento_ms = limite_lento_ms
+        self.consultas = 0
+        self.sql_ms = 0.0
+        self.lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+            self.sql_ms += ms
+            if ms >= self.limite_lento_ms:
+                self.lentas.append((sql, ms))
+
+
+class MetricasMiddleware:
+    """
+    Mede tempo total e SQL de cada requisição, alimenta o `registro` e
+    devolve o header Server-Timing (app e db) para staff ou com DEBUG.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limite_lento_ms = getattr(settings, 'GIRA_SQL_LENTO_MS', SQL_LENTO_MS)
+        self.orcamento = getattr(settings, 'GIRA_ORCAMENTO_SQL', {})
+
+    def __call__(self, request):
+        medidor = Medidor(self.limite_lento_ms)
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medidor):
+            response = self.get_response(request)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'sem_rota'
+        registro.registrar(view, ms, medidor.consultas, medidor.sql_ms, medidor.lentas)
+
+        limite = self.orcamento.get(view)
+        if limite is not None and medidor.consultas > limite:
+            logger.warning(
+                "Orçamento de SQL estourado em %s: %d consultas (limite %d)",
+                view, medidor.consultas, limite,
+                extra={'view': view, 'consultas': medidor.consultas, 'limite': limite},
+            )
+
+        # request.gira_user vem do IdentidadeMiddleware (que roda depois deste)
+        usuario = getattr(request, 'gira_user', None)
+        if settings.DEBUG or getattr(usuario, 'is_staff', False) or getattr(usuario, 'is_superuser', False):
+            response['Server-Timing'] = (
+                f'app;dur={ms:.1f}, db;dur={medidor.sql_ms:.1f};desc="{medidor.consultas} consultas"'
+            )
+        return response
+
+
+def amostrar(log, nivel=logging.DEBUG):
+    """
+    True se a mensagem deve ser logada: o nível está ligado e ela caiu na
+    amostra (GIRA_LOG_AMOSTRA, de 0 a 1). Com o nível desligado não custa
+    nada além desta checagem.
+    """
+    if not log.isEnabledFor(nivel):
+        return False
+    taxa = getattr(settings, 'GIRA_LOG_AMOSTRA', 1.0)
+    return taxa >= 1 or random.random() < taxa
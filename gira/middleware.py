@@ -0,0 +1,20 @@
+from . import identidade, sessao
+
+
+class IdentidadeMiddleware:
+    """
+    Define request.gira_user e request.medium a partir do user_id da
+    sessão (login custom por celular). Deve vir depois do SessionMiddleware.
+    Sessões revogadas (sessao.revogar) ou de usuário inativo são descartadas aqui.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user, medium = identidade.resolver(request.session.get('user_id'))
+        if not sessao.valida(request.session, user):
+            request.session.flush()
+            user = medium = None
+        request.gira_user, request.medium = user, medium
+        return self.get_response(request)
@@ -0,0 +1,137 @@
+# Generated by Django 4.2 on 2026-10-18 16:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(blank=True, max_length=128, null=True)),
+                ('last_login', models.DateTimeField(blank=True, null=True)),
+                ('is_superuser', models.BooleanField(default=False)),
+                ('username', models.CharField(max_length=150, unique=True)),
+                ('is_staff', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now)),
+                ('celular', models.CharField(max_length=15, unique=True)),
+                ('nome', models.CharField(max_length=150)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+            ],
+            options={
+                'db_table': 'gira_user',
+            },
+        ),
+        migrations.CreateModel(
+            name='CambonePool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=150)),
+                ('ordem', models.IntegerField(default=0)),
+                ('ativo', models.BooleanField(default=True)),
+            ],
+            options={
+                'db_table': 'gira_cambonepool',
+            },
+        ),
+        migrations.CreateModel(
+            name='Funcao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=50)),
+                ('tipo', models.CharField(max_length=50)),
+                ('posicao', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(default='Vaga', max_length=50)),
+                ('descricao', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'gira_funcao',
+            },
+        ),
+        migrations.CreateModel(
+            name='Gira',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200)),
+                ('data_hora', models.DateTimeField()),
+                ('linha', models.CharField(max_length=150)),
+                ('status', models.CharField(default='Ativa', max_length=50)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gira_gira',
+            },
+        ),
+        migrations.CreateModel(
+            name='Medium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=150)),
+                ('habilitado', models.BooleanField(default=True)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gira_medium',
+            },
+        ),
+        migrations.CreateModel(
+            name='Historico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acao', models.CharField(max_length=50)),
+                ('data', models.DateTimeField(default=django.utils.timezone.now)),
+                ('info', models.JSONField(blank=True, null=True)),
+                ('funcao', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='gira.funcao')),
+                ('gira', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gira.gira')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gira_historico',
+            },
+        ),
+        migrations.CreateModel(
+            name='GiraFuncaoHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(blank=True, max_length=255, null=True)),
+                ('tipo', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(blank=True, max_length=50, null=True)),
+                ('posicao', models.CharField(blank=True, max_length=50, null=True)),
+                ('chave', models.CharField(blank=True, max_length=100, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('gira', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gira.gira')),
+                ('medium_de_linha', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='linha_historico', to='gira.medium')),
+                ('pessoa', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='funcoes_historico', to='gira.medium')),
+            ],
+            options={
+                'db_table': 'gira_funcao_historico',
+                'ordering': ['gira_id', 'posicao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='gira',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funcoes', to='gira.gira'),
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='medium_de_linha',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='gira.medium'),
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='pessoa',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='funcoes_assumidas', to='gira.medium'),
+        ),
+    ]
@@ -0,0 +1,175 @@
+# Generated by Django 4.2 on 2026-10-18 16:38
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gira', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuncaoRemovida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('funcao_id', models.BigIntegerField()),
+                ('versao', models.PositiveIntegerField()),
+                ('removida_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'gira_funcao_removida',
+            },
+        ),
+        migrations.CreateModel(
+            name='GiraSnapshot',
+            fields=[
+                ('gira', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='gira.gira')),
+                ('versao', models.PositiveIntegerField()),
+                ('dados', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('congelada_em', models.DateTimeField(blank=True, null=True)),
+                ('reaberta_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'gira_snapshot',
+            },
+        ),
+        migrations.CreateModel(
+            name='Participacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('linha', models.CharField(max_length=150)),
+                ('categoria', models.PositiveSmallIntegerField(choices=[(0, 'Cambones'), (1, 'Organização'), (2, 'Limpeza')])),
+                ('servidas', models.IntegerField(default=0)),
+                ('liberadas', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'gira_participacao',
+            },
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='categoria',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Cambones'), (1, 'Organização'), (2, 'Limpeza')], default=1),
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='display_descricao',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='medium_nome_normalizado',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='funcao',
+            name='ordem_exibicao',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gira',
+            name='versao',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='girafuncaohistorico',
+            name='categoria',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Cambones'), (1, 'Organização'), (2, 'Limpeza')], default=1),
+        ),
+        migrations.AddField(
+            model_name='girafuncaohistorico',
+            name='display_descricao',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='girafuncaohistorico',
+            name='medium_nome_normalizado',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='girafuncaohistorico',
+            name='ordem_exibicao',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='girafuncaohistorico',
+            name='versao',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='medium',
+            name='nome_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='funcao',
+            index=models.Index(fields=['gira', 'categoria', 'ordem_exibicao'], name='gira_funcao_quadro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='funcao',
+            index=models.Index(fields=['gira', 'posicao'], name='gira_funcao_posicao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='funcao',
+            index=models.Index(fields=['chave'], name='gira_funcao_chave_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='funcao',
+            index=models.Index(condition=models.Q(('pessoa__isnull', True)), fields=['gira'], name='gira_funcao_vagas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='funcao',
+            index=models.Index(fields=['pessoa', 'gira'], name='gira_funcao_pessoa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gira',
+            index=models.Index(fields=['data_hora', 'id'], name='gira_gira_data_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='girafuncaohistorico',
+            index=models.Index(fields=['gira', 'categoria', 'ordem_exibicao'], name='gira_fhist_quadro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='girafuncaohistorico',
+            index=models.Index(fields=['gira', 'versao'], name='gira_fhist_versao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='girafuncaohistorico',
+            index=models.Index(condition=models.Q(('pessoa__isnull', True)), fields=['gira'], name='gira_fhist_vagas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='girafuncaohistorico',
+            index=models.Index(fields=['pessoa', 'gira'], name='gira_fhist_pessoa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historico',
+            index=models.Index(fields=['gira', '-id'], name='gira_historico_gira_idx'),
+        ),
+        migrations.AddField(
+            model_name='participacao',
+            name='medium',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gira.medium'),
+        ),
+        migrations.AddField(
+            model_name='funcaoremovida',
+            name='gira',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='gira.gira'),
+        ),
+        migrations.AddIndex(
+            model_name='participacao',
+            index=models.Index(fields=['mes'], name='gira_participacao_mes_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='participacao',
+            constraint=models.UniqueConstraint(fields=('medium', 'mes', 'linha', 'categoria'), name='gira_participacao_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='funcaoremovida',
+            index=models.Index(fields=['gira', 'versao'], name='gira_fremovida_versao_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def deduplicar(apps, schema_editor):
+    """
+    Mesma regra de `manage.py deduplicar_funcoes`: em cada (gira, chave)
+    repetida fica a primeira linha já assumida por alguém; senão a mais antiga.
+    """
+    GiraFuncaoHistorico = apps.get_model('gira', 'GiraFuncaoHistorico')
+    repetidas = (
+        GiraFuncaoHistorico.objects.exclude(chave__isnull=True)
+        .values('gira_id', 'chave')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for grupo in repetidas:
+        linhas = list(
+            GiraFuncaoHistorico.objects.filter(gira_id=grupo['gira_id'], chave=grupo['chave'])
+            .order_by('pk')
+            .values('id', 'pessoa_id')
+        )
+        manter = next((l for l in linhas if l['pessoa_id']), linhas[0])
+        GiraFuncaoHistorico.objects.filter(pk__in=[l['id'] for l in linhas if l['id'] != manter['id']]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gira', '0002_quadro_versoes_participacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicar, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='girafuncaohistorico',
+            constraint=models.UniqueConstraint(fields=('gira', 'chave'), name='gira_fhist_gira_chave_uniq'),
+        ),
+    ]
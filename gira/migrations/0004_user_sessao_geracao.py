@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gira', '0003_funcao_historico_gira_chave_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='sessao_geracao',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
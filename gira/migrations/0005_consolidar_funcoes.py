@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import F
+
+# cópia congelada de gira/consolidacao.py (a migração não importa o código da app)
+CAMPOS = (
+    'tipo', 'descricao', 'status', 'posicao', 'pessoa_id', 'medium_de_linha_id',
+    'categoria', 'ordem_exibicao', 'display_descricao', 'medium_nome_normalizado',
+)
+LOTE = 500
+
+
+def consolidar(apps, schema_editor):
+    """
+    Copia gira_funcao para gira_funcao_historico uma vez só, antes de as
+    views passarem a ler só o histórico. Mesma regra de consolidar_funcoes:
+    casa por (gira, chave), vale a linha de menor id, só grava o que difere.
+    Tudo no banco: as funções gravadas e as giras tocadas ganham versão nova
+    (ETag / ?since / quadro em cache ficam velhos) e, se mudou quem está em
+    alguma função, gira_participacao é esvaziada para o build recalcular
+    (reconstruir_participacao --se-vazia, logo depois do migrate).
+    """
+    db = schema_editor.connection.alias
+    Funcao = apps.get_model('gira', 'Funcao')
+    GiraFuncaoHistorico = apps.get_model('gira', 'GiraFuncaoHistorico')
+    Gira = apps.get_model('gira', 'Gira')
+    Participacao = apps.get_model('gira', 'Participacao')
+
+    vistas = set()
+    por_gira = defaultdict(set)
+    mudou_participacao = False
+    ultimo = 0
+    while True:
+        linhas = list(
+            Funcao.objects.using(db).filter(pk__gt=ultimo).exclude(chave='')
+            .order_by('pk').values('id', 'gira_id', 'chave', *CAMPOS)[:LOTE]
+        )
+        if not linhas:
+            break
+        ultimo = linhas[-1]['id']
+        copiar = []
+        for l in linhas:
+            if (l['gira_id'], l['chave']) not in vistas:
+                vistas.add((l['gira_id'], l['chave']))
+                copiar.append(l)
+
+        existentes = {
+            (h['gira_id'], h['chave']): h
+            for h in GiraFuncaoHistorico.objects.using(db).filter(
+                gira_id__in={l['gira_id'] for l in copiar}, chave__in={l['chave'] for l in copiar}
+            ).order_by().values('gira_id', 'chave', *CAMPOS)
+        }
+        objetos = []
+        for l in copiar:
+            valores = {campo: l[campo] for campo in CAMPOS}
+            if valores['descricao']:
+                valores['descricao'] = valores['descricao'][:255]  # TextField → varchar(255)
+            atual = existentes.get((l['gira_id'], l['chave']))
+            if atual is not None and all(atual[c] == valores[c] for c in CAMPOS):
+                continue
+            if valores['pessoa_id'] or (atual or {}).get('pessoa_id'):
+                mudou_participacao = True
+            objetos.append(GiraFuncaoHistorico(gira_id=l['gira_id'], chave=l['chave'], **valores))
+            por_gira[l['gira_id']].add(l['chave'])
+
+        GiraFuncaoHistorico.objects.using(db).bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=['gira', 'chave'],
+            update_fields=[campo.removesuffix('_id') for campo in CAMPOS],
+        )
+
+    for gira_id, chaves in por_gira.items():
+        Gira.objects.using(db).filter(pk=gira_id).update(versao=F('versao') + 1)
+        GiraFuncaoHistorico.objects.using(db).filter(gira_id=gira_id, chave__in=chaves).update(
+            versao=Gira.objects.using(db).filter(pk=gira_id).values('versao')[:1],
+        )
+
+    if mudou_participacao:
+        Participacao.objects.using(db).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gira', '0004_user_sessao_geracao'),
+    ]
+
+    operations = [
+        # desfazer não apaga nada: o histórico consolidado continua válido
+        # para o código anterior, que ainda lia gira_funcao
+        migrations.RunPython(consolidar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import classificacao
+
+
+# -------------------------------------------------------------------
+# 🔹 "Minhas funções": o que o médium assumiu de hoje em diante
+# -------------------------------------------------------------------
+# Uma consulta só para todas as giras: as funções de
+# gira_funcao_historico com pessoa_id = médium (índice (pessoa, gira))
+# com JOIN em gira_gira filtrado por data_hora >= hoje.
+#
+# O resultado fica no cache por médium. assumir/desistir (atribuicao),
+# o rodízio e os saves do admin chamam invalidar(); o TIMEOUT cobre o que
+# não dá para saber na hora (ex.: no admin, o médium que SAIU da função).
+
+TIMEOUT = getattr(settings, 'GIRA_MINHAS_TIMEOUT', 5 * 60)
+
+_CAMPOS = ('gira_id', 'gira__data_hora', 'gira__linha', 'id', 'chave', 'display_descricao', 'categoria')
+
+
+def _chave(medium_id):
+    return f'gira:minhas:{medium_id}'
+
+
+def _inicio_de_hoje():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def consulta(medium_id, desde=None):
+    """A consulta de buscar() (o plano é conferido em gira/tests/test_planos.py)."""
+    from .models import GiraFuncaoHistorico
+
+    desde = desde or _inicio_de_hoje()
+    return (
+        GiraFuncaoHistorico.objects.filter(pessoa_id=medium_id, gira__data_hora__gte=desde)
+        .order_by('gira__data_hora', 'gira_id', 'categoria', 'ordem_exibicao')
+        .values(*_CAMPOS)
+    )
+
+
+def buscar(medium_id):
+    """Funções do médium nas giras de hoje em diante, em ordem de data (sem cache)."""
+    return [
+        {
+            'gira_id': l['gira_id'],
+            'data_hora': l['gira__data_hora'],
+            'linha': l['gira__linha'],
+            'funcao_id': l['id'],
+            'chave': l['chave'],
+            'descricao': l['display_descricao'],
+            'grupo': classificacao.GRUPOS[l['categoria']],
+        }
+        for l in consulta(medium_id)
+    ]
+
+
+def funcoes(medium_id):
+    """buscar() com cache por médium."""
+    itens = cache.get(_chave(medium_id))
+    if itens is None:
+        itens = buscar(medium_id)
+        cache.set(_chave(medium_id), itens, TIMEOUT)
+    return itens
+
+
+def invalidar(*medium_ids):
+    """Descarta o cache dos médiuns (ids None são ignorados)."""
+    chaves = [_chave(m) for m in set(medium_ids) if m]
+    if chaves:
+        cache.delete_many(chaves)
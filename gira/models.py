@@ -1,6 +1,9 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
+from . import classificacao
+
 
 # ⚠️ NÃO ALTERADO — já está correto e vinculado à tabela gira_user
 class User(models.Model):
@@ -14,38 +17,63 @@ class User(models.Model):
     celular = models.CharField(max_length=15, unique=True)
     nome = models.CharField(max_length=150)
     email = models.EmailField(null=True, blank=True)
+    # incrementada por sessao.revogar(): sessões de gerações anteriores caem
+    sessao_geracao = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = 'celular'
     REQUIRED_FIELDS = []
 
+    # atributos (não métodos), como no AbstractBaseUser: `if user.is_authenticated`
+    @property
     def is_anonymous(self):
         return False
 
+    @property
     def is_authenticated(self):
         return True
 
+    # admin: sem grupos nem permissões por modelo; superuser ativo pode tudo
+    def has_perm(self, perm, obj=None):
+        return self.is_active and self.is_superuser
+
+    def has_module_perms(self, app_label):
+        return self.is_active and self.is_superuser
+
     class Meta:
         db_table = 'gira_user'
 
     def __str__(self):
         return f"{self.nome} ({self.celular})"
-        
-    @property
-    def medium(self):
-        """Retorna o médium associado a este usuário, se houver"""
-        from .models import Medium
-        return Medium.objects.filter(user_id=self.id).first()
+
+    # `user.medium` é o acesso reverso do OneToOne Medium.user (lança
+    # Medium.DoesNotExist se não houver). Com select_related('medium') não
+    # faz consulta nenhuma.
+    def medium_vinculado(self):
+        """Médium deste usuário, ou None (usa o cache do select_related)."""
+        try:
+            return self.medium
+        except Medium.DoesNotExist:
+            return None
 
 
 # ✅ ajustado para refletir a tabela gira_medium
 class Medium(models.Model):
     nome = models.CharField(max_length=150)
+    # nome sem acentos/maiúsculas, para a busca (gira/mediuns.py)
+    nome_normalizado = models.CharField(max_length=150, blank=True, default='', db_index=True, editable=False)
     habilitado = models.BooleanField(default=True)
     user = models.OneToOneField('User', on_delete=models.CASCADE, null=True, blank=True)
 
     class Meta:
         db_table = 'gira_medium'
 
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = classificacao.normalizar_nome(self.nome)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'nome_normalizado'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nome
 
@@ -70,14 +98,40 @@ class Gira(models.Model):
     linha = models.CharField(max_length=150)
     status = models.CharField(max_length=50, default='Ativa')
     criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # 🔹 Versão das mudanças da gira (gira/versoes.py). Só é alterada por
+    # UPDATE versao = versao + 1; o save() nunca regrava este campo.
+    versao = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         db_table = 'gira_gira'
+        indexes = [
+            models.Index(fields=['data_hora', 'id'], name='gira_gira_data_hora_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk and not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != 'versao'
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.titulo} ({self.linha}) - {self.data_hora:%d/%m/%Y %H:%M}"
 
 
+class FuncaoQuerySet(models.QuerySet):
+    """QuerySet de Funcao e GiraFuncaoHistorico."""
+
+    def for_board(self):
+        """
+        Funções prontas para o quadro e o admin: gira, médium de linha e
+        pessoa no mesmo SELECT, na ordem de exibição. O número de consultas
+        não depende de quantas funções a gira tem. Usado por quadro.serializar()
+        (via .values(), com os nomes dos médiuns no mesmo JOIN) e pelo admin.
+        """
+        return self.select_related('gira', 'medium_de_linha', 'pessoa').order_by(*classificacao.ORDEM_QUADRO)
+
+
 # ✅ atualizado conforme tabela gira_funcao (colunas e nomes reais)
 class Funcao(models.Model):
     gira = models.ForeignKey(Gira, on_delete=models.CASCADE, related_name='funcoes')
@@ -89,32 +143,51 @@ class Funcao(models.Model):
     medium_de_linha = models.ForeignKey(Medium, on_delete=models.SET_NULL, null=True, blank=True)
     pessoa = models.ForeignKey('Medium', null=True, blank=True, on_delete=models.SET_NULL, related_name='funcoes_assumidas')
 
+    # 🔹 Campos derivados (gira/classificacao.py), calculados no save()
+    categoria = models.PositiveSmallIntegerField(choices=classificacao.CATEGORIAS, default=classificacao.ORGANIZACAO)
+    ordem_exibicao = models.PositiveSmallIntegerField(default=0)
+    display_descricao = models.CharField(max_length=255, blank=True, default='')
+    medium_nome_normalizado = models.CharField(max_length=150, blank=True, default='')
+
+    objects = FuncaoQuerySet.as_manager()
 
     class Meta:
         db_table = 'gira_funcao'
-
+        indexes = [
+            models.Index(fields=['gira', 'categoria', 'ordem_exibicao'], name='gira_funcao_quadro_idx'),
+            models.Index(fields=['gira', 'posicao'], name='gira_funcao_posicao_idx'),
+            models.Index(fields=['chave'], name='gira_funcao_chave_idx'),
+            models.Index(fields=['gira'], condition=models.Q(pessoa__isnull=True), name='gira_funcao_vagas_idx'),
+            # "minhas funções" (gira/minhas.py)
+            models.Index(fields=['pessoa', 'gira'], name='gira_funcao_pessoa_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        classificacao.aplicar(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and classificacao.CAMPOS_ORIGEM.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(classificacao.CAMPOS_DERIVADOS)
+        super().save(*args, **kwargs)
+
+    # As propriedades abaixo só leem relações: sem consulta quando a função
+    # veio de for_board() (ou o FK está vazio).
     @property
     def medium_nome(self):
         """Retorna o nome do médium de linha (da tabela gira_medium)."""
-        return self.medium_de_linha.nome if self.medium_de_linha else None
+        return self.medium_de_linha.nome if self.medium_de_linha_id else None
 
     @property
     def pessoa_nome(self):
-        """Retorna o nome do usuário que assumiu a função (da tabela gira_user)."""
-        return self.pessoa.nome if self.pessoa else None
-
+        """Retorna o nome do médium que assumiu a função (da tabela gira_medium)."""
+        return self.pessoa.nome if self.pessoa_id else None
 
     def __str__(self):
         return f"{self.tipo} - {self.posicao or ''} - {self.status}"
-        
+
     @property
     def nome_responsavel(self):
         """Nome do médium responsável pela função, ou '—' se vaga."""
-        if self.pessoa and self.pessoa.medium:
-            return self.pessoa.medium.nome
-        elif self.pessoa:
-            return self.pessoa.nome
-        return "—"
+        return self.pessoa_nome or "—"
 
 
 # ✅ atualizado conforme gira_historico (colunas reais)
@@ -128,6 +201,9 @@ class Historico(models.Model):
 
     class Meta:
         db_table = 'gira_historico'
+        indexes = [
+            models.Index(fields=['gira', '-id'], name='gira_historico_gira_idx'),
+        ]
 
     def __str__(self):
         return f"{self.data:%d/%m/%Y %H:%M} - {self.acao}"
@@ -144,11 +220,97 @@ class GiraFuncaoHistorico(models.Model):
     posicao = models.CharField(max_length=50, blank=True, null=True)
     chave = models.CharField(max_length=100, blank=True, null=True)
     criado_em = models.DateTimeField(auto_now_add=True)
+    # versão da gira em que esta linha mudou pela última vez (gira/versoes.py)
+    versao = models.PositiveIntegerField(default=0, editable=False)
+
+    # 🔹 Campos derivados (gira/classificacao.py), calculados no save()
+    categoria = models.PositiveSmallIntegerField(choices=classificacao.CATEGORIAS, default=classificacao.ORGANIZACAO)
+    ordem_exibicao = models.PositiveSmallIntegerField(default=0)
+    display_descricao = models.CharField(max_length=255, blank=True, default='')
+    medium_nome_normalizado = models.CharField(max_length=150, blank=True, default='')
+
+    objects = FuncaoQuerySet.as_manager()
 
     class Meta:
         db_table = 'gira_funcao_historico'
         ordering = ['gira_id', 'posicao']
+        indexes = [
+            models.Index(fields=['gira', 'categoria', 'ordem_exibicao'], name='gira_fhist_quadro_idx'),
+            models.Index(fields=['gira', 'versao'], name='gira_fhist_versao_idx'),
+            models.Index(fields=['gira'], condition=models.Q(pessoa__isnull=True), name='gira_fhist_vagas_idx'),
+            # "minhas funções" (gira/minhas.py)
+            models.Index(fields=['pessoa', 'gira'], name='gira_fhist_pessoa_idx'),
+        ]
+        constraints = [
+            # as duplicatas antigas são removidas pela migração 0003, antes da restrição
+            models.UniqueConstraint(fields=['gira', 'chave'], name='gira_fhist_gira_chave_uniq'),
+        ]
+
+    def save(self, *args, **kwargs):
+        classificacao.aplicar(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and classificacao.CAMPOS_ORIGEM.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(classificacao.CAMPOS_DERIVADOS)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.descricao or self.tipo} ({self.gira_id})"
 
+
+# 🪦 Funções (gira_funcao_historico) apagadas, para o delta de get_gira_data.
+# Sem FK de verdade: a gira pode ser apagada junto com as funções.
+class FuncaoRemovida(models.Model):
+    gira = models.ForeignKey('Gira', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    funcao_id = models.BigIntegerField()
+    versao = models.PositiveIntegerField()
+    removida_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'gira_funcao_removida'
+        indexes = [
+            models.Index(fields=['gira', 'versao'], name='gira_fremovida_versao_idx'),
+        ]
+
+    def __str__(self):
+        return f"Função {self.funcao_id} removida da gira {self.gira_id} (v{self.versao})"
+
+
+# 🔹 Quadro final congelado de uma gira encerrada (gira/snapshots.py)
+class GiraSnapshot(models.Model):
+    gira = models.OneToOneField('Gira', on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    versao = models.PositiveIntegerField()
+    # None = reaberta no admin (o job não congela de novo sozinho)
+    dados = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    congelada_em = models.DateTimeField(null=True, blank=True)
+    reaberta_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'gira_snapshot'
+
+    def __str__(self):
+        estado = 'reaberta' if self.dados is None else f'congelada (v{self.versao})'
+        return f"Gira {self.gira_id} {estado}"
+
+
+# 🔹 Participação por médium / mês / linha / categoria (gira/estatisticas.py)
+# Mantida por delta (assumir, desistir, rodízio, admin); `reconstruir_participacao`
+# recalcula do zero a partir de gira_funcao_historico e gira_historico.
+class Participacao(models.Model):
+    medium = models.ForeignKey('Medium', on_delete=models.CASCADE, related_name='+')
+    mes = models.DateField()  # primeiro dia do mês da gira
+    linha = models.CharField(max_length=150)
+    categoria = models.PositiveSmallIntegerField(choices=classificacao.CATEGORIAS)
+    servidas = models.IntegerField(default=0)
+    liberadas = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'gira_participacao'
+        constraints = [
+            models.UniqueConstraint(fields=['medium', 'mes', 'linha', 'categoria'], name='gira_participacao_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['mes'], name='gira_participacao_mes_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.medium_id} {self.mes:%m/%Y} {self.linha}: {self.servidas} servidas, {self.liberadas} liberadas"
@@ -0,0 +1,83 @@
+from . import classificacao
+
+
+# -------------------------------------------------------------------
+# 🔹 Quadro da gira em formato compacto (HTML e JSON)
+# -------------------------------------------------------------------
+# Um único serializador para o quadro: a página (/funcoes/ e
+# /funcoes_dev/) e o AJAX do carrossel (get_gira_data) partem do mesmo
+# dicionário, então o agrupamento em cambones / organização / limpeza
+# acontece uma vez só, no servidor.
+#
+# Formato (JSON):
+#   {
+#     'tema': 'exu' | 'padrao',
+#     'colunas': ['id', 'chave', 'descricao', 'vaga', 'pessoa', 'linha'],
+#     'secoes': {'cambones': [[...], ...], 'organizacao': [...], 'limpeza': [...]},
+#     'mediuns': {'<id>': '<nome>', ...},
+#   }
+# Cada função é uma lista na ordem de 'colunas' (já na ordem do quadro);
+# 'pessoa' e 'linha' são ids de médium e o nome sai de 'mediuns', que
+# traz cada médium uma vez só. 'vaga' é 1 ou 0.
+
+COLUNAS = ('id', 'chave', 'descricao', 'vaga', 'pessoa', 'linha')
+
+_CAMPOS = (
+    'id', 'categoria', 'chave', 'display_descricao', 'status',
+    'pessoa_id', 'pessoa__nome', 'medium_de_linha_id', 'medium_de_linha__nome',
+)
+
+
+def tema(linha):
+    """Tema visual da gira: 'exu' (Exu / Pombagira) ou 'padrao'."""
+    linha = classificacao.normalizar(linha or '')
+    return 'exu' if 'exu' in linha or 'pombag' in linha else 'padrao'
+
+
+def serializar(funcoes_qs, linha=None):
+    """
+    Quadro compacto a partir de um queryset de Funcao ou
+    GiraFuncaoHistorico já filtrado pela gira e passado por for_board()
+    (que dá a ordem do quadro). Uma consulta só.
+    """
+    secoes = {grupo: [] for grupo in classificacao.GRUPOS.values()}
+    mediuns = {}
+    for f in funcoes_qs.values(*_CAMPOS):
+        if f['pessoa_id']:
+            mediuns[str(f['pessoa_id'])] = f['pessoa__nome']
+        if f['medium_de_linha_id']:
+            mediuns[str(f['medium_de_linha_id'])] = f['medium_de_linha__nome']
+        secoes[classificacao.GRUPOS[f['categoria']]].append([
+            f['id'],
+            f['chave'],
+            f['display_descricao'],
+            1 if (f['status'] or '').lower() == 'vaga' else 0,
+            f['pessoa_id'],
+            f['medium_de_linha_id'],
+        ])
+    return {'tema': tema(linha), 'colunas': list(COLUNAS), 'secoes': secoes, 'mediuns': mediuns}
+
+
+def expandir(quadro):
+    """
+    {grupo: [dict por função]} para os templates, com os nomes dos
+    médiuns já resolvidos (pessoa_nome, linha_nome).
+    """
+    mediuns = quadro['mediuns']
+    grupos = {}
+    for grupo, linhas in quadro['secoes'].items():
+        itens = []
+        for linha in linhas:
+            f = dict(zip(COLUNAS, linha))
+            f['vaga'] = bool(f['vaga'])
+            f['pessoa_nome'] = mediuns.get(str(f['pessoa'])) if f['pessoa'] else None
+            f['linha_nome'] = mediuns.get(str(f['linha'])) if f['linha'] else None
+            itens.append(f)
+        grupos[grupo] = itens
+    return grupos
+
+
+def pessoas(quadro):
+    """[(funcao_id, pessoa_id)] de todas as funções do quadro."""
+    indice_pessoa = COLUNAS.index('pessoa')
+    return [(l[0], l[indice_pessoa]) for linhas in quadro['secoes'].values() for l in linhas]
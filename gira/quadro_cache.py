@@ -0,0 +1,115 @@
+import time
+from datetime import datetime, time as hora
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+# -------------------------------------------------------------------
+# 🔹 Cache do quadro de funções (lista_funcoes)
+# -------------------------------------------------------------------
+# O quadro de uma gira é igual para todos; só o destaque "minha função"
+# muda, e ele é aplicado no navegador (data-medium-id). Por isso o
+# fragmento HTML inteiro fica no cache, numa chave com:
+#   - o id da gira;
+#   - a versão da gira (incrementada a cada assumir/desistir e a cada
+#     save/delete de Gira, Funcao ou GiraFuncaoHistorico);
+#   - uma geração global (incrementada quando um Medium muda, já que o
+#     nome dele aparece em várias giras).
+# Entradas antigas nunca são lidas de novo e expiram pelo TIMEOUT.
+#
+# Funciona com qualquer backend do Django (LocMemCache, FileBasedCache,
+# Redis...). Com LocMemCache cada worker tem o seu cache: use um worker
+# só ou um backend compartilhado (ver CACHES em settings.py).
+
+TIMEOUT = 60 * 60 * 6
+
+_CHAVE_ATUAL = 'gira:atual'
+_CHAVE_GERACAO = 'gira:quadro:geracao'
+
+
+def _chave_versao(gira_id):
+    return f'gira:quadro:versao:{gira_id}'
+
+
+def _incrementar(chave):
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # chave inexistente (ou expulsa do cache): recomeça num valor que
+        # não colide com versões antigas
+        valor = int(time.time() * 1000)
+        cache.set(chave, valor, None)
+        return valor
+
+
+def _ler(chave):
+    valor = cache.get(chave)
+    if valor is None:
+        valor = int(time.time() * 1000)
+        if not cache.add(chave, valor, None):
+            valor = cache.get(chave, valor)
+    return valor
+
+
+def versao(gira_id):
+    """Versão atual do quadro da gira (muda a cada alteração)."""
+    return _ler(_chave_versao(gira_id))
+
+
+def invalidar(gira_id):
+    """Marca o quadro da gira como alterado."""
+    if gira_id:
+        _incrementar(_chave_versao(gira_id))
+
+
+def invalidar_tudo():
+    """Invalida o quadro de todas as giras (ex.: um médium trocou de nome)."""
+    _incrementar(_CHAVE_GERACAO)
+
+
+def _chave_atual():
+    # a gira atual muda com o dia: a chave também
+    return f'{_CHAVE_ATUAL}:{timezone.localdate().isoformat()}'
+
+
+def invalidar_gira_atual():
+    cache.delete(_chave_atual())
+
+
+def gira_atual_id():
+    """
+    Id da gira exibida em /funcoes/: a próxima de hoje em diante (em ordem
+    de data) ou, se não houver nenhuma, a última que passou. None sem giras.
+    Uma temporada gerada de uma vez (gira/geracao.py) não puxa o quadro
+    para a última gira dela.
+    """
+    from .models import Gira
+
+    chave = _chave_atual()
+    gira_id = cache.get(chave)
+    if gira_id is None:
+        giras = Gira.objects.values_list('id', flat=True)
+        # limite em data_hora (e não data_hora__date): a consulta usa o índice
+        inicio_de_hoje = timezone.make_aware(datetime.combine(timezone.localdate(), hora.min))
+        gira_id = (
+            giras.filter(data_hora__gte=inicio_de_hoje).order_by('data_hora', 'id').first()
+            or giras.order_by('-data_hora', '-id').first()
+            or 0
+        )
+        cache.set(chave, gira_id, TIMEOUT)
+    return gira_id or None
+
+
+def obter(prefixo, gira_id, montar):
+    """
+    Retorna o quadro `prefixo` da gira, montando-o com `montar()` só
+    quando a versão mudou. `montar` deve devolver algo serializável
+    (dict com gira, listas, HTML renderizado...).
+    """
+    chave = f'gira:quadro:{prefixo}:{gira_id}:{versao(gira_id)}:{_ler(_CHAVE_GERACAO)}'
+    quadro = cache.get(chave)
+    if quadro is None:
+        quadro = montar()
+        cache.set(chave, quadro, TIMEOUT)
+    return quadro
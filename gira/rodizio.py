@@ -0,0 +1,197 @@
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from . import auditoria, classificacao, estatisticas, minhas, quadro_cache, versoes
+
+
+# -------------------------------------------------------------------
+# 🔹 Rodízio automático de cambones
+# -------------------------------------------------------------------
+# Os nomes ativos do CambonePool (ligados ao Medium de mesmo nome) são
+# distribuídos nas vagas de cambone das próximas giras:
+#   - as giras são planejadas em ordem de data e, dentro de cada uma, as
+#     vagas na ordem do quadro (classificacao.ORDEM_QUADRO), então a vaga
+#     da Mãe Bruna é sempre a primeira a receber alguém;
+#   - cada vaga recebe quem tem menos cambones no histórico
+#     (GiraFuncaoHistorico), depois quem serviu há mais tempo e, no
+#     empate, a ordem do pool;
+#   - ninguém pega duas funções na mesma gira nem é cambone de si mesmo.
+# O plano sai de meia dúzia de consultas e um heap (O(vagas · log
+# pessoas)); a gravação é um bulk_update. Vagas já preenchidas não mudam.
+
+STATUS_PREENCHIDA = 'Preenchida'
+ACAO_AUDITORIA = 'rodizio_cambone'
+
+
+def candidatos():
+    """[(medium_id, ordem)] do pool ativo, na ordem do rodízio."""
+    from .models import CambonePool, Medium
+
+    pool = [
+        (classificacao.normalizar_nome(nome), ordem)
+        for nome, ordem in CambonePool.objects.filter(ativo=True).order_by('ordem', 'id').values_list('nome', 'ordem')
+    ]
+    # casa pelo índice de Medium.nome_normalizado; com nomes repetidos vale o de menor id
+    por_nome = {}
+    for medium_id, nome in (
+        Medium.objects.filter(habilitado=True, nome_normalizado__in={nome for nome, _ in pool})
+        .order_by('-id').values_list('id', 'nome_normalizado')
+    ):
+        por_nome[nome] = medium_id
+    vistos = set()
+    resultado = []
+    for nome, ordem in pool:
+        medium_id = por_nome.get(nome)
+        if medium_id and medium_id not in vistos:
+            vistos.add(medium_id)
+            resultado.append((medium_id, ordem))
+    return resultado
+
+
+def carga_historica(medium_ids):
+    """{medium_id: (cambones já feitos, data da última vez)} em gira_funcao_historico."""
+    from .models import GiraFuncaoHistorico
+
+    linhas = (
+        GiraFuncaoHistorico.objects.filter(categoria=classificacao.CAMBONE, pessoa_id__in=medium_ids)
+        .values('pessoa_id')
+        .annotate(total=Count('id'), ultima=Max('gira__data_hora'))
+    )
+    return {l['pessoa_id']: (l['total'], l['ultima']) for l in linhas}
+
+
+def planejar(vagas, ocupados, pessoas, carga):
+    """
+    Algoritmo puro (sem banco).
+      vagas:    [(funcao_id, gira_id, medium_de_linha_id)] em ordem de gira e de quadro;
+      ocupados: {gira_id: {medium_id, ...}} já com função na gira;
+      pessoas:  [(medium_id, ordem)];
+      carga:    {medium_id: (total, ultima_data)}.
+    Retorna {funcao_id: medium_id}.
+    """
+    # ordem das giras, para "quem serviu há mais tempo" dentro do plano
+    indice_gira = {}
+    for _, gira_id, _ in vagas:
+        indice_gira.setdefault(gira_id, len(indice_gira))
+
+    # histórico: quem nunca serviu (-2) vem antes de quem serviu antes do plano (-1)
+    heap = []
+    for posicao, (medium_id, _ordem) in enumerate(pessoas):
+        total, ultima = carga.get(medium_id, (0, None))
+        heap.append((total, -1 if ultima else -2, ultima.timestamp() if ultima else 0, posicao, medium_id))
+    heapq.heapify(heap)
+
+    plano = {}
+    usados = defaultdict(set)
+    for funcao_id, gira_id, medium_de_linha_id in vagas:
+        na_gira = ocupados.get(gira_id, set()) | usados[gira_id]
+        adiados = []
+        escolhido = None
+        while heap:
+            item = heapq.heappop(heap)
+            medium_id = item[-1]
+            if medium_id in na_gira or medium_id == medium_de_linha_id:
+                adiados.append(item)
+                continue
+            escolhido = item
+            break
+        for item in adiados:
+            heapq.heappush(heap, item)
+        if escolhido is None:
+            continue  # ninguém disponível para esta vaga
+        total, _, _, posicao, medium_id = escolhido
+        plano[funcao_id] = medium_id
+        usados[gira_id].add(medium_id)
+        # serviu agora: vai para o fim da fila dos que têm a mesma carga
+        heapq.heappush(heap, (total + 1, indice_gira[gira_id], 0, posicao, medium_id))
+    return plano
+
+
+def proximas_giras(quantidade=None, ate=None):
+    """Ids das giras a partir de hoje (as próximas `quantidade` ou até a data `ate`)."""
+    from .models import Gira
+
+    qs = Gira.objects.filter(data_hora__date__gte=timezone.localdate()).order_by('data_hora', 'id')
+    if ate:
+        qs = qs.filter(data_hora__date__lte=ate)
+    ids = qs.values_list('id', flat=True)
+    return list(ids[:quantidade] if quantidade else ids)
+
+
+def distribuir(gira_ids, models=None, *, gravar=True, usuario_id=None):
+    """
+    Preenche as vagas de cambone das giras em cada model (padrão: só
+    GiraFuncaoHistorico, a tabela do quadro; Funcao é legado) com o mesmo
+    critério. Retorna {db_table: {funcao_id: medium_id}}.
+    """
+    from .models import GiraFuncaoHistorico
+
+    models = models or (GiraFuncaoHistorico,)
+    pessoas = candidatos()
+    # carga lida uma vez só: as duas tabelas recebem o mesmo plano
+    carga = carga_historica([m for m, _ in pessoas])
+
+    planos = {}
+    for model in models:
+        vagas = list(
+            model.objects.filter(gira_id__in=gira_ids, categoria=classificacao.CAMBONE, pessoa_id__isnull=True)
+            .order_by('gira__data_hora', 'gira_id', *classificacao.ORDEM_QUADRO)
+            .values_list('id', 'gira_id', 'medium_de_linha_id')
+        )
+        ocupados = defaultdict(set)
+        for gira_id, pessoa_id in (
+            model.objects.filter(gira_id__in=gira_ids, pessoa_id__isnull=False).values_list('gira_id', 'pessoa_id')
+        ):
+            ocupados[gira_id].add(pessoa_id)
+
+        plano = planejar(vagas, ocupados, pessoas, carga)
+        if gravar and plano:
+            _gravar(model, vagas, plano, usuario_id)
+        planos[model._meta.db_table] = plano
+    return planos
+
+
+def _gravar(model, vagas, plano, usuario_id):
+    gira_de = {funcao_id: gira_id for funcao_id, gira_id, _ in vagas}
+    linhas = [model(id=funcao_id, pessoa_id=medium_id, status=STATUS_PREENCHIDA) for funcao_id, medium_id in plano.items()]
+    por_gira = defaultdict(list)
+    for funcao_id in plano:
+        por_gira[gira_de[funcao_id]].append(funcao_id)
+
+    with transaction.atomic():
+        # só grava onde a vaga continua vazia (alguém pode ter mexido no meio)
+        ainda_vagas = set(
+            model.objects.filter(id__in=plano, pessoa_id__isnull=True).select_for_update().values_list('id', flat=True)
+        )
+        linhas = [l for l in linhas if l.id in ainda_vagas]
+        model.objects.bulk_update(linhas, ['pessoa_id', 'status'], batch_size=500)
+        # só as giras em que alguma vaga foi mesmo preenchida
+        gravadas = {gira_id: [i for i in ids if i in ainda_vagas] for gira_id, ids in por_gira.items()}
+        gravadas = {gira_id: ids for gira_id, ids in gravadas.items() if ids}
+        if model._meta.db_table == 'gira_funcao_historico':
+            # versões e resumo de todas as giras de uma vez (uma temporada
+            # inteira não vira quatro comandos por gira)
+            giras = versoes.registrar_mudancas(gravadas)
+            itens = []
+            for gira_id, ids in gravadas.items():
+                if gira_id in giras:
+                    deltas = {}
+                    for i in ids:
+                        estatisticas.acumular(deltas, plano[i], classificacao.CAMBONE, 1)
+                    itens.append((giras[gira_id].data_hora, giras[gira_id].linha, deltas))
+            estatisticas.somar_varias(itens)
+
+    def efeitos():
+        minhas.invalidar(*(plano[i] for i in ainda_vagas))
+        for gira_id, ids in gravadas.items():
+            quadro_cache.invalidar(gira_id)
+            auditoria.registrar(
+                ACAO_AUDITORIA, gira_id, usuario_id=usuario_id,
+                info={'tabela': model._meta.db_table, 'atribuicoes': {i: plano[i] for i in ids}},
+            )
+
+    transaction.on_commit(efeitos)
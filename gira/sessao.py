@@ -0,0 +1,46 @@
+from django.db.models import F
+
+from . import identidade
+
+
+# -------------------------------------------------------------------
+# 🔹 Sessão do login por celular
+# -------------------------------------------------------------------
+# SESSION_ENGINE = cached_db: a sessão continua no servidor (django_session)
+# e as requisições logadas a leem do cache; o banco só é lido quando o
+# cache não tem a chave e só é gravado quando a sessão muda (login/logout).
+#
+# A revogação é por usuário e fica no banco: revogar(user_id) incrementa
+# User.sessao_geracao, e o IdentidadeMiddleware compara com a geração
+# guardada na sessão no login. O usuário vem de identidade.resolver() (já
+# carregado em toda requisição), então a conferência não custa query. No
+# worker que revogou vale na hora; nos outros, no máximo após o TTL do
+# cache de identidade (GIRA_IDENTIDADE_TTL). Usuário inativo ou apagado não
+# é resolvido (identidade._buscar) e a sessão cai do mesmo jeito.
+
+CHAVE_GERACAO = 'geracao'
+
+
+def iniciar(request, user):
+    """Grava o login na sessão (nova chave, para evitar fixação de sessão)."""
+    request.session.cycle_key()
+    request.session['user_id'] = user.id
+    request.session['user_nome'] = user.nome
+    request.session['user_telefone'] = user.celular
+    request.session[CHAVE_GERACAO] = user.sessao_geracao
+
+
+def revogar(*user_ids):
+    """Invalida todas as sessões já emitidas para os usuários (todos os aparelhos)."""
+    from .models import User
+
+    User.objects.filter(id__in=user_ids).update(sessao_geracao=F('sessao_geracao') + 1)
+    for user_id in user_ids:
+        identidade.invalidar_usuario(user_id)
+
+
+def valida(session, user):
+    """False se a sessão tem login mas o usuário sumiu, foi desativado ou teve as sessões revogadas."""
+    if not session.get('user_id'):
+        return True
+    return user is not None and session.get(CHAVE_GERACAO, 0) == user.sessao_geracao
@@ -0,0 +1,164 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import classificacao, estatisticas, identidade, mediuns, minhas, quadro_cache, sessao, versoes
+from .models import User, Medium, Gira, Funcao, GiraFuncaoHistorico, FuncaoRemovida
+
+
+# -------------------------------------------------------------------
+# 🔹 Invalidação do cache de identidade
+# -------------------------------------------------------------------
+@receiver([post_save, post_delete], sender=User)
+def _usuario_alterado(sender, instance, **kwargs):
+    identidade.invalidar_usuario(instance.id)
+
+
+# 🔹 Usuário desativado: derruba as sessões já emitidas (não voltam se ele
+# for reativado). Apagado não precisa: identidade não o resolve mais.
+@receiver(post_save, sender=User)
+def _usuario_desativado(sender, instance, raw=False, **kwargs):
+    if not raw and not instance.is_active:
+        sessao.revogar(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Medium)
+def _medium_alterado(sender, instance, **kwargs):
+    identidade.invalidar_medium(instance.id, instance.user_id)
+
+
+# 🔹 Índice da busca por nome (gira/mediuns.py)
+@receiver([post_save, post_delete], sender=Medium)
+def _medium_alterado_busca(sender, instance, **kwargs):
+    mediuns.invalidar()
+
+
+# -------------------------------------------------------------------
+# 🔹 Médium renomeado: campos derivados, versão e cache das giras
+# -------------------------------------------------------------------
+# Só o nome do médium aparece no quadro; os outros saves (habilitado,
+# usuário...) não mexem nas funções nem nas giras.
+@receiver(pre_save, sender=Medium)
+def _medium_nome_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._renomeado = False
+    if raw or not instance.pk or (update_fields is not None and 'nome' not in update_fields):
+        return
+    anterior = Medium.objects.filter(pk=instance.pk).values_list('nome', flat=True).first()
+    instance._renomeado = anterior is not None and anterior != instance.nome
+
+
+@receiver(post_save, sender=Medium)
+def _medium_renomeado(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_renomeado', False):
+        return
+    # nome de médium de linha nos campos derivados das funções
+    classificacao.atualizar_medium(instance)
+    # o nome vai no JSON: nova versão nas giras e funções em que ele aparece
+    gira_ids = versoes.registrar_mudancas_em(
+        GiraFuncaoHistorico.objects.filter(Q(pessoa_id=instance.id) | Q(medium_de_linha_id=instance.id))
+    )
+
+    def efeitos():
+        for gira_id in gira_ids:
+            quadro_cache.invalidar(gira_id)
+
+    transaction.on_commit(efeitos)
+
+
+# -------------------------------------------------------------------
+# 🔹 Invalidação do cache do quadro (saves do admin, scripts etc.)
+# -------------------------------------------------------------------
+@receiver([post_save, post_delete], sender=Gira)
+def _gira_alterada(sender, instance, **kwargs):
+    quadro_cache.invalidar(instance.id)
+    quadro_cache.invalidar_gira_atual()
+
+
+@receiver([post_save, post_delete], sender=Funcao)
+@receiver([post_save, post_delete], sender=GiraFuncaoHistorico)
+def _funcao_alterada(sender, instance, **kwargs):
+    quadro_cache.invalidar(instance.gira_id)
+    minhas.invalidar(instance.pessoa_id)
+
+
+@receiver(post_delete, sender=Medium)
+def _medium_removido_quadro(sender, instance, **kwargs):
+    # as funções dele ficaram sem pessoa / médium de linha (SET NULL, sem signal)
+    quadro_cache.invalidar_tudo()
+
+
+# -------------------------------------------------------------------
+# 🔹 Versão de mudanças da gira (delta / ETag de get_gira_data)
+# -------------------------------------------------------------------
+@receiver(post_save, sender=Gira)
+def _gira_versao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versoes.registrar_mudanca(instance.id)
+
+
+@receiver(post_delete, sender=Gira)
+def _gira_removida(sender, instance, **kwargs):
+    FuncaoRemovida.objects.filter(gira_id=instance.id).delete()
+
+
+@receiver(post_save, sender=GiraFuncaoHistorico)
+def _funcao_historico_versao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versoes.registrar_mudanca(instance.gira_id, [instance.id])
+
+
+@receiver(post_delete, sender=GiraFuncaoHistorico)
+def _funcao_historico_removida(sender, instance, **kwargs):
+    versoes.registrar_remocao(instance.gira_id, instance.id)
+
+
+# -------------------------------------------------------------------
+# 🔹 Participação (gira/estatisticas.py) nos saves do admin e scripts
+# -------------------------------------------------------------------
+# assumir/desistir e o rodízio gravam com UPDATE (sem signal) e já
+# atualizam o resumo; aqui entra o que passa por save()/delete().
+def _participacao_da_funcao(instance):
+    return (instance.gira_id, instance.categoria, instance.pessoa_id)
+
+
+@receiver(pre_save, sender=GiraFuncaoHistorico)
+def _funcao_historico_antes(sender, instance, raw=False, **kwargs):
+    instance._participacao_anterior = None
+    if not raw and instance.pk:
+        instance._participacao_anterior = (
+            GiraFuncaoHistorico.objects.filter(pk=instance.pk).values_list('gira_id', 'categoria', 'pessoa_id').first()
+        )
+
+
+@receiver(post_save, sender=GiraFuncaoHistorico)
+def _funcao_historico_participacao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        estatisticas.trocar(getattr(instance, '_participacao_anterior', None), _participacao_da_funcao(instance))
+
+
+@receiver(post_delete, sender=GiraFuncaoHistorico)
+def _funcao_historico_participacao_removida(sender, instance, origin=None, **kwargs):
+    # gira apagada inteira: _gira_participacao_removida já tirou tudo
+    if isinstance(origin, Gira) or getattr(origin, 'model', None) is Gira:
+        return
+    estatisticas.trocar(_participacao_da_funcao(instance), None)
+
+
+@receiver(pre_save, sender=Gira)
+def _gira_antes(sender, instance, raw=False, **kwargs):
+    instance._participacao_anterior = None
+    if not raw and instance.pk:
+        instance._participacao_anterior = Gira.objects.filter(pk=instance.pk).values_list('data_hora', 'linha').first()
+
+
+@receiver(post_save, sender=Gira)
+def _gira_participacao(sender, instance, raw=False, **kwargs):
+    anterior = getattr(instance, '_participacao_anterior', None)
+    if not raw and anterior:
+        estatisticas.mover_gira(instance.id, anterior, (instance.data_hora, instance.linha))
+
+
+@receiver(pre_delete, sender=Gira)
+def _gira_participacao_removida(sender, instance, **kwargs):
+    estatisticas.remover_gira(instance.data_hora, instance.linha, instance.id)
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import auditoria, quadro, quadro_cache, versoes
+
+
+# -------------------------------------------------------------------
+# 🔹 Quadro congelado das giras encerradas
+# -------------------------------------------------------------------
+# Gira passada não muda mais (os endpoints recusam assumir/desistir),
+# então o job `congelar_giras` grava o quadro final dela (o mesmo JSON
+# do get_gira_data, gira/quadro.py) numa linha de gira_snapshot. Ler uma
+# gira passada vira uma busca pela chave primária, sem juntar
+# gira_funcao_historico com gira_medium nem reagrupar nada.
+#
+# O JSON de uma gira congelada é servido com Cache-Control immutable
+# quando a URL traz ?v=<versão> igual à do congelamento (o carrossel
+# manda a versão que recebeu na janela de giras). Mudou a versão, muda a
+# URL e o navegador não reaproveita o antigo.
+#
+# Para corrigir uma gira congelada, "Reabrir" no admin: o quadro
+# congelado é descartado (dados = None), a versão da gira sobe e o job
+# deixa de congelá-la. Depois de corrigida, "Congelar" (admin ou
+# `congelar_giras --gira`) grava o quadro de novo.
+
+ACAO_REABRIR = 'reabrir_gira'
+ACAO_CONGELAR = 'congelar_gira'
+
+
+def encerradas():
+    """Ids das giras passadas (antes de hoje) ainda sem linha em gira_snapshot."""
+    from .models import Gira
+
+    return list(
+        Gira.objects.filter(data_hora__date__lt=timezone.localdate(), snapshot__isnull=True)
+        .order_by('data_hora', 'id')
+        .values_list('id', flat=True)
+    )
+
+
+def montar(gira_id):
+    """Quadro da gira no formato do get_gira_data (sem os campos do delta), ou None."""
+    from .models import Gira, GiraFuncaoHistorico
+
+    gira = Gira.objects.filter(id=gira_id).values('id', 'linha', 'data_hora', 'versao').first()
+    if not gira:
+        return None
+    return {
+        'gira': {'id': gira['id'], 'linha': gira['linha'], 'data_hora': gira['data_hora']},
+        'versao': gira['versao'],
+        **quadro.serializar(GiraFuncaoHistorico.objects.filter(gira_id=gira_id).for_board(), gira['linha']),
+    }
+
+
+def congelar(gira_id, usuario_id=None):
+    """Grava (ou regrava) o quadro congelado da gira. Retorna o dict gravado ou None."""
+    from .models import GiraSnapshot
+
+    with transaction.atomic():
+        dados = montar(gira_id)
+        if dados is None:
+            return None
+        GiraSnapshot.objects.update_or_create(
+            gira_id=gira_id,
+            defaults={'versao': dados['versao'], 'dados': dados, 'congelada_em': timezone.now(), 'reaberta_em': None},
+        )
+    if usuario_id:
+        auditoria.registrar(ACAO_CONGELAR, gira_id, usuario_id=usuario_id, info={'versao': dados['versao']})
+    return dados
+
+
+def reabrir(gira_id, usuario_id=None):
+    """Descarta o quadro congelado da gira (fica reaberta até congelar de novo)."""
+    from .models import GiraSnapshot
+
+    with transaction.atomic():
+        GiraSnapshot.objects.update_or_create(
+            gira_id=gira_id,
+            defaults={'versao': 0, 'dados': None, 'reaberta_em': timezone.now()},
+        )
+        # nova versão = nova URL ?v= no carrossel (o cache immutable antigo não vale mais)
+        versoes.registrar_mudanca(gira_id)
+    transaction.on_commit(lambda: quadro_cache.invalidar(gira_id))
+    auditoria.registrar(ACAO_REABRIR, gira_id, usuario_id=usuario_id)
+
+
+def obter(gira_id):
+    """Quadro congelado da gira (uma busca por chave primária), ou None."""
+    from .models import GiraSnapshot
+
+    return GiraSnapshot.objects.filter(gira_id=gira_id, dados__isnull=False).values_list('dados', flat=True).first()
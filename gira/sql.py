@@ -0,0 +1,40 @@
+from django.core.exceptions import EmptyResultSet
+from django.db.models.sql import UpdateQuery
+
+
+# -------------------------------------------------------------------
+# 🔹 UPDATE ... RETURNING (PostgreSQL; SQLite >= 3.35)
+# -------------------------------------------------------------------
+# O QuerySet.update() do Django 4.2 só devolve o número de linhas: quem
+# precisava do que foi gravado fazia um SELECT logo depois. Aqui o mesmo
+# UPDATE que o ORM montaria (filtros, joins, F()) sai com RETURNING e as
+# colunas voltam num objeto do model, já convertidas (raw()).
+#
+# Usa o compilador interno do ORM (UpdateQuery), que não é API estável:
+# o Django fica fixo na versão menor em requirements.txt e
+# gira/tests/test_sql.py roda no CI em SQLite e em PostgreSQL — rode-o
+# antes de subir a versão.
+
+
+def atualizar_retornando(qs, colunas, **valores):
+    """
+    qs.update(**valores) + RETURNING `colunas` (SQL; precisa incluir o id).
+    Retorna a primeira linha gravada como instância do model, ou None se o
+    UPDATE não pegou nenhuma. Só leia os campos pedidos em `colunas`.
+    """
+    return next(iter(atualizar_retornando_todas(qs, colunas, **valores)), None)
+
+
+def atualizar_retornando_todas(qs, colunas, **valores):
+    """Como atualizar_retornando(), mas devolve a lista de todas as linhas gravadas."""
+    query = qs.query.chain(UpdateQuery)
+    query.add_update_values(valores)
+    compilador = query.get_compiler(qs.db)
+    compilador.pre_sql_setup()
+    try:
+        sql, params = compilador.as_sql()
+    except EmptyResultSet:  # ex.: qs.none() ou id__in=[]; o update() também não vai ao banco
+        return []
+    if not sql:
+        return []
+    return list(qs.model.objects.using(qs.db).raw(f'{sql} RETURNING {colunas}', params))
@@ -0,0 +1,94 @@
+/*
+ * Busca de médium por nome (autocompletar) — admin/formulários e quadros.
+ * Liga-se a todo <input data-autocompletar-medium="<url>">: a cada
+ * digitação consulta /mediuns/autocompletar/?q= (índice em memória no
+ * servidor, gira/mediuns.py) e preenche um <datalist>. Ao escolher um nome:
+ *   - grava o id no <input type="hidden" data-medium-id> logo antes do campo
+ *     (widget MediumAutocompletar, gira/forms.py);
+ *   - com data-destacar, destaca no quadro os cards em que o médium aparece;
+ *   - dispara o evento "medium-escolhido" ({id, nome}) no campo.
+ */
+(function () {
+  const ESPERA_MS = 150;
+  let sequencia = 0;
+
+  function destacar(mediumId) {
+    let primeiro = null;
+    document.querySelectorAll('[data-funcao]').forEach((card) => {
+      const aparece = !!mediumId && (
+        card.dataset.pessoa === mediumId ||
+        card.dataset.mediumDeLinhaId === mediumId ||
+        !!card.querySelector(`[data-medium-id="${CSS.escape(mediumId)}"]`)
+      );
+      card.classList.toggle('medium-destacado', aparece);
+      if (aparece && !primeiro) primeiro = card;
+    });
+    if (primeiro) primeiro.scrollIntoView({ behavior: 'smooth', block: 'center' });
+  }
+
+  function ligar(campo, indice) {
+    const url = campo.dataset.autocompletarMedium;
+    const oculto = campo.previousElementSibling?.matches('input[type="hidden"][data-medium-id]')
+      ? campo.previousElementSibling : null;
+    const lista = document.createElement('datalist');
+    lista.id = `busca-medium-${indice}`;
+    campo.after(lista);
+    campo.setAttribute('list', lista.id);
+
+    let resultados = [];
+    let timer = null;
+
+    function escolher(medium) {
+      const id = medium ? String(medium.id) : '';
+      if (oculto) oculto.value = id;
+      if ('destacar' in campo.dataset) destacar(id);
+      campo.dispatchEvent(new CustomEvent('medium-escolhido', { detail: medium, bubbles: true }));
+    }
+
+    function conferir() {
+      const texto = campo.value.trim().toLowerCase();
+      const medium = resultados.find((m) => m.nome.toLowerCase() === texto);
+      if (medium) escolher(medium);
+      else if (!texto) escolher(null);
+    }
+
+    async function buscar() {
+      const texto = campo.value.trim();
+      if (!texto) {
+        resultados = [];
+        lista.replaceChildren();
+        escolher(null);
+        return;
+      }
+      const minha = ++sequencia;
+      try {
+        const resp = await fetch(`${url}?q=${encodeURIComponent(texto)}`, { credentials: 'same-origin' });
+        if (!resp.ok || minha !== sequencia) return;
+        resultados = (await resp.json()).resultados || [];
+      } catch (err) {
+        console.warn('[busca médium] falha na busca', err);
+        return;
+      }
+      lista.replaceChildren(...resultados.map((m) => {
+        const opcao = document.createElement('option');
+        opcao.value = m.nome;
+        return opcao;
+      }));
+      conferir();
+    }
+
+    campo.addEventListener('input', () => {
+      conferir();
+      clearTimeout(timer);
+      timer = setTimeout(buscar, ESPERA_MS);
+    });
+    campo.addEventListener('change', conferir);
+  }
+
+  function iniciar() {
+    document.querySelectorAll('input[data-autocompletar-medium]').forEach(ligar);
+  }
+
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', iniciar);
+  else iniciar();
+})();
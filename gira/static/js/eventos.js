@@ -0,0 +1,142 @@
+/**
+ * Eventos do quadro de funções (assumir / desistir de outros médiuns).
+ *
+ * GiraEventos.assinar(giraId, desde, aoReceber) abre um EventSource em
+ * /funcoes/eventos/<giraId>/ e, se o navegador não suportar SSE ou a
+ * conexão falhar várias vezes, cai para o long-poll em .../poll/.
+ * Cada evento chega uma única vez em aoReceber(evento), em ordem de seq:
+ *   {instancia, seq, origem, funcao_id, chave, status, pessoa_id, pessoa_nome}
+ * `desde` é o cursor "<instancia>:<seq>" que a página recebeu (eventos_desde).
+ *
+ * O seq só vale dentro de uma instância do broker (gira/eventos.py): depois
+ * de um deploy/restart ele recomeça de 0. Quando o servidor avisa
+ * 'recarregar' (ou chega evento de outra instância), o quadro é relido em
+ * /funcoes_dev/data/<giraId>/ e cada função passa por aoReceber como um
+ * evento {ressincronizado: true, ...} — o que mudou enquanto isso não se perde.
+ * Retorna um objeto com fechar().
+ */
+(function () {
+  const MAX_FALHAS_SSE = 3;
+
+  function lerCursor(valor) {
+    const texto = String(valor || '');
+    const i = texto.lastIndexOf(':');
+    return {
+      instancia: i < 0 ? null : texto.slice(0, i),
+      seq: parseInt(i < 0 ? texto : texto.slice(i + 1), 10) || 0,
+    };
+  }
+
+  function assinar(giraId, desde, aoReceber) {
+    let { instancia, seq: ultimo } = lerCursor(desde);
+    let fechado = false;
+    let fonte = null;
+    let falhas = 0;
+    const base = `/funcoes/eventos/${giraId}/`;
+
+    const cursor = () => (instancia ? `${instancia}:${ultimo}` : String(ultimo));
+
+    function aplicar(evento) {
+      try {
+        aoReceber(evento);
+      } catch (err) {
+        console.error('[GiraEventos] erro ao aplicar evento', evento, err);
+      }
+    }
+
+    async function ressincronizar() {
+      try {
+        const resp = await fetch(`/funcoes_dev/data/${giraId}/`, { credentials: 'same-origin', cache: 'no-cache' });
+        if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+        const dados = await resp.json();
+        const colunas = dados.colunas || [];
+        Object.values(dados.secoes || {}).flat().forEach(linha => {
+          const f = Object.fromEntries(colunas.map((c, i) => [c, linha[i]]));
+          if (fechado) return;
+          aplicar({
+            ressincronizado: true,
+            origem: 'historico',
+            funcao_id: f.id,
+            chave: f.chave,
+            status: f.vaga ? 'Vaga' : 'Preenchida',
+            pessoa_id: f.pessoa,
+            pessoa_nome: f.pessoa ? (dados.mediuns || {})[String(f.pessoa)] : null,
+          });
+        });
+      } catch (err) {
+        console.warn('[GiraEventos] falha ao reler o quadro', err);
+      }
+    }
+
+    function recarregar(novaInstancia, novoUltimo) {
+      console.info('[GiraEventos] servidor de eventos mudou, relendo o quadro', { de: instancia, para: novaInstancia });
+      instancia = novaInstancia;
+      ultimo = novoUltimo;
+      ressincronizar();
+    }
+
+    function entregar(evento) {
+      if (!evento) return;
+      if (evento.instancia && evento.instancia !== instancia) {
+        if (instancia) {
+          recarregar(evento.instancia, evento.seq);  // o quadro relido já inclui este
+          return;
+        }
+        instancia = evento.instancia;  // página sem cursor: adota a do servidor
+      }
+      if (evento.seq <= ultimo) return;  // repetido (reenvio)
+      ultimo = evento.seq;
+      aplicar(evento);
+    }
+
+    async function longPoll() {
+      while (!fechado) {
+        try {
+          const resp = await fetch(`${base}poll/?desde=${encodeURIComponent(cursor())}`, { credentials: 'same-origin' });
+          if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+          const dados = await resp.json();
+          if (dados.recarregar) recarregar(dados.instancia, dados.ultimo);
+          (dados.eventos || []).forEach(entregar);
+          if (dados.instancia === instancia && dados.ultimo > ultimo) ultimo = dados.ultimo;
+        } catch (err) {
+          console.debug('[GiraEventos] long-poll falhou, tentando de novo', err);
+          await new Promise(r => setTimeout(r, 5000));
+        }
+      }
+    }
+
+    function abrirSSE() {
+      fonte = new EventSource(`${base}?desde=${encodeURIComponent(cursor())}`);
+      fonte.addEventListener('funcao', e => {
+        falhas = 0;
+        entregar(JSON.parse(e.data));
+      });
+      fonte.addEventListener('recarregar', e => {
+        falhas = 0;
+        const dados = JSON.parse(e.data);
+        recarregar(dados.instancia, dados.ultimo);
+      });
+      fonte.onerror = () => {
+        falhas += 1;
+        if (falhas >= MAX_FALHAS_SSE && !fechado) {
+          console.info('[GiraEventos] SSE indisponível, usando long-poll');
+          fonte.close();
+          fonte = null;
+          longPoll();
+        }
+      };
+    }
+
+    if (window.EventSource) abrirSSE();
+    else longPoll();
+
+    return {
+      fechar() {
+        fechado = true;
+        if (fonte) fonte.close();
+      },
+    };
+  }
+
+  window.GiraEventos = { assinar };
+})();
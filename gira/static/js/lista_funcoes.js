@@ -0,0 +1,39 @@
+/**
+ * Quadro de funções (/funcoes/): assumir / desistir com renderização
+ * otimista e eventos em tempo real. Dados da página em #quadro-config;
+ * cards e cliques em quadro.js.
+ */
+document.addEventListener('DOMContentLoaded', () => {
+  const cfg = GiraQuadro.config();
+  const mediumId = cfg.mediumId || '';
+
+  console.debug("[INIT] medium_logado:", { id: mediumId, nome: cfg.mediumNome });
+
+  // Cards de gira_funcao: card-<id>, e o POST leva o id
+  const quadro = GiraQuadro.cards({
+    mediumId,
+    mediumNome: cfg.mediumNome || '',
+    urlAssumir: cfg.urlAssumir,
+    urlDesistir: cfg.urlDesistir,
+    corpo: card => ({ funcao_id: card.dataset.funcao }),
+  });
+
+  // 🔄 Atualiza o card quando outro médium assume/desiste (SSE / long-poll)
+  function aplicarEvento(ev) {
+    if (ev.origem !== 'historico') return;  // o quadro lê gira_funcao_historico
+    const card = document.getElementById(`card-${ev.funcao_id}`);
+    if (!card) return;
+    console.debug("[EVENTO]", ev);
+    quadro.aplicar(card, ev.pessoa_id, ev.pessoa_nome);
+  }
+
+  if (cfg.giraId) GiraEventos.assinar(cfg.giraId, cfg.eventosDesde || 0, aplicarEvento);
+
+  // Inicial: o quadro em cache é igual para todos; mostra “Desistir” nos
+  // cards do médium logado
+  if (mediumId) {
+    document.querySelectorAll(`[id^="card-"][data-pessoa="${CSS.escape(mediumId)}"]`).forEach(card => {
+      if (!card.querySelector('.btn-desistir')) quadro.renderOwned(card);
+    });
+  }
+});
@@ -0,0 +1,485 @@
+/*
+ * Quadro de funções em desenvolvimento (/funcoes_dev/): carrossel de giras,
+ * assumir / desistir em gira_funcao_historico e eventos em tempo real.
+ * Dados da página em #quadro-config e #giras-janela.
+ */
+document.addEventListener('DOMContentLoaded', () => {
+  const { showToast } = GiraQuadro;
+  const cfg = GiraQuadro.config();
+  const loadingOverlay = document.getElementById('loading-overlay');
+  const mainContent = document.getElementById('main-content');
+  const navbar = document.querySelector('.navbar');
+  const sep1 = document.getElementById('sep-1');
+  const sep2 = document.getElementById('sep-2');
+  const sep3 = document.getElementById('sep-3');
+  const titleCambones = document.getElementById('title-cambones');
+  const titleOrg = document.getElementById('title-organizacao');
+  const titleLimpeza = document.getElementById('title-limpeza');
+  const prevBtn = document.getElementById('prevGira');
+  const nextBtn = document.getElementById('nextGira');
+
+  // --- 1. VARIÁVEIS VINDAS DO DJANGO ---
+  const mediumId = cfg.mediumId || '';
+  const mediumNome = cfg.mediumNome || '';
+  // 'tem_permissao_base' (passada pela view) diz se o usuário PODE assumir,
+  // independentemente da data.
+  const userTemPermissaoBase = cfg.temPermissaoBase === 'true';
+  // ----------------------------------------
+
+  let spinnerTimer = null;
+
+  // util
+  // atualiza cor dos botões de acordo com tema (isExu boolean)
+  function aplicarCoresBotoes(isExu) {
+    const corAtiva = isExu ? '#b00000' : '#0072bb';
+    const corInativa = '#cccccc';
+    if (!prevBtn || !nextBtn) return;
+    prevBtn.style.color = prevBtn.disabled ? corInativa : corAtiva;
+    nextBtn.style.color = nextBtn.disabled ? corInativa : corAtiva;
+  }
+
+  // --- 2. CARDS: RENDERIZAÇÃO OTIMISTA E CLIQUES (quadro.js) ---
+  // Cards de gira_funcao_historico: card-<chave>, com o id em data-funcao-id.
+  // O POST vai para a gira exibida no carrossel (giraAtual), não a da carga.
+  let giraAtual = cfg.giraId || '';
+
+  const quadro = GiraQuadro.cards({
+    mediumId,
+    mediumNome,
+    urlAssumir: cfg.urlAssumir,
+    urlDesistir: cfg.urlDesistir,
+    corpo: card => ({ funcao_id: card.dataset.funcaoId, funcao_chave: card.dataset.funcao, gira_id: giraAtual }),
+    podeAssumir: () => userTemPermissaoBase,
+  });
+  // ------------------------------------------------------------
+
+  // --- 3. FUNÇÃO PRINCIPAL DE CRIAR CARDS ---
+function criarCard(f, blocoName, isExu, isGiraFuturaOuHoje) {
+    // ... (restante da lógica de variáveis, titulo, pessoaId, etc.)
+
+    const chave = f.chave ?? f.key ?? f.id ?? `id${Math.random().toString(36).slice(2,8)}`;
+    const funcaoId = f.id ?? f.funcao_id ?? f.pk ?? chave;
+    const status = (f.status || f.st || '').toString();
+    const descricao = f.descricao || f.tipo || f.nome || '';
+    const pessoaId = (f.pessoa && f.pessoa.id) ? f.pessoa.id : (f.pessoa_id ?? f.pessoa ?? '');
+    const pessoaNome = (f.pessoa && f.pessoa.nome) ? f.pessoa.nome
+        : (f.pessoa__nome ?? f.pessoa_nome ?? f.pessoa_nome_display ?? '');
+    let mediumLinhaNome = '';
+    let mediumLinhaId = '';
+    // ... (lógica para mediumLinhaNome e mediumLinhaId)
+    if (!mediumLinhaNome) mediumLinhaNome = f.medium_de_linha_nome ?? f.medium_de_linha__nome ?? f.medium_de_linhaName ?? '';
+    if (!mediumLinhaId) mediumLinhaId = f.medium_de_linha_id ?? f.medium_de_linha__id ?? '';
+    
+    const div = document.createElement('div');
+    div.id = `card-${chave}`;
+    div.dataset.funcao = chave;
+    div.dataset.funcaoId = funcaoId;
+    if (pessoaId) div.dataset.pessoa = pessoaId;
+    // CORREÇÃO 1: Adicionando as classes de coluna e responsividade
+    if (blocoName === 'cambones') {
+        // Para Cambones, é necessário incluir as classes 'data-medium-de-linha-id' e 'nome-medium-de-linha'
+        div.dataset.mediumDeLinhaId = mediumLinhaId;
+    }
+
+    // CORREÇÃO 2: Aplicando TODAS as classes de layout Bootstrap no elemento <div> principal
+    div.className = 'col-6 col-md-4 col-lg-3'; 
+
+    const isVaga = f.vaga ?? ((status + '').toLowerCase().includes('vaga') || (status + '').toLowerCase().includes('open') || (status === ''));
+    const podeMudarFuncao = userTemPermissaoBase && isGiraFuturaOuHoje;
+
+    let titulo = '—';
+    // ... (lógica de definição de título)
+    if (blocoName === 'cambones') {
+      if (mediumLinhaNome && mediumLinhaNome.trim() !== '') titulo = `<span class="nome-medium-de-linha" data-medium-id="${mediumLinhaId}">${mediumLinhaNome}</span>`;
+      else if (descricao && descricao.trim() !== '') titulo = descricao;
+      else titulo = '—';
+    } else if (blocoName === 'limpeza') {
+      titulo = 'Limpeza';
+    } else {
+      titulo = descricao || '—';
+    }
+
+
+    let metaContent = '';
+
+    // ... (lógica de definição de metaContent - Assumir/Desistir/Nome)
+
+    if (blocoName === 'cambones') {
+      // REGRA 1: Cambone (só nome ou traço)
+      const nomeParaExibir = pessoaNome || '—';
+      metaContent = `<span class="nome-pessoa" data-pessoa-id="${pessoaId}">${nomeParaExibir}</span>`;
+    
+    } else {
+      // REGRA 2: Organização e Limpeza
+      if (isVaga) {
+        if (podeMudarFuncao) {
+          metaContent = GiraQuadro.botaoAssumir();
+        } else {
+          metaContent = `<span>—</span>`;
+        }
+      } else {
+        // Se a função está OCUPADA (não vaga)
+        metaContent = `<span class="nome-medium" data-medium-id="${pessoaId}">${pessoaNome || '—'}</span>`;
+        
+        if (podeMudarFuncao && pessoaId.toString() === mediumId) {
+          metaContent += GiraQuadro.botaoDesistir();
+        }
+      }
+    }
+
+
+    // CORREÇÃO 3: Estrutura HTML COMPLETA do card, incluindo classes de layout e sombra.
+    div.innerHTML = `
+      <div class="card card-funcao border-0 shadow-sm h-100 position-relative">
+        ${isVaga && blocoName !== 'cambones' ? `<span class="badge bg-danger position-absolute" style="right:10px; top:10px; font-size:0.7rem;">Vago</span>` : ''}
+        <div class="card-body p-3 text-start">
+          <div class="fw-semibold text-dark" style="font-size:0.95rem;">
+            ${titulo}
+          </div>
+          <div class="text-muted" style="font-size:0.85rem;">
+            ${metaContent}
+          </div>
+        </div>
+      </div>`;
+    return div;
+}
+// ------------------------------------------
+  // ------------------------------------------
+
+  // --- 4. ATUALIZADOR DE CONTAINER (com fade) ---
+  function atualizarContainer(container, items, blocoName, isExu, isGiraFuturaOuHoje) {
+    if (!container) return;
+    console.debug('[atualizarContainer] bloco:', blocoName, 'items.length=', items?.length, 'podeMudar=', isGiraFuturaOuHoje);
+    container.classList.add('fade-block-out');
+    setTimeout(() => {
+      container.innerHTML = '';
+      (items || []).forEach(f => container.appendChild(criarCard(f, blocoName, isExu, isGiraFuturaOuHoje)));
+      container.classList.remove('fade-block-out');
+      container.classList.add('fade-block-in');
+      setTimeout(() => container.classList.remove('fade-block-in'), 250);
+    }, 120);
+  }
+  // ------------------------------------------
+
+  // --- 5. CARREGADOR DE DADOS DA GIRA (AJAX) ---
+  // --- 5a. BUSCA DA GIRA COM DELTA (?since=versao) ---
+  // O servidor manda o quadro compacto (gira/quadro.py): seções já
+  // agrupadas e ordenadas, cada função como lista na ordem de 'colunas'
+  // e o nome de cada médium uma vez só, em 'mediuns'.
+  // Guarda a última resposta de cada gira; ao voltar nela pede só o que
+  // mudou desde a versão guardada. Se surgirem funções novas ou removidas,
+  // busca o quadro inteiro de novo (para manter a ordem do servidor).
+  const cacheGiras = {};
+
+  function expandirQuadro(dados) {
+    const colunas = dados.colunas || [];
+    const mediuns = dados.mediuns || {};
+    const grupos = {};
+    Object.entries(dados.secoes || {}).forEach(([grupo, linhas]) => {
+      grupos[grupo] = linhas.map(linha => {
+        const f = Object.fromEntries(colunas.map((c, i) => [c, linha[i]]));
+        return {
+          id: f.id,
+          chave: f.chave,
+          descricao: f.descricao,
+          vaga: !!f.vaga,
+          pessoa_id: f.pessoa ?? '',
+          pessoa_nome: f.pessoa ? (mediuns[f.pessoa] ?? '') : '',
+          medium_de_linha_id: f.linha ?? '',
+          medium_de_linha_nome: f.linha ? (mediuns[f.linha] ?? '') : '',
+        };
+      });
+    });
+    return grupos;
+  }
+
+  async function buscarGira(id) {
+    const base = `/funcoes_dev/data/${id}/`;
+    const anterior = cacheGiras[id];
+    let dados = null;
+
+    if (anterior) {
+      const resp = await fetch(`${base}?since=${anterior.versao}`);
+      const delta = await resp.json();
+      const alteradas = Object.values(expandirQuadro(delta)).flat();
+      const novas = alteradas.some(f => !(f.id in anterior.porId));
+      if (!novas && !(delta.removidas || []).length) {
+        alteradas.forEach(f => { anterior.porId[f.id] = f; });
+        anterior.versao = delta.versao;
+        dados = { ...delta, delta: false };
+      }
+    }
+    if (!dados) {
+      // ?v= da janela de giras: gira congelada (gira/snapshots.py) vem do cache do navegador
+      const versao = giras.find(g => g.id === Number(id))?.versao;
+      const resp = await fetch(versao != null ? `${base}?v=${versao}` : base);
+      dados = await resp.json();
+      const grupos = expandirQuadro(dados);
+      cacheGiras[id] = {
+        versao: dados.versao,
+        ids: Object.fromEntries(Object.entries(grupos).map(([g, fs]) => [g, fs.map(f => f.id)])),
+        porId: Object.fromEntries(Object.values(grupos).flat().map(f => [f.id, f])),
+      };
+    }
+
+    const atual = cacheGiras[id];
+    dados.grupos = Object.fromEntries(
+      Object.entries(atual.ids).map(([g, ids]) => [g, ids.map(fid => atual.porId[fid])])
+    );
+    return dados;
+  }
+
+  window.carregarGira = async function (giraId, apenasTema=false) {
+    console.info('[carregarGira] start', { giraId, apenasTema });
+    if (!apenasTema) giraAtual = giraId;
+    try {
+      mainContent.classList.add('fade-out');
+      spinnerTimer = setTimeout(() => document.body.classList.add('loading'), 200);
+
+      const dados = await buscarGira(giraId);
+      console.debug('[carregarGira] dados recebidos do endpoint:', dados);
+      if (!apenasTema) window.assinarGira?.(giraId, dados.eventos_desde);
+
+      // *** CÁLCULO DA DATA DA GIRA (CLIENT-SIDE) ***
+      const giraDataHora = dados.gira?.data_hora;
+      let isGiraFuturaOuHoje = true;
+      
+      if (giraDataHora) {
+          const giraDate = new Date(giraDataHora);
+          const today = new Date();
+          giraDate.setHours(0, 0, 0, 0);
+          today.setHours(0, 0, 0, 0); 
+          isGiraFuturaOuHoje = giraDate >= today;
+          console.debug('[carregarGira] Checagem de data:', { gira: giraDate, hoje: today, podeMudar: isGiraFuturaOuHoje });
+      }
+      // ********************************************
+
+      // Atualiza data e linha (Header)
+      const dataEl = document.querySelector('#gira-data');
+      const linhaEl = document.querySelector('#gira-linha');
+      if (dataEl && dados.gira && dados.gira.data_hora) {
+        dataEl.innerText = new Date(dados.gira.data_hora)
+          .toLocaleString('pt-BR', { dateStyle: 'short', timeStyle: 'short' });
+      }
+      if (linhaEl && dados.gira && dados.gira.linha) {
+        linhaEl.innerText = dados.gira.linha;
+      }
+
+      // Atualiza Tema/Cores
+      const novaLinha = dados.gira?.linha ?? (document.querySelector('#gira-linha')?.innerText || '');
+      const isExu = dados.tema ? dados.tema === 'exu' : /exu/i.test(novaLinha || '');
+      document.body.classList.toggle('tema-exu', isExu);
+      document.body.classList.toggle('tema-padrao', !isExu);
+      if (navbar) {
+        navbar.style.background = isExu
+          ? 'linear-gradient(to right, #000000, #4d0000, #990000)'
+          : 'linear-gradient(to right, #002147, #6e9cb9, #A4D2E8)';
+      }
+      const corAtiva = isExu ? '#b00000' : '#0072bb';
+      const corSec = isExu ? '#660000' : '#cccccc';
+      if (dataEl) dataEl.style.color = isExu ? '#ff4d4d' : '#0072bb';
+      if (linhaEl) linhaEl.style.color = isExu ? '#c00000' : '#222222';
+      if (sep1) sep1.style.borderColor = corSec;
+      if (sep2) sep2.style.borderColor = corSec;
+      if (sep3) sep3.style.borderColor = corSec;
+      if (titleCambones) titleCambones.style.color = corAtiva;
+      if (titleOrg) titleOrg.style.color = corAtiva;
+      if (titleLimpeza) titleLimpeza.style.color = corAtiva;
+      aplicarCoresBotoes(isExu);
+
+      if (apenasTema) {
+        console.info('[carregarGira] apenasTema true — finalizando sem atualizar cards');
+        return;
+      }
+
+      const cambonesContainer = document.querySelector('#cambones-container');
+      const orgContainer = document.querySelector('#organizacao-container');
+      const limpezaContainer = document.querySelector('#limpeza-container');
+
+      // Seções já agrupadas e ordenadas no servidor (gira/quadro.py)
+      const grouped = dados.grupos;
+      if (!grouped) {
+        console.warn('[carregarGira] formato inesperado — limpando containers', dados);
+        if (cambonesContainer) cambonesContainer.innerHTML = '';
+        if (orgContainer) orgContainer.innerHTML = '';
+        if (limpezaContainer) limpezaContainer.innerHTML = '';
+        return;
+      }
+      grouped.cambones = grouped.cambones || [];
+      grouped.organizacao = grouped.organizacao || [];
+      grouped.limpeza = grouped.limpeza || [];
+
+      console.debug('[carregarGira] agrupamento concluído', {
+        cambones: grouped.cambones.length,
+        organizacao: grouped.organizacao.length,
+        limpeza: grouped.limpeza.length
+      });
+
+      // Atualiza containers, passando as flags 'isExu' e 'isGiraFuturaOuHoje'
+      atualizarContainer(cambonesContainer, grouped.cambones, 'cambones', isExu, isGiraFuturaOuHoje);
+      atualizarContainer(orgContainer, grouped.organizacao, 'organizacao', isExu, isGiraFuturaOuHoje);
+      atualizarContainer(limpezaContainer, grouped.limpeza, 'limpeza', isExu, isGiraFuturaOuHoje);
+
+      console.info('[carregarGira] cards atualizados para gira', giraId);
+
+    } catch (err) {
+      console.error('[carregarGira] erro:', err);
+      showToast('Erro ao carregar gira', '#dc3545');
+    } finally {
+      clearTimeout(spinnerTimer);
+      document.body.classList.remove('loading');
+      requestAnimationFrame(() => {
+        mainContent.classList.remove('fade-out');
+        mainContent.classList.add('fade-in');
+        setTimeout(() => mainContent.classList.remove('fade-in'), 260);
+      });
+      console.info('[carregarGira] fim (finally)');
+    }
+  };
+
+  // =========================
+  // --- 6. EVENTOS EM TEMPO REAL (SSE / long-poll) ---
+  // =========================
+  let assinatura = null;
+
+  function aplicarEvento(ev) {
+    if (ev.origem !== 'historico') return;
+    const card = document.getElementById(`card-${ev.chave}`);
+    if (!card) return;
+    console.debug('[evento]', ev);
+
+    // Cambones: só o nome de quem está na função
+    const spanPessoa = card.querySelector('.nome-pessoa');
+    if (spanPessoa) {
+      const pessoaId = ev.pessoa_id ? ev.pessoa_id.toString() : '';
+      spanPessoa.textContent = ev.pessoa_nome || '—';
+      spanPessoa.dataset.pessoaId = pessoaId;
+      card.dataset.pessoa = pessoaId;
+      return;
+    }
+    quadro.aplicar(card, ev.pessoa_id, ev.pessoa_nome);
+  }
+
+  function assinarGira(id, desde) {
+    if (assinatura) assinatura.fechar();
+    assinatura = id ? GiraEventos.assinar(id, desde, aplicarEvento) : null;
+  }
+  window.assinarGira = assinarGira;
+
+  assinarGira(cfg.giraId || '', cfg.eventosDesde || 0);
+
+  // =========================
+  // --- 7. CARROSSEL DE GIRAS (Navegação) ---
+  // =========================
+  // Só uma janela de giras vem na página; as vizinhas são buscadas em
+  // /funcoes_dev/giras/ (cursor antes/depois) conforme a navegação.
+  const janela = JSON.parse(document.getElementById('giras-janela').textContent);
+  let giras = janela.giras;
+  let cursorAntes = janela.antes;
+  let cursorDepois = janela.depois;
+  const buscasVizinhas = {};
+  let index = giras.findIndex(g => g.id === parseInt(cfg.giraId));
+
+  function atualizarBotoes() {
+    if (!prevBtn || !nextBtn) return;
+    prevBtn.disabled = (index <= 0 && !cursorAntes);
+    nextBtn.disabled = (index >= giras.length - 1 && !cursorDepois);
+
+    const linhaText = document.querySelector('#gira-linha')?.innerText ?? '';
+    const isExuNow = /exu/i.test(linhaText || '');
+    aplicarCoresBotoes(isExuNow);
+  }
+
+  function carregarVizinhas(direcao) {
+    const lado = direcao < 0 ? 'antes' : 'depois';
+    const cursor = direcao < 0 ? cursorAntes : cursorDepois;
+    if (!cursor) return Promise.resolve();
+    if (!buscasVizinhas[lado]) {
+      const param = direcao < 0 ? 'before' : 'after';
+      buscasVizinhas[lado] = fetch(`/funcoes_dev/giras/?${param}=${encodeURIComponent(cursor)}`)
+        .then(r => r.json())
+        .then(pag => {
+          if (direcao < 0) {
+            giras = pag.giras.concat(giras);
+            index += pag.giras.length;
+            cursorAntes = pag.antes;
+          } else {
+            giras = giras.concat(pag.giras);
+            cursorDepois = pag.depois;
+          }
+        })
+        .catch(err => console.error('[carrossel] erro ao buscar giras vizinhas', err))
+        .finally(() => {
+          buscasVizinhas[lado] = null;
+          atualizarBotoes();
+        });
+    }
+    return buscasVizinhas[lado];
+  }
+
+  // Busca a próxima página antes de o usuário chegar na ponta
+  function prefetchVizinhas() {
+    if (index <= 1) carregarVizinhas(-1);
+    if (index >= giras.length - 2) carregarVizinhas(1);
+  }
+
+  async function navegar(offset) {
+    if (index + offset < 0) await carregarVizinhas(-1);
+    if (index + offset >= giras.length) await carregarVizinhas(1);
+    const novo = index + offset;
+    if (novo >= 0 && novo < giras.length) {
+      index = novo;
+      const proxima = giras[index];
+
+      // Atualiza Header
+      const dataEl = document.querySelector('#gira-data');
+      const linhaEl = document.querySelector('#gira-linha');
+      if (dataEl && proxima.data_hora) {
+        dataEl.innerText = new Date(proxima.data_hora).toLocaleString('pt-BR', { dateStyle:'short', timeStyle:'short' });
+      }
+      if (linhaEl && proxima.linha) linhaEl.innerText = proxima.linha;
+
+      // Atualiza Cores
+      const isExu = /exu/i.test(proxima.linha || '');
+      if (navbar) navbar.style.background = isExu
+        ? 'linear-gradient(to right, #000000, #4d0000, #990000)'
+        : 'linear-gradient(to right, #002147, #6e9cb9, #A4D2E8)';
+      const corAtiva = isExu ? '#b00000' : '#0072bb';
+      const corSec = isExu ? '#660000' : '#cccccc';
+      if (dataEl) dataEl.style.color = isExu ? '#ff4d4d' : '#0072bb';
+      if (linhaEl) linhaEl.style.color = isExu ? '#c00000' : '#222222';
+      if (sep1) sep1.style.borderColor = corSec;
+      if (sep2) sep2.style.borderColor = corSec;
+      if (sep3) sep3.style.borderColor = corSec;
+      if (titleCambones) titleCambones.style.color = corAtiva;
+      if (titleOrg) titleOrg.style.color = corAtiva;
+      if (titleLimpeza) titleLimpeza.style.color = corAtiva;
+      aplicarCoresBotoes(isExu);
+      atualizarBotoes();
+
+      // Carrega os cards (o JS vai calcular a data)
+      window.carregarGira(proxima.id);
+      prefetchVizinhas();
+    }
+  }
+
+  if (prevBtn && nextBtn) {
+    prevBtn.addEventListener('click', () => navegar(-1));
+    nextBtn.addEventListener('click', () => navegar(1));
+  }
+
+  // Swipe mobile
+  let touchStartX = 0;
+  document.addEventListener('touchstart', e => touchStartX = e.changedTouches[0].screenX);
+  document.addEventListener('touchend', e => {
+    const touchEndX = e.changedTouches[0].screenX;
+    if (Math.abs(touchEndX - touchStartX) > 60) {
+      navegar(touchEndX - touchStartX > 0 ? -1 : 1);
+    }
+  });
+
+  // inicializa botoes com o tema atual
+  atualizarBotoes();
+  prefetchVizinhas();
+  console.info('[script dev] inicializado');
+});
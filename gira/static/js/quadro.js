@@ -0,0 +1,159 @@
+/*
+ * Utilitários comuns às páginas do quadro (/funcoes/ e /funcoes_dev/).
+ * Os dados que vinham do template (ids, nomes, URLs) ficam nos data-*
+ * de #quadro-config, para o script ser estático (cache longo + hash).
+ */
+(function () {
+  function csrftoken() {
+    return document.cookie.match('(^|;)\\s*csrftoken\\s*=\\s*([^;]+)')?.pop() || '';
+  }
+
+  function showToast(msg, color = '#198754') {
+    const toast = document.getElementById('toast-funcao');
+    if (!toast) return;
+    toast.textContent = msg;
+    toast.style.backgroundColor = color;
+    toast.classList.add('show');
+    setTimeout(() => toast.classList.remove('show'), 1800);
+  }
+
+  function escapeHtml(s) {
+    const div = document.createElement('div');
+    div.textContent = s ?? '';
+    return div.innerHTML;
+  }
+
+  function config() {
+    const el = document.getElementById('quadro-config');
+    return el ? { ...el.dataset } : {};
+  }
+
+  // -----------------------------------------------------------------
+  // Cards de função: renderização otimista + assumir / desistir
+  // -----------------------------------------------------------------
+  // As duas páginas usam os mesmos cards: <div id="card-..."
+  // data-funcao data-pessoa> com a linha do médium em .text-muted. O que
+  // muda é o corpo do POST (ids de gira_funcao ou chave + gira em
+  // gira_funcao_historico), passado em `corpo(card)`. Um só listener de
+  // clique por página, ligado em cards().
+  function botaoAssumir() {
+    return '<button class="btn btn-sm btn-success btn-assumir" style="font-size:0.8rem;">Assumir</button>';
+  }
+
+  function botaoDesistir() {
+    return `<button class="btn btn-link text-danger btn-desistir p-0 ms-1"
+              title="Desistir"
+              style="font-size:0.9rem; line-height:1;">
+        <i class="bi bi-x-circle"></i>
+      </button>`;
+  }
+
+  function setBadgeVago(card, vago) {
+    const inner = card.querySelector('.card');
+    if (!inner || inner.querySelector('.fw-semibold .nome-medium')) return;  // cambones não têm selo
+    const badge = inner.querySelector('.badge.bg-danger');
+    if (vago && !badge) {
+      const novo = document.createElement('span');
+      novo.className = 'badge bg-danger position-absolute';
+      novo.style.cssText = 'right:10px; top:10px; font-size:0.7rem;';
+      novo.textContent = 'Vago';
+      inner.prepend(novo);
+    } else if (!vago && badge) {
+      badge.remove();
+    }
+  }
+
+  function cards({ mediumId = '', mediumNome = '', urlAssumir, urlDesistir, corpo, podeAssumir = () => true }) {
+    mediumId = mediumId.toString();
+
+    function meta(card) {
+      return card.querySelector('.text-muted');
+    }
+
+    function renderOwned(card) {
+      const el = meta(card);
+      if (!el) return;
+      el.innerHTML = `
+        <div class="d-flex align-items-center justify-content-start">
+          <span class="nome-medium me-1" data-medium-id="${mediumId}" style="font-weight:500;">${escapeHtml(mediumNome)}</span>
+          ${botaoDesistir()}
+        </div>`;
+      card.dataset.pessoa = mediumId;
+      setBadgeVago(card, false);
+    }
+
+    function renderVacant(card) {
+      const el = meta(card);
+      if (!el) return;
+      el.innerHTML = podeAssumir(card) ? botaoAssumir() : '<span>—</span>';
+      card.dataset.pessoa = '';
+      setBadgeVago(card, true);
+    }
+
+    // Card assumido por OUTRO médium (vindo dos eventos em tempo real)
+    function renderTaken(card, pessoaId, pessoaNome) {
+      const el = meta(card);
+      if (!el) return;
+      el.innerHTML = `<span class="nome-medium" data-medium-id="${pessoaId}">${escapeHtml(pessoaNome || '—')}</span>`;
+      card.dataset.pessoa = pessoaId;
+      setBadgeVago(card, false);
+    }
+
+    // 🔄 Estado vindo do servidor (SSE / long-poll / ressincronização)
+    function aplicar(card, pessoaId, pessoaNome) {
+      pessoaId = pessoaId ? pessoaId.toString() : '';
+      if ((card.dataset.pessoa || '') === pessoaId) return;  // já está assim (ex.: clique deste usuário)
+      if (!pessoaId) renderVacant(card);
+      else if (mediumId && pessoaId === mediumId) renderOwned(card);
+      else renderTaken(card, pessoaId, pessoaNome);
+    }
+
+    function enviar(url, card, otimista, reverter, textos) {
+      otimista(card);
+      showToast(textos.enviando, textos.corEnviando);
+      fetch(url, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': csrftoken(), 'Content-Type': 'application/x-www-form-urlencoded' },
+        body: new URLSearchParams(corpo(card)),
+      })
+        .then(r => r.json())
+        .then(d => {
+          console.debug('[quadro] resposta', d);
+          if (d.status !== 'ok') {
+            reverter(card);
+            showToast(d.mensagem || textos.erro, '#dc3545');
+          } else {
+            showToast(d.mensagem || textos.ok, textos.corOk);
+          }
+        })
+        .catch(err => {
+          console.debug('[quadro] erro de rede', err);
+          reverter(card);
+          showToast(textos.erroRede, '#dc3545');
+        });
+    }
+
+    document.addEventListener('click', e => {
+      const btn = e.target.closest('.btn-assumir, .btn-desistir');
+      const card = btn?.closest('[id^="card-"]');
+      if (!card) return;
+      if (btn.classList.contains('btn-assumir')) {
+        enviar(urlAssumir, card, renderOwned, renderVacant, {
+          enviando: 'Assumindo função...', corEnviando: '#0d6efd',
+          ok: 'Função assumida', corOk: '#198754',
+          erro: 'Erro ao assumir', erroRede: 'Erro de rede ao assumir',
+        });
+      } else {
+        enviar(urlDesistir, card, renderVacant, renderOwned, {
+          enviando: 'Desistindo da função...', corEnviando: '#ffc107',
+          ok: 'Função liberada', corOk: '#0dcaf0',
+          erro: 'Erro ao desistir', erroRede: 'Erro de rede ao desistir',
+        });
+      }
+    });
+
+    return { renderOwned, renderVacant, renderTaken, aplicar };
+  }
+
+  window.GiraQuadro = { csrftoken, showToast, escapeHtml, config, botaoAssumir, botaoDesistir, cards };
+})();
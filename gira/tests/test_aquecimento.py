@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from gira import aquecimento
+from gira.models import User
+
+
+@override_settings(DEBUG=False)
+class ProntoTest(TestCase):
+    """/pronto/ sem login só diz se o worker está pronto (gira/views.py: pronto)."""
+
+    ESTADO = {
+        'pronto': False, 'etapas': {'banco': 1.0}, 'erros': {'banco': 'OperationalError: senha inválida'},
+        'aquecimento_ms': 1.0, 'processo_ms': 10, 'tentativas': 1, 'pid': 123,
+    }
+
+    def setUp(self):
+        mock.patch.object(aquecimento, 'aquecer', return_value=self.ESTADO).start()
+        mock.patch.object(aquecimento, 'estado', return_value=self.ESTADO).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_anonimo_nao_ve_detalhes(self):
+        resposta = self.client.get('/pronto/')
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.json(), {'pronto': False})
+
+    def test_staff_ve_detalhes(self):
+        user = User.objects.create(username='ana', celular='11999', nome='Ana', is_staff=True)
+        self.client.post('/', {'celular': user.celular})
+        resposta = self.client.get('/pronto/')
+        self.assertEqual(resposta.status_code, 503)
+        self.assertIn('erros', resposta.json())
@@ -0,0 +1,185 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gira import identidade
+from gira.models import Gira, GiraFuncaoHistorico, Medium, User
+
+
+# -------------------------------------------------------------------
+# 🔹 Número de consultas das views quentes (regressão)
+# -------------------------------------------------------------------
+# Conta os comandos SQL de cada requisição do quadro e do assumir/desistir.
+# Dentro do TestCase a transação da view não abre BEGIN/COMMIT próprios
+# (em produção são mais dois comandos no assumir/desistir). Os efeitos de
+# depois do commit (cache, eventos, auditoria) rodam fora da contagem.
+# Se um número subir, é regressão: ache a consulta nova antes de mudar
+# o número aqui.
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    GIRA_AUDITORIA_SINCRONA=True,
+)
+class ConsultasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ana', celular='11999', nome='Ana', is_superuser=True)
+        cls.medium = Medium.objects.create(nome='Ana M', user=cls.user)
+        mae_bruna = Medium.objects.create(nome='Mãe Bruna')
+        cls.gira = Gira.objects.create(titulo='Gira', data_hora=timezone.now() + timedelta(days=2), linha='Exu')
+        funcoes = [
+            ('Cambone', 'Cambone', mae_bruna),
+            ('Organização', 'Portão', None),
+            ('Organização', 'Lojinha', None),
+            ('Limpeza', 'Limpeza banheiro', None),
+        ]
+        for i, (tipo, descricao, medium_de_linha) in enumerate(funcoes):
+            GiraFuncaoHistorico.objects.create(
+                gira=cls.gira, chave=f'k{i}', tipo=tipo, descricao=descricao, posicao=str(i),
+                status='Vaga', medium_de_linha=medium_de_linha,
+            )
+        cls.portao = GiraFuncaoHistorico.objects.get(gira=cls.gira, chave='k1')
+
+    def setUp(self):
+        cache.clear()
+        identidade.limpar()
+        self.client.post('/', {'celular': self.user.celular})
+        identidade.resolver(self.user.id)  # usuário da sessão já no cache do processo
+        self.url_dados = f'/funcoes_dev/data/{self.gira.id}/'
+
+    # --- quadro
+    def test_lista_funcoes(self):
+        # frio: gira atual, a gira, snapshot (não tem) e as funções
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get('/funcoes/').status_code, 200)
+        # quente: tudo do cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/funcoes/').status_code, 200)
+
+    def test_get_gira_data(self):
+        # versão (com o flag de congelada) + funções
+        with self.assertNumQueries(2):
+            resposta = self.client.get(self.url_dados)
+        self.assertEqual(resposta.status_code, 200)
+        # quadro em cache: só a leitura da versão
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url_dados).status_code, 200)
+
+    def test_get_gira_data_304(self):
+        etag = self.client.get(self.url_dados)['ETag']
+        with self.assertNumQueries(1):
+            resposta = self.client.get(self.url_dados, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_get_gira_data_since(self):
+        versao = self.client.get(self.url_dados).json()['versao']
+        # em dia: nenhuma função nem remoção a buscar
+        with self.assertNumQueries(1):
+            resposta = self.client.get(f'{self.url_dados}?since={versao}')
+        self.assertEqual(resposta.json()['secoes'], {'cambones': [], 'organizacao': [], 'limpeza': []})
+        # atrasado: versão + funções alteradas + removidas
+        with self.assertNumQueries(3):
+            self.client.get(f'{self.url_dados}?since={versao - 1}')
+
+    # --- assumir / desistir
+    def test_assumir_e_desistir(self):
+        self.client.get('/funcoes/')  # aquece a gira atual
+        with self.captureOnCommitCallbacks(execute=True):
+            # versão da gira + UPDATE da função (RETURNING) + resumo de participação
+            with self.assertNumQueries(3):
+                resposta = self.client.post('/assumir-funcao/', {'funcao_id': self.portao.id})
+        self.assertEqual(resposta.json()['status'], 'ok')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(3):
+                resposta = self.client.post('/desistir-funcao/', {'funcao_id': self.portao.id})
+        self.assertEqual(resposta.json()['status'], 'ok')
+
+    def test_assumir_ocupada(self):
+        self.client.get('/funcoes/')
+        self.portao.pessoa = Medium.objects.create(nome='Bia M')
+        self.portao.save()
+        # o UPDATE condicional não pega nada: só o estado atual é lido
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):
+                resposta = self.client.post('/assumir-funcao/', {'funcao_id': self.portao.id})
+        self.assertEqual(resposta.status_code, 409)
+
+    # --- admin / scripts
+    def test_salvar_medium(self):
+        self.portao.pessoa = self.medium
+        self.portao.save()
+        versao = Gira.objects.get(pk=self.gira.pk).versao
+        # sem troca de nome: o nome anterior + o UPDATE; nada nas giras
+        with self.assertNumQueries(2):
+            self.medium.habilitado = not self.medium.habilitado
+            self.medium.save()
+        self.assertEqual(Gira.objects.get(pk=self.gira.pk).versao, versao)
+        # renomeado: a gira em que ele aparece ganha versão nova
+        self.medium.nome = 'Ana Maria'
+        self.medium.save()
+        self.assertEqual(Gira.objects.get(pk=self.gira.pk).versao, versao + 1)
+        self.assertEqual(GiraFuncaoHistorico.objects.get(pk=self.portao.pk).versao, versao + 1)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ConsultasPorTamanhoTest(TestCase):
+    """O número de consultas não cresce com o número de funções da gira (for_board)."""
+
+    PEQUENA, GRANDE = 4, 120
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='ana', celular='11999', nome='Ana', is_superuser=True, is_staff=True,
+        )
+        mediuns = [Medium.objects.create(nome=f'Médium {i}') for i in range(10)]
+        tipos = ('Cambone', 'Organização', 'Limpeza')
+        cls.giras = []
+        for n, dias in ((cls.PEQUENA, 2), (cls.GRANDE, 3)):
+            gira = Gira.objects.create(titulo='Gira', data_hora=timezone.now() + timedelta(days=dias), linha='Exu')
+            GiraFuncaoHistorico.objects.bulk_create([
+                GiraFuncaoHistorico(
+                    gira=gira, chave=f'k{i}', tipo=tipos[i % 3], descricao=f'Função {i}', posicao=str(i),
+                    status='Preenchida' if i % 2 else 'Vaga',
+                    pessoa=mediuns[i % 10] if i % 2 else None,
+                    medium_de_linha=mediuns[(i + 1) % 10] if tipos[i % 3] == 'Cambone' else None,
+                )
+                for i in range(n)
+            ])
+            cls.giras.append(gira)
+
+    def setUp(self):
+        cache.clear()
+        identidade.limpar()
+        self.client.post('/', {'celular': self.user.celular})
+        self.client.force_login(self.user)  # admin
+        identidade.resolver(self.user.id)
+
+    def contar(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(consultas)
+
+    def assertMesmasConsultas(self, url):
+        pequena, grande = (self.contar(url.format(gira=gira.id)) for gira in self.giras)
+        self.assertEqual(pequena, grande, f'{url}: {pequena} consultas com {self.PEQUENA} funções, {grande} com {self.GRANDE}')
+
+    def test_get_gira_data(self):
+        self.assertMesmasConsultas('/funcoes_dev/data/{gira}/')
+
+    def test_get_gira_data_since(self):
+        self.assertMesmasConsultas('/funcoes_dev/data/{gira}/?since=0')
+
+    def test_lista_funcoes_dev(self):
+        self.assertMesmasConsultas('/funcoes_dev/{gira}/')
+
+    def test_admin(self):
+        self.assertMesmasConsultas('/admin/gira/girafuncaohistorico/?gira__id__exact={gira}')
@@ -0,0 +1,56 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gira.models import Gira, GiraFuncaoHistorico, Medium, User
+
+
+@override_settings(GIRA_AUDITORIA_SINCRONA=True)
+class LoteTest(TestCase):
+    """Validação de cada operação do /funcoes/lote/ (gira/atribuicao.py: aplicar_lote)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ana', celular='11999', nome='Ana', is_superuser=True)
+        cls.medium = Medium.objects.create(nome='Ana M', user=cls.user)
+        cls.gira = Gira.objects.create(titulo='Gira', data_hora=timezone.now() + timedelta(days=2), linha='Exu')
+        cls.portao, cls.lojinha = (
+            GiraFuncaoHistorico.objects.create(
+                gira=cls.gira, chave=chave, tipo='Organização', descricao=chave, posicao=str(i), status='Vaga',
+            )
+            for i, chave in enumerate(('portao', 'lojinha'))
+        )
+
+    def setUp(self):
+        self.client.post('/', {'celular': self.user.celular})
+
+    def lote(self, *operacoes):
+        return self.client.post(
+            '/funcoes/lote/', json.dumps({'gira_id': self.gira.id, 'operacoes': list(operacoes)}),
+            content_type='application/json',
+        )
+
+    def test_ids_invalidos_voltam_400_por_operacao(self):
+        resposta = self.lote(
+            {'funcao_id': self.portao.id, 'acao': 'assumir', 'medium_id': 'abc'},
+            {'funcao_id': 'xx', 'acao': 'assumir'},
+            {'chave': ['portao'], 'acao': 'assumir'},
+        )
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual([r['codigo'] for r in resposta.json()['resultados']], [400, 400, 400])
+
+    def test_item_invalido_nao_impede_os_outros(self):
+        resposta = self.lote(
+            {'funcao_id': self.portao.id, 'acao': 'assumir', 'medium_id': None},
+            {'funcao_id': self.lojinha.id, 'acao': 'assumir', 'medium_id': [1]},
+        )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], 'parcial')
+        self.assertEqual([r['codigo'] for r in resposta.json()['resultados']], [200, 400])
+
+    def test_desistir_de_vaga_e_conflito(self):
+        resposta = self.lote({'funcao_id': self.portao.id, 'acao': 'desistir'})
+        self.assertEqual(resposta.json()['resultados'][0]['codigo'], 409)
+        self.assertEqual(resposta.json()['status'], 'erro')
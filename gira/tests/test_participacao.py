@@ -0,0 +1,39 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gira import auditoria, estatisticas
+from gira.models import Gira, GiraFuncaoHistorico, Medium, Participacao, User
+
+
+@override_settings(GIRA_AUDITORIA_SINCRONA=False)
+class ReconstruirTest(TestCase):
+    """estatisticas.reconstruir() com desistências ainda no buffer da auditoria."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ana', celular='11999', nome='Ana')
+        cls.medium = Medium.objects.create(nome='Ana M', user=cls.user)
+        cls.gira = Gira.objects.create(titulo='Gira', data_hora=timezone.now() + timedelta(days=2), linha='Exu')
+        cls.funcao = GiraFuncaoHistorico.objects.create(
+            gira=cls.gira, chave='portao', tipo='Organização', descricao='Portão', posicao='1', status='Vaga',
+        )
+
+    def setUp(self):
+        self.client.post('/', {'celular': self.user.celular})
+
+    @mock.patch.object(auditoria.Buffer, '_iniciar')  # sem a thread: o buffer só esvazia quando pedido
+    def test_desistencia_no_buffer_nao_se_perde(self, _):
+        self.client.post('/assumir_funcao_dev/', {'funcao_chave': 'portao', 'gira_id': self.gira.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/desistir_funcao_dev/', {'funcao_id': self.funcao.id})
+        self.assertTrue(len(auditoria.buffer()))
+
+        estatisticas.reconstruir()
+
+        self.assertEqual(len(auditoria.buffer()), 0)
+        self.assertEqual(
+            list(Participacao.objects.filter(medium=self.medium).values_list('servidas', 'liberadas')), [(0, 1)],
+        )
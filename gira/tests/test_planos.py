@@ -0,0 +1,124 @@
+import re
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from gira import classificacao, minhas
+from gira.models import Funcao, Gira, GiraFuncaoHistorico, Medium
+
+
+# -------------------------------------------------------------------
+# 🔹 Planos das consultas mais usadas (EXPLAIN)
+# -------------------------------------------------------------------
+# As consultas do quadro, do assumir/desistir, do carrossel e de "minhas
+# funções" rodam com EXPLAIN sobre uma base semeada (GIRAS giras com uma
+# função de cada TIPOS, em gira_funcao e gira_funcao_historico) e com as
+# estatísticas atualizadas por ANALYZE. O teste falha se alguma tabela
+# for lida por varredura completa: Seq Scan no PostgreSQL; no SQLite,
+# SCAN (mesmo "USING INDEX", que percorre o índice inteiro) — a não ser
+# com LIMIT, quando é a leitura em ordem do índice que para no k-ésimo.
+# O planner decide sozinho (nada de enable_seqscan): se com esse volume
+# ele prefere varrer, o índice não está servindo.
+
+GIRAS = 1500
+MEDIUNS = 40
+TIPOS = ('Cambone', 'Cambone', 'Organização', 'Organização', 'Organização', 'Limpeza', 'Limpeza', 'Limpeza')
+
+_SEQ_SCAN_PG = re.compile(r'Seq Scan on (\w+)')
+_SCAN_SQLITE = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+_SCAN_INDICE_SQLITE = re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX')
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'EXPLAIN só é conferido no PostgreSQL e no SQLite')
+class PlanosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        inicio = timezone.now() - timedelta(days=GIRAS // 2)
+        giras = Gira.objects.bulk_create([
+            Gira(titulo=f'Gira {i}', data_hora=inicio + timedelta(days=i), linha='Exu' if i % 2 else 'Caboclo')
+            for i in range(GIRAS)
+        ])
+        mediuns = Medium.objects.bulk_create([Medium(nome=f'Médium {i}') for i in range(MEDIUNS)])
+        # metade das funções com alguém, espalhadas pelos médiuns
+        for model in (Funcao, GiraFuncaoHistorico):
+            model.objects.bulk_create([
+                classificacao.aplicar(model(
+                    gira=gira, chave=f'{gira.id}_{i}', tipo=tipo, posicao=str(i),
+                    pessoa=mediuns[(gira.id + i) % MEDIUNS] if i % 2 else None,
+                    status='Preenchida' if i % 2 else 'Vaga',
+                ))
+                for gira in giras
+                for i, tipo in enumerate(TIPOS)
+            ])
+        # "minhas funções" de um médium com poucas funções (o caso comum)
+        cls.medium = Medium.objects.create(nome='Médium novo')
+        GiraFuncaoHistorico.objects.filter(gira__in=giras[GIRAS // 2:GIRAS // 2 + 3], chave__endswith='_0') \
+            .update(pessoa=cls.medium)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.gira = giras[GIRAS // 2]
+        cls.chave = f'{cls.gira.id}_3'
+
+    def assertSemVarredura(self, qs):
+        plano = qs.explain()
+        if connection.vendor == 'postgresql':
+            tabelas = _SEQ_SCAN_PG.findall(plano)
+        else:
+            tabelas = _SCAN_SQLITE.findall(plano)
+            if qs.query.high_mark is None:
+                tabelas += _SCAN_INDICE_SQLITE.findall(plano)
+        tabelas = sorted(set(tabelas))
+        self.assertFalse(tabelas, f"varredura completa em {', '.join(tabelas)}:\n{plano}")
+
+    # --- gira_gira
+    def test_gira_atual(self):
+        # quadro_cache.gira_atual_id(): a próxima gira e, sem próxima, a última
+        self.assertSemVarredura(
+            Gira.objects.filter(data_hora__gte=self.gira.data_hora).order_by('data_hora', 'id').values('id')[:1]
+        )
+        self.assertSemVarredura(Gira.objects.order_by('-data_hora', '-id').values('id')[:1])
+
+    def test_carrossel(self):
+        g = self.gira
+        self.assertSemVarredura(
+            Gira.objects.filter(Q(data_hora__gt=g.data_hora) | Q(data_hora=g.data_hora, id__gt=g.id))
+            .order_by('data_hora', 'id').values('id')[:11]
+        )
+
+    # --- gira_funcao_historico
+    def test_quadro_historico(self):
+        self.assertSemVarredura(
+            GiraFuncaoHistorico.objects.filter(gira_id=self.gira.id).order_by(*classificacao.ORDEM_QUADRO)
+        )
+
+    def test_historico_por_gira_e_chave(self):
+        self.assertSemVarredura(GiraFuncaoHistorico.objects.filter(gira_id=self.gira.id, chave=self.chave))
+
+    def test_vagas_historico(self):
+        self.assertSemVarredura(GiraFuncaoHistorico.objects.filter(gira_id=self.gira.id, pessoa__isnull=True))
+
+    def test_delta_por_versao(self):
+        self.assertSemVarredura(GiraFuncaoHistorico.objects.filter(gira_id=self.gira.id, versao__gt=0))
+
+    def test_minhas_funcoes(self):
+        self.assertSemVarredura(minhas.consulta(self.medium.id, self.gira.data_hora))
+
+    # --- gira_funcao (tabela antiga: admin, geração e rodízio com --tabela funcao)
+    def test_quadro_funcao(self):
+        self.assertSemVarredura(Funcao.objects.filter(gira_id=self.gira.id).order_by(*classificacao.ORDEM_QUADRO))
+
+    def test_funcao_por_gira_e_posicao(self):
+        self.assertSemVarredura(Funcao.objects.filter(gira_id=self.gira.id).order_by('posicao'))
+
+    def test_funcao_por_chave(self):
+        self.assertSemVarredura(Funcao.objects.filter(chave=self.chave).order_by('pk').values('pk')[:1])
+
+    def test_vagas_funcao(self):
+        self.assertSemVarredura(Funcao.objects.filter(gira_id=self.gira.id, pessoa__isnull=True))
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from gira import rodizio
+from gira.models import CambonePool, Gira, GiraFuncaoHistorico, Historico, Medium
+
+
+class PlanejarTest(SimpleTestCase):
+    """rodizio.planejar(): algoritmo puro, sem banco."""
+
+    def test_reparte_igual_entre_as_giras(self):
+        vagas = [(g * 10 + v, g, None) for g in range(3) for v in range(2)]  # 3 giras × 2 vagas
+        plano = rodizio.planejar(vagas, {}, [(1, 0), (2, 1), (3, 2)], {})
+
+        self.assertEqual(len(plano), 6)
+        por_medium = {}
+        for medium_id in plano.values():
+            por_medium[medium_id] = por_medium.get(medium_id, 0) + 1
+        self.assertEqual(por_medium, {1: 2, 2: 2, 3: 2})
+        for g in range(3):
+            self.assertNotEqual(plano[g * 10], plano[g * 10 + 1])  # ninguém duas vezes na mesma gira
+
+    def test_menor_carga_historica_primeiro(self):
+        antiga = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        recente = datetime(2024, 6, 1, tzinfo=timezone.utc)
+        carga = {1: (3, recente), 2: (1, recente), 3: (1, antiga)}
+        plano = rodizio.planejar([(10, 1, None), (11, 1, None)], {}, [(1, 0), (2, 1), (3, 2)], carga)
+        # mesma carga: quem serviu há mais tempo vem antes
+        self.assertEqual(plano, {10: 3, 11: 2})
+
+    def test_pula_quem_ja_tem_funcao_na_gira_e_o_proprio_medium_de_linha(self):
+        vagas = [(10, 1, 2), (20, 2, None)]
+        plano = rodizio.planejar(vagas, {1: {1}}, [(1, 0), (2, 1), (3, 2)], {})
+        # gira 1: 1 já tem função, 2 é o médium de linha da vaga
+        self.assertEqual(plano[10], 3)
+        self.assertEqual(plano[20], 1)
+
+    def test_vaga_sem_ninguem_disponivel_fica_fora_do_plano(self):
+        plano = rodizio.planejar([(10, 1, None), (11, 1, None)], {}, [(1, 0)], {})
+        self.assertEqual(plano, {10: 1})
+
+
+@override_settings(GIRA_AUDITORIA_SINCRONA=True)
+class DistribuirTest(TestCase):
+    """rodizio.candidatos() / distribuir() contra o banco."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Medium.objects.create(nome='Ana Luíza')
+        cls.bia = Medium.objects.create(nome='Bia')
+        cls.caio = Medium.objects.create(nome='Caio', habilitado=False)
+        for ordem, nome in enumerate(('  ana   LUIZA ', 'Bia', 'Caio', 'Ninguém')):
+            CambonePool.objects.create(nome=nome, ordem=ordem)
+        CambonePool.objects.create(nome='Bia', ordem=9, ativo=False)
+
+        amanha = timezone.now() + timedelta(days=1)
+        cls.g1 = Gira.objects.create(titulo='G1', data_hora=amanha, linha='Exu')
+        cls.g2 = Gira.objects.create(titulo='G2', data_hora=amanha + timedelta(days=7), linha='Exu')
+        cls.vaga1, cls.vaga2 = (
+            GiraFuncaoHistorico.objects.create(gira=gira, chave='cambone_1', tipo='Cambone', descricao='Cambone', status='Vaga')
+            for gira in (cls.g1, cls.g2)
+        )
+        # g2 já tem a Ana numa função e a vaga de cambone 2 preenchida
+        GiraFuncaoHistorico.objects.create(gira=cls.g2, chave='portao', tipo='Organização', pessoa=cls.ana, status='Preenchida')
+        cls.preenchida = GiraFuncaoHistorico.objects.create(
+            gira=cls.g2, chave='cambone_2', tipo='Cambone', descricao='Cambone', pessoa=cls.bia, status='Preenchida',
+        )
+
+    def test_candidatos_casam_pelo_nome_normalizado_e_pulam_desabilitados(self):
+        self.assertEqual(rodizio.candidatos(), [(self.ana.id, 0), (self.bia.id, 1)])
+
+    def test_distribuir_grava_e_audita_so_as_giras_alteradas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            planos = rodizio.distribuir([self.g1.id, self.g2.id])
+
+        # g2: Ana já tem função e Bia já é cambone lá → vaga segue vazia
+        self.assertEqual(planos['gira_funcao_historico'], {self.vaga1.id: self.ana.id})
+        self.vaga1.refresh_from_db()
+        self.vaga2.refresh_from_db()
+        self.preenchida.refresh_from_db()
+        self.assertEqual((self.vaga1.pessoa_id, self.vaga1.status), (self.ana.id, rodizio.STATUS_PREENCHIDA))
+        self.assertIsNone(self.vaga2.pessoa_id)
+        self.assertEqual(self.preenchida.pessoa_id, self.bia.id)
+
+        auditadas = list(Historico.objects.filter(acao=rodizio.ACAO_AUDITORIA).values_list('gira_id', flat=True))
+        self.assertEqual(auditadas, [self.g1.id])
+
+    def test_vaga_preenchida_no_meio_nao_gera_auditoria(self):
+        vagas = [(self.vaga1.id, self.g1.id, None), (self.vaga2.id, self.g2.id, None)]
+        plano = {self.vaga1.id: self.bia.id, self.vaga2.id: self.caio.id}
+        # alguém assumiu a vaga da g2 entre o plano e a gravação
+        GiraFuncaoHistorico.objects.filter(pk=self.vaga2.pk).update(pessoa=self.caio, status='Preenchida')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rodizio._gravar(GiraFuncaoHistorico, vagas, plano, None)
+
+        info = Historico.objects.filter(acao=rodizio.ACAO_AUDITORIA).values_list('gira_id', 'info')
+        self.assertEqual(
+            list(info),
+            [(self.g1.id, {'tabela': 'gira_funcao_historico', 'atribuicoes': {str(self.vaga1.id): self.bia.id}})],
+        )
@@ -0,0 +1,35 @@
+from django.core import signing
+from django.test import TestCase
+
+from gira import sessao
+from gira.models import User
+
+
+class SessaoTest(TestCase):
+    """Sessão no servidor e revogação por usuário (gira/sessao.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='ana', celular='11999', nome='Ana', is_superuser=True)
+
+    def setUp(self):
+        self.client.post('/', {'celular': self.user.celular})
+
+    def test_cookie_assinado_forjado_nao_loga(self):
+        self.client.cookies['sessionid'] = signing.dumps(
+            {'user_id': self.user.id}, salt='django.contrib.sessions.backends.signed_cookies', compress=True,
+        )
+        self.assertEqual(self.client.get('/metricas/').status_code, 401)
+
+    def test_revogar_derruba_a_sessao(self):
+        self.assertEqual(self.client.get('/metricas/').status_code, 200)
+        sessao.revogar(self.user.id)
+        self.assertEqual(self.client.get('/metricas/').status_code, 401)
+        self.client.post('/', {'celular': self.user.celular})
+        self.assertEqual(self.client.get('/metricas/').status_code, 200)
+
+    def test_usuario_desativado_perde_a_sessao(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/metricas/').status_code, 401)
+        self.assertNotIn('user_id', self.client.session)
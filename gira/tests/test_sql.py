@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.db.models import F, Subquery
+from django.test import TestCase
+from django.utils import timezone
+
+from gira import sql
+from gira.models import Gira, GiraFuncaoHistorico, Medium
+
+
+class AtualizarRetornandoTest(TestCase):
+    """
+    UPDATE ... RETURNING montado a partir do UpdateQuery do Django
+    (gira/sql.py). Usa APIs internas do ORM: roda no CI em SQLite e em
+    PostgreSQL e tem de passar antes de subir a versão do Django.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.medium = Medium.objects.create(nome='Ana M')
+        cls.gira = Gira.objects.create(titulo='Gira', data_hora=timezone.now() + timedelta(days=2), linha='Exu')
+        cls.outra = Gira.objects.create(titulo='Outra', data_hora=timezone.now() + timedelta(days=9), linha='Caboclo')
+        for gira in (cls.gira, cls.outra):
+            for i in range(3):
+                GiraFuncaoHistorico.objects.create(
+                    gira=gira, chave=f'k{i}', tipo='Organização', descricao=f'F{i}', posicao=str(i), status='Vaga',
+                )
+        cls.funcao = GiraFuncaoHistorico.objects.get(gira=cls.gira, chave='k1')
+
+    def test_update_condicional_pega(self):
+        versao = Gira.objects.get(pk=self.gira.pk).versao
+        gira = sql.atualizar_retornando(Gira.objects.filter(pk=self.gira.pk), 'id, versao', versao=F('versao') + 1)
+        self.assertEqual((gira.id, gira.versao), (self.gira.id, versao + 1))
+        self.assertEqual(Gira.objects.get(pk=self.gira.pk).versao, versao + 1)
+
+    def test_update_condicional_nao_pega(self):
+        self.funcao.pessoa = self.medium
+        self.funcao.save()
+        vaga = GiraFuncaoHistorico.objects.filter(pk=self.funcao.pk, pessoa__isnull=True)
+        self.assertIsNone(sql.atualizar_retornando(vaga, 'id', status='Preenchida'))
+        self.assertEqual(GiraFuncaoHistorico.objects.get(pk=self.funcao.pk).status, 'Vaga')
+
+    def test_filtro_com_join_e_subquery_e_coluna_calculada(self):
+        # como em atribuicao._executar: filtro pela gira (JOIN) e a gira por subquery
+        funcoes = GiraFuncaoHistorico.objects.filter(gira__linha='Exu', chave='k1', pessoa__isnull=True)
+        gira = sql.atualizar_retornando(
+            Gira.objects.filter(pk=Subquery(funcoes.order_by().values('gira_id')[:1])), 'id, versao, linha',
+            versao=F('versao') + 1,
+        )
+        self.assertEqual((gira.id, gira.linha), (self.gira.id, 'Exu'))
+        linha = sql.atualizar_retornando(
+            funcoes, 'id, pessoa_id, (SELECT nome FROM gira_medium WHERE gira_medium.id = pessoa_id) AS nome_pessoa',
+            pessoa_id=self.medium.id, versao=gira.versao,
+        )
+        self.assertEqual((linha.id, linha.pessoa_id, linha.nome_pessoa), (self.funcao.id, self.medium.id, 'Ana M'))
+        self.assertEqual(GiraFuncaoHistorico.objects.get(pk=self.funcao.pk).versao, gira.versao)
+
+    def test_todas(self):
+        linhas = sql.atualizar_retornando_todas(
+            GiraFuncaoHistorico.objects.filter(gira=self.outra), 'id, status', status='Preenchida',
+        )
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual({l.status for l in linhas}, {'Preenchida'})
+        self.assertEqual(sql.atualizar_retornando_todas(GiraFuncaoHistorico.objects.none(), 'id', status='x'), [])
@@ -9,12 +9,25 @@ urlpatterns = [
     path('funcoes/', views.lista_funcoes, name='lista_funcoes'),
     path('logout/', views.logout_view, name='logout'),
     path('check-user/', views.check_user_model),
+    path('metricas/', views.metricas_view, name='metricas'),
+    path('pronto/', views.pronto, name='pronto'),
     path('assumir-funcao/', views.assumir_funcao, name='assumir_funcao'),
     path('desistir-funcao/', views.desistir_funcao, name='desistir_funcao'),
+    path('funcoes/lote/', views.funcoes_lote, name='funcoes_lote'),
+    path('funcoes/minhas/', views.minhas_funcoes, name='minhas_funcoes'),
+    path('funcoes/minhas/data/', views.minhas_funcoes_data, name='minhas_funcoes_data'),
+    path('mediuns/autocompletar/', views.mediuns_autocompletar, name='mediuns_autocompletar'),
+    path('funcoes/eventos/<int:gira_id>/', views.eventos_gira, name='eventos_gira'),
+    path('funcoes/eventos/<int:gira_id>/poll/', views.eventos_gira_poll, name='eventos_gira_poll'),
     
     path('funcoes_dev/', views.lista_funcoes_dev, name='lista_funcoes_dev'),
     path('funcoes_dev/<int:gira_id>/', views.lista_funcoes_dev, name='lista_funcoes_dev_by_id'),
     path("funcoes_dev/data/<int:gira_id>/", views.get_gira_data, name="get_gira_data"),
+    path('funcoes_dev/giras/', views.giras_index, name='giras_index'),
+    path('funcoes_dev/auditoria/<int:gira_id>/', views.auditoria_gira, name='auditoria_gira'),
+    path('funcoes_dev/exportar/', views.exportar_historico, name='exportar_historico'),
+    path('funcoes_dev/participacao/', views.participacao, name='participacao'),
+    path('funcoes_dev/participacao/data/', views.participacao_data, name='participacao_data'),
     path('assumir_funcao_dev/', views.assumir_funcao_dev, name='assumir_funcao_dev'),
     path('desistir_funcao_dev/', views.desistir_funcao_dev, name='desistir_funcao_dev'),
 
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import sql
+
+
+# -------------------------------------------------------------------
+# 🔹 Versão de mudanças por gira (delta / ETag de get_gira_data)
+# -------------------------------------------------------------------
+# gira_gira.versao cresce a cada mudança na gira ou nas suas funções de
+# gira_funcao_historico. Cada linha alterada recebe a versão nova em
+# gira_funcao_historico.versao; linhas apagadas viram FuncaoRemovida.
+# O UPDATE em gira_gira trava a linha da gira até o commit, então duas
+# mudanças simultâneas na mesma gira recebem versões diferentes e em ordem.
+# Por isso as transações que o fazem são curtas e sem savepoint (no
+# assumir/desistir, três comandos: gira/atribuicao.py).
+
+
+def incrementar(gira_qs, colunas='id, versao'):
+    """UPDATE versao = versao + 1 ... RETURNING: a gira (com a versão nova) ou None."""
+    return sql.atualizar_retornando(gira_qs, colunas, versao=F('versao') + 1)
+
+
+def registrar_mudanca(gira_id, funcao_ids=()):
+    """Incrementa a versão da gira e marca as funções alteradas. Retorna a versão nova."""
+    from .models import Gira, GiraFuncaoHistorico
+
+    with transaction.atomic(savepoint=False):
+        gira = incrementar(Gira.objects.filter(pk=gira_id))
+        if gira is not None and funcao_ids:
+            GiraFuncaoHistorico.objects.filter(pk__in=funcao_ids).update(versao=gira.versao)
+    return gira.versao if gira is not None else None
+
+
+def registrar_mudancas(funcoes_por_gira, colunas='id, versao, data_hora, linha'):
+    """
+    registrar_mudanca() de várias giras em dois comandos (rodízio de uma
+    temporada): {gira_id: funcao_ids} → {gira_id: gira com a versão nova}.
+    """
+    from .models import Gira, GiraFuncaoHistorico
+
+    if not funcoes_por_gira:
+        return {}
+    with transaction.atomic(savepoint=False):
+        giras = {g.id: g for g in sql.atualizar_retornando_todas(
+            Gira.objects.filter(pk__in=funcoes_por_gira), colunas, versao=F('versao') + 1,
+        )}
+        ids = [i for gira_id, funcao_ids in funcoes_por_gira.items() if gira_id in giras for i in funcao_ids]
+        if ids:
+            GiraFuncaoHistorico.objects.filter(pk__in=ids).update(versao=Case(
+                *(When(gira_id=g.id, then=Value(g.versao)) for g in giras.values()),
+                output_field=IntegerField(),
+            ))
+    return giras
+
+
+def registrar_mudancas_em(funcoes_qs):
+    """
+    registrar_mudanca() de todas as funções de `funcoes_qs` (ex.: as de um
+    médium que trocou de nome): um UPDATE nas giras delas (id__in) e outro
+    nas funções, sem ler as linhas antes. Retorna os ids das giras.
+    """
+    from .models import Gira
+
+    with transaction.atomic(savepoint=False):
+        giras = sql.atualizar_retornando_todas(
+            Gira.objects.filter(pk__in=funcoes_qs.values('gira_id')), 'id, versao', versao=F('versao') + 1,
+        )
+        if giras:
+            funcoes_qs.update(versao=Case(
+                *(When(gira_id=g.id, then=Value(g.versao)) for g in giras),
+                output_field=IntegerField(),
+            ))
+    return [g.id for g in giras]
+
+
+def registrar_remocao(gira_id, funcao_id):
+    """Registra a remoção (tombstone) de uma função de gira_funcao_historico."""
+    from .models import FuncaoRemovida
+
+    with transaction.atomic(savepoint=False):
+        versao = registrar_mudanca(gira_id)
+        if versao is not None:
+            FuncaoRemovida.objects.create(gira_id=gira_id, funcao_id=funcao_id, versao=versao)
+    return versao
@@ -1,13 +1,24 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import get_user_model
-import unicodedata
+from django.core.handlers.asgi import ASGIRequest
+import asyncio
+import json
+import logging
 
+from . import aquecimento, atribuicao, auditoria, carrossel, estatisticas, eventos, exportacao, identidade, mediuns, metricas, minhas, quadro, quadro_cache, sessao, snapshots
+from .models import FuncaoRemovida, Gira, GiraFuncaoHistorico, User
 
+logger = logging.getLogger(__name__)
 
 
 # -------------------------------------------------------------------
@@ -25,22 +36,18 @@ def check_user_model(request):
 
 def _get_user(request):
     """Retorna o usuário logado via sessão (login custom)."""
-    uid = request.session.get('user_id')
-    if not uid:
-        return None
-    try:
-        return User.objects.get(id=uid)
-    except User.DoesNotExist:
-        return None
+    if hasattr(request, 'gira_user'):
+        return request.gira_user  # já resolvido pelo IdentidadeMiddleware
+    user, _ = identidade.resolver(request.session.get('user_id'))
+    return user
 
 
-def _normalize(s: str) -> str:
-    """Remove acentos e normaliza texto para comparação."""
-    if not s:
-        return ''
-    s = s.lower()
-    s = unicodedata.normalize('NFKD', s)
-    return ''.join(ch for ch in s if not unicodedata.combining(ch))
+def _get_medium(request):
+    """Retorna o médium vinculado ao usuário logado (ou None)."""
+    if hasattr(request, 'medium'):
+        return request.medium
+    _, medium = identidade.resolver(request.session.get('user_id'))
+    return medium
 
 
 # -------------------------------------------------------------------
@@ -51,7 +58,7 @@ def login_view(request):
     user = _get_user(request)
     if user:
         return redirect('gira:lista_funcoes')
-        
+
     if request.method == 'POST':
         celular = ''.join(ch for ch in request.POST.get('celular', '') if ch.isdigit())
         try:
@@ -60,10 +67,8 @@ def login_view(request):
             messages.error(request, 'Celular não encontrado ou usuário inativo.')
             return render(request, 'gira/login.html')
 
-        # guarda dados mínimos na sessão
-        request.session['user_id'] = user.id
-        request.session['user_nome'] = user.nome
-        request.session['user_telefone'] = user.celular
+        # guarda dados mínimos na sessão (ver gira/sessao.py)
+        sessao.iniciar(request, user)
 
         return redirect('gira:lista_funcoes')
 
@@ -79,100 +84,104 @@ def logout_view(request):
 # -------------------------------------------------------------------
 # 🔹 View principal: lista de funções
 # -------------------------------------------------------------------
+def _quadro_da_gira(gira_id, linha, versao, congelada=None):
+    """
+    Quadro compacto (gira/quadro.py) da gira, o mesmo para /funcoes/,
+    /funcoes_dev/ e get_gira_data: o congelado (gira/snapshots.py) ou o
+    de gira_funcao_historico, em cache até a próxima mudança da gira.
+    `versao` é a de gira_gira, lida antes: um quadro do cache mais velho
+    que ela (a invalidação roda depois do commit) é montado de novo.
+    O snapshot só é procurado ao montar; congelada=False (quem já leu o
+    flag junto com a versão) nem procura.
+    """
+    def montar():
+        congelado = snapshots.obter(gira_id) if congelada is not False else None
+        if congelado is not None:
+            return congelado
+        return {'versao': versao, **quadro.serializar(GiraFuncaoHistorico.objects.filter(gira_id=gira_id).for_board(), linha)}
+
+    dados = quadro_cache.obter('dados', gira_id, montar)
+    if dados['versao'] < versao:
+        dados = montar()
+    return dados
+
+
+def _montar_quadro(gira_id):
+    """Monta (para o cache) o quadro agrupado e o HTML de uma gira."""
+    gira = Gira.objects.filter(id=gira_id).first()
+    if not gira:
+        return None
+
+    # Quadro compacto: já classificado, ordenado e agrupado
+    dados = _quadro_da_gira(gira.id, gira.linha, gira.versao)
+    grupos = quadro.expandir(dados)
+
+    html = render_to_string('gira/_quadro_funcoes.html', {
+        'gira': gira,
+        'cambones': grupos['cambones'],
+        'organizacao': grupos['organizacao'],
+        'limpeza': grupos['limpeza'],
+        'tema': dados['tema'],
+    })
+    return {
+        'gira': gira,
+        'tema': dados['tema'],
+        'html': html,
+        'pessoas': quadro.pessoas(dados),
+    }
+
+
+def aquecer_quadro():
+    """Põe no cache o quadro da gira atual (aquecimento do worker). Retorna o id da gira."""
+    gira_id = quadro_cache.gira_atual_id()
+    if gira_id:
+        quadro_cache.obter('funcoes', gira_id, lambda: _montar_quadro(gira_id))
+    return gira_id
+
+
 def lista_funcoes(request):
     user = _get_user(request)
     if not user:
         return redirect('gira:login')
 
-    # 🔍 Vincula o usuário logado ao médium correspondente
-    medium_logado = Medium.objects.filter(user_id=user.id).first()
+    # 🔍 Médium vinculado ao usuário logado (resolvido junto com o usuário)
+    medium_logado = _get_medium(request)
 
-    # LOG de diagnóstico para monitoramento
-    print(f"[DEBUG] Usuário logado: {user.nome} (gira_user.id={user.id})")
-    if medium_logado:
-        print(f"[DEBUG] Médium logado: {medium_logado.nome} (gira_medium.id={medium_logado.id})")
-    else:
-        print("[DEBUG] Nenhum médium associado a este usuário!")
+    # LOG de diagnóstico (nível DEBUG, amostrado: ver metricas.amostrar)
+    logar = metricas.amostrar(logger)
+    if logar:
+        logger.debug(
+            "lista_funcoes: usuário %s (gira_user.id=%s), médium %s",
+            user.nome, user.id, medium_logado.id if medium_logado else None,
+            extra={'user_id': user.id, 'medium_id': medium_logado.id if medium_logado else None},
+        )
 
-    gira = Gira.objects.order_by('-data_hora').first()
-    if not gira:
+    # 🔹 Quadro da gira atual (em cache até a próxima alteração da gira).
+    # O número do último evento é lido ANTES, para o JS não perder nada
+    # que mude entre a montagem do quadro e a conexão SSE.
+    eventos_desde = eventos.broker().cursor()
+    gira_id = quadro_cache.gira_atual_id()
+    montado = quadro_cache.obter('funcoes', gira_id, lambda: _montar_quadro(gira_id)) if gira_id else None
+    if not montado:
         messages.info(request, 'Nenhuma gira cadastrada.')
         return render(request, 'gira/lista_funcoes.html', {'user': user})
 
-    funcoes = list(
-        gira.funcoes.select_related('medium_de_linha', 'pessoa').all().order_by('posicao')
-    )
-
-    cambones, organizacao, limpeza = [], [], []
-
-    # Agrupamento das funções
-    for f in funcoes:
-        tipo = (f.tipo or '').lower()
-        chave = (f.chave or '').lower()
-        descricao = (f.descricao or '').lower()
-
-        if 'cambone' in tipo or 'cambone' in chave or 'cambone' in descricao:
-            cambones.append(f)
-        elif any(k in tipo or k in chave or k in descricao for k in ['organ', 'senha', 'portão', 'portão', 'lojinh', 'chamar']):
-            organizacao.append(f)
-        elif 'limp' in tipo or 'limp' in chave or 'limp' in descricao:
-            limpeza.append(f)
-        else:
-            organizacao.append(f)
-
-    # Ordenação de Cambones (“Mãe Bruna” primeiro)
-    def _cambone_key(item):
-        nome = item.medium_de_linha.nome if item.medium_de_linha else ''
-        n = _normalize(nome)
-        if 'mae bruna' in n or ('mae' in n and 'bruna' in n):
-            return ('', '')
-        return (n, nome or '')
-
-    cambones.sort(key=_cambone_key)
-
-    # Organização – ordem fixa
-    ordem_fix = ['portao', 'distribuir senha', 'lojinha', 'chamar senha']
-    buckets = {k: [] for k in ordem_fix}
-    others = []
-    for f in organizacao:
-        descr = _normalize(f.descricao or f.tipo or '')
-        placed = False
-        for key in ordem_fix:
-            if key in descr:
-                buckets[key].append(f)
-                placed = True
-                break
-        if not placed:
-            others.append(f)
-
-    organizacao_ordered = []
-    for key in ordem_fix:
-        organizacao_ordered.extend(buckets[key])
-    organizacao_ordered.extend(others)
-
-    # Limpeza – padroniza descrição
-    for f in limpeza:
-        descr = (f.descricao or f.tipo or '')
-        setattr(f, 'display_descricao', 'Limpeza' if 'limp' in descr.lower() else descr or f.tipo or 'Limpeza')
-
-    # Tema dinâmico
-    linha = _normalize(gira.linha or '')
-    tema = 'exu' if 'exu' in linha or 'pombag' in linha else 'padrao'
-
     # Debug: quais funções têm pessoa_id igual ao médium logado
-    if medium_logado:
-        meus_ids = [f.id for f in funcoes if f.pessoa_id == medium_logado.id]
-        print(f"[DEBUG] Funções assumidas por {medium_logado.nome}: {meus_ids}")
+    if logar and medium_logado:
+        meus_ids = [fid for fid, pid in montado['pessoas'] if pid == medium_logado.id]
+        logger.debug(
+            "lista_funcoes: funções assumidas por %s: %s", medium_logado.nome, meus_ids,
+            extra={'medium_id': medium_logado.id, 'funcoes': meus_ids},
+        )
 
     contexto = {
         'user': user,
         'sess_user_id': user.id,  # gira_user.id (mantém compatibilidade)
         'medium_logado': medium_logado,  # gira_medium associado
-        'gira': gira,
-        'cambones': cambones,
-        'organizacao': organizacao_ordered,
-        'limpeza': limpeza,
-        'tema': tema,
+        'gira': montado['gira'],
+        'tema': montado['tema'],
+        'quadro_html': montado['html'],
+        'eventos_desde': eventos_desde,
     }
     return render(request, 'gira/lista_funcoes.html', contexto)
 
@@ -180,6 +189,37 @@ def lista_funcoes(request):
 # -------------------------------------------------------------------
 # 🔹 Endpoints AJAX: assumir / desistir função
 # -------------------------------------------------------------------
+def _resposta_falha(res, msg_nao_responsavel='Você não é responsável por esta função.',
+                    msg_passada='Não é permitido assumir funções de giras passadas.',
+                    msg_inexistente='Função inexistente.'):
+    """Converte um Resultado de atribuicao sem sucesso na resposta JSON de erro."""
+    erros = {
+        atribuicao.INEXISTENTE: (msg_inexistente, 404),
+        atribuicao.GIRA_PASSADA: (msg_passada, 403),
+        atribuicao.OCUPADA: ('Esta função já foi assumida.', 409),
+        atribuicao.CAMBONE: ('Não é permitido assumir cambones via UI.', 403),
+        atribuicao.NAO_RESPONSAVEL: (msg_nao_responsavel, 403),
+    }
+    mensagem, status = erros[res.motivo]
+    return JsonResponse({'status': 'erro', 'mensagem': mensagem}, status=status)
+
+
+def _atribuir_por_id_ou_chave(operacao, funcao_id, funcao_chave, medium_id, usuario_id=None, gira_id=None):
+    """Tenta primeiro por ID e, se não achar, pela CHAVE (comportamento legado)."""
+    res = None
+    filtro = atribuicao.alvo(GiraFuncaoHistorico, funcao_id=funcao_id)
+    if filtro is not None:
+        res = operacao(GiraFuncaoHistorico, filtro, medium_id, usuario_id=usuario_id)
+    if (res is None or res.motivo == atribuicao.INEXISTENTE) and funcao_chave:
+        # chave é única por gira: sem gira_id, vale a gira exibida em /funcoes/
+        gira_id = gira_id or quadro_cache.gira_atual_id()
+        filtro = atribuicao.alvo(GiraFuncaoHistorico, chave=funcao_chave, gira_id=gira_id)
+        res = operacao(GiraFuncaoHistorico, filtro, medium_id, usuario_id=usuario_id)
+    if res is None:
+        res = atribuicao.Resultado(False, atribuicao.INEXISTENTE)
+    return res
+
+
 @require_POST
 @csrf_exempt
 def assumir_funcao(request):
@@ -193,32 +233,18 @@ def assumir_funcao(request):
     if not funcao_id and not funcao_chave:
         return JsonResponse({'status': 'erro', 'mensagem': 'ID ou chave da função ausente.'}, status=400)
 
-    try:
-        medium = Medium.objects.get(user_id=sess_user_id)
-    except Medium.DoesNotExist:
+    medium = _get_medium(request)
+    if not medium:
         return JsonResponse({'status': 'erro', 'mensagem': 'Médium não encontrado para o usuário.'}, status=404)
 
-    # 🔹 Busca a função: tenta primeiro por ID, depois por CHAVE
-    funcao = None
-    if funcao_id and str(funcao_id).isdigit():
-        funcao = Funcao.objects.filter(id=funcao_id).first()
-    if not funcao and funcao_chave:
-        funcao = Funcao.objects.filter(chave=funcao_chave).first()
-
-    if not funcao:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Função inexistente.'}, status=404)
-
-    if funcao.pessoa_id:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Esta função já foi assumida.'}, status=409)
-
-    if (funcao.tipo or '').lower().startswith('cambone'):
-        return JsonResponse({'status': 'erro', 'mensagem': 'Não é permitido assumir cambones via UI.'}, status=403)
-
-    funcao.pessoa_id = medium.id
-    funcao.status = 'Preenchida'
-    funcao.save()
+    # 🔹 UPDATE condicional: só grava se a função ainda estiver vaga
+    res = _atribuir_por_id_ou_chave(
+        atribuicao.assumir, funcao_id, funcao_chave, medium.id, sess_user_id, request.POST.get('gira_id')
+    )
+    if not res:
+        return _resposta_falha(res)
 
-    return JsonResponse({'status': 'ok', 'mensagem': f'Função assumida por {medium.nome}', 'funcao_id': funcao.id})
+    return JsonResponse({'status': 'ok', 'mensagem': f'Função assumida por {medium.nome}', 'funcao_id': res.funcao_id})
 
 
 @require_POST
@@ -234,41 +260,97 @@ def desistir_funcao(request):
     if not funcao_id and not funcao_chave:
         return JsonResponse({'status': 'erro', 'mensagem': 'ID ou chave da função ausente.'}, status=400)
 
-    try:
-        medium = Medium.objects.get(user_id=sess_user_id)
-    except Medium.DoesNotExist:
+    medium = _get_medium(request)
+    if not medium:
         return JsonResponse({'status': 'erro', 'mensagem': 'Médium não encontrado para o usuário.'}, status=404)
 
-    # 🔹 Busca a função: tenta primeiro por ID, depois por CHAVE
-    funcao = None
-    if funcao_id and str(funcao_id).isdigit():
-        funcao = Funcao.objects.filter(id=funcao_id).first()
-    if not funcao and funcao_chave:
-        funcao = Funcao.objects.filter(chave=funcao_chave).first()
+    # 🔹 UPDATE condicional: só libera se a função for deste médium
+    res = _atribuir_por_id_ou_chave(
+        atribuicao.desistir, funcao_id, funcao_chave, medium.id, sess_user_id, request.POST.get('gira_id')
+    )
+    if not res:
+        return _resposta_falha(res)
+
+    return JsonResponse({'status': 'ok', 'mensagem': f'{medium.nome} desistiu da função.', 'funcao_id': res.funcao_id})
+
 
-    if not funcao:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Função inexistente.'}, status=404)
+LOTE_MAXIMO = 100
 
-    if funcao.pessoa_id != medium.id:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Você não é responsável por esta função.'}, status=403)
+_ERROS_LOTE = {
+    atribuicao.INEXISTENTE: ('Função inexistente.', 404),
+    atribuicao.GIRA_PASSADA: ('Não é permitido alterar funções de giras passadas.', 403),
+    atribuicao.OCUPADA: ('Esta função já foi assumida.', 409),
+    atribuicao.CAMBONE: ('Só coordenadores atribuem cambones.', 403),
+    atribuicao.NAO_RESPONSAVEL: ('Você não é responsável por esta função.', 403),
+    atribuicao.NAO_PERMITIDO: ('Só coordenadores atribuem funções a outro médium.', 403),
+    atribuicao.MEDIUM_INEXISTENTE: ('Médium inexistente.', 404),
+    atribuicao.OPERACAO_INVALIDA: ("Ação inválida (use 'assumir' ou 'desistir').", 400),
+    atribuicao.FUNCAO_INVALIDA: ('funcao_id ou chave inválidos.', 400),
+    atribuicao.MEDIUM_INVALIDO: ('medium_id inválido.', 400),
+    atribuicao.DUPLICADA: ('Função repetida no lote.', 400),
+    atribuicao.JA_VAGA: ('Esta função já está vaga.', 409),
+}
 
-    funcao.pessoa_id = None
-    funcao.status = 'Vaga'
-    funcao.save()
 
-    return JsonResponse({'status': 'ok', 'mensagem': f'{medium.nome} desistiu da função.', 'funcao_id': funcao.id})
+@require_POST
+@csrf_exempt
+def funcoes_lote(request):
+    """
+    Vários assumir/desistir de uma gira numa requisição (JSON):
+      {"gira_id": 1,
+       "operacoes": [{"funcao_id": 10 | "chave": "...", "acao": "assumir", "medium_id": 3}, ...]}
+    Coordenadores (staff/superuser) podem atribuir a outros médiuns,
+    atribuir cambones e liberar funções de qualquer um. Cada item tem o
+    seu resultado em 'resultados' (código 200, 400, 403, 404 ou 409;
+    desistir de uma função já vaga é 409).
+    """
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'status': 'erro', 'mensagem': 'Usuário não autenticado.'}, status=401)
+    medium = _get_medium(request)
+    if not medium:
+        return JsonResponse({'status': 'erro', 'mensagem': 'Médium não encontrado para o usuário.'}, status=404)
+
+    try:
+        dados = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'status': 'erro', 'mensagem': 'JSON inválido.'}, status=400)
+    operacoes = dados.get('operacoes') if isinstance(dados, dict) else None
+    gira_id = dados.get('gira_id') if isinstance(dados, dict) else None
+    if not str(gira_id or '').isdigit() or not isinstance(operacoes, list) or not operacoes:
+        return JsonResponse({'status': 'erro', 'mensagem': 'Informe gira_id e a lista de operacoes.'}, status=400)
+    if len(operacoes) > LOTE_MAXIMO or not all(isinstance(op, dict) for op in operacoes):
+        return JsonResponse({'status': 'erro', 'mensagem': f'Lote inválido (máximo {LOTE_MAXIMO} operações).'}, status=400)
+
+    resultados = atribuicao.aplicar_lote(
+        GiraFuncaoHistorico, int(gira_id), operacoes, medium.id,
+        coordenador=bool(user.is_staff or user.is_superuser),
+        usuario_id=user.id,
+    )
 
+    itens = []
+    for i, res in enumerate(resultados):
+        mensagem, codigo = ('ok', 200) if res else _ERROS_LOTE[res.motivo]
+        itens.append({
+            'indice': i,
+            'status': 'ok' if res else 'erro',
+            'codigo': codigo,
+            'mensagem': mensagem,
+            'funcao_id': res.funcao_id,
+            'chave': res.chave,
+            'pessoa_id': res.pessoa_id,
+            'pessoa_nome': res.pessoa_nome,
+        })
+    sucessos = sum(1 for res in resultados if res)
+    status = 'ok' if sucessos == len(resultados) else ('parcial' if sucessos else 'erro')
+    # lote só com itens malformados: a requisição inteira é 400
+    invalido = not sucessos and all(item['codigo'] == 400 for item in itens)
+    return JsonResponse({'status': status, 'resultados': itens}, status=400 if invalido else 200)
 
 
 # -------------------------------------------------------------------
 # 🔹 View da lista funções em desenvolvimento
 # -------------------------------------------------------------------
-from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
-from .models import Gira, Funcao, Medium, Historico, User, GiraFuncaoHistorico
-from django.core.serializers.json import DjangoJSONEncoder
-import json
-from django.utils import timezone
 
 # -------------------------------------------------------------------
 # 🔹 NOVOS Endpoints AJAX: DESENVOLVIMENTO
@@ -290,40 +372,24 @@ def assumir_funcao_dev(request):
     if not funcao_chave or not gira_id: # <--- Incluído o check para gira_id
         return JsonResponse({'status': 'erro', 'mensagem': 'Parâmetros ausentes (chave da função ou ID da Gira).'}, status=400)
 
-    try:
-        medium = Medium.objects.get(user_id=sess_user_id)
-    except Medium.DoesNotExist:
+    medium = _get_medium(request)
+    if not medium:
         return JsonResponse({'status': 'erro', 'mensagem': 'Médium não encontrado.'}, status=404)
 
-    try:
-        # 1. Busca no modelo 'GiraFuncaoHistorico', agora filtrando pela chave E pelo ID da Gira
-        funcao = GiraFuncaoHistorico.objects.select_related('gira').get(
-            chave=funcao_chave,
-            gira_id=gira_id  # <--- CORREÇÃO ESSENCIAL: Garante a unicidade da busca
-        )
-    except GiraFuncaoHistorico.DoesNotExist:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Função (dev) inexistente.'}, status=404)
-    except GiraFuncaoHistorico.MultipleObjectsReturned:
-        # MANTIDO: Embora a correção deva evitar isso, é bom ter este catch.
-        return JsonResponse({'status': 'erro', 'mensagem': 'Erro interno: Múltiplas funções encontradas para Gira ID e Chave.'}, status=500)
-
-    # 2. Checagem de data (regra de negócio)
-    hoje = timezone.localdate()
-    if funcao.gira.data_hora.date() < hoje:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Não é permitido assumir funções de giras passadas.'}, status=403)
-
-    if funcao.pessoa_id:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Esta função já foi assumida.'}, status=409)
-
-    if (funcao.tipo or '').lower().startswith('cambone'):
-        return JsonResponse({'status': 'erro', 'mensagem': 'Não é permitido assumir cambones via UI.'}, status=403)
+    # UPDATE condicional em 'GiraFuncaoHistorico' (chave + gira), já checando
+    # vaga, cambone e data da gira (regra de negócio) no próprio WHERE
+    res = atribuicao.assumir(
+        GiraFuncaoHistorico,
+        atribuicao.alvo(GiraFuncaoHistorico, chave=funcao_chave, gira_id=gira_id),
+        medium.id,
+        so_futuras=True,
+        usuario_id=sess_user_id,
+    )
+    if not res:
+        return _resposta_falha(res, msg_inexistente='Função (dev) inexistente.')
 
-    funcao.pessoa_id = medium.id
-    funcao.status = 'Preenchida'
-    funcao.save()
+    return JsonResponse({'status': 'ok', 'mensagem': f'Função assumida por {medium.nome}', 'funcao_id': res.funcao_id})
 
-    return JsonResponse({'status': 'ok', 'mensagem': f'Função assumida por {medium.nome}', 'funcao_id': funcao.id})
-    
 @require_POST
 @csrf_exempt
 def desistir_funcao_dev(request):
@@ -336,33 +402,32 @@ def desistir_funcao_dev(request):
     if not funcao_id:
         return JsonResponse({'status': 'erro', 'mensagem': 'ID da função ausente.'}, status=400)
 
-    try:
-        medium = Medium.objects.get(user_id=sess_user_id)
-    except Medium.DoesNotExist:
+    medium = _get_medium(request)
+    if not medium:
         return JsonResponse({'status': 'erro', 'mensagem': 'Médium não encontrado.'}, status=404)
 
-    try:
-        # 1. Busca no modelo 'GiraFuncaoHistorico'
-        funcao = GiraFuncaoHistorico.objects.select_related('gira').get(id=funcao_id)
-    except GiraFuncaoHistorico.DoesNotExist:
+    filtro = atribuicao.alvo(GiraFuncaoHistorico, funcao_id=funcao_id)
+    if filtro is None:
         return JsonResponse({'status': 'erro', 'mensagem': 'Função (dev) inexistente.'}, status=404)
 
-    # 2. Checagem de data (regra de negócio)
-    hoje = timezone.localdate()
-    if funcao.gira.data_hora.date() < hoje:
-        return JsonResponse({'status': 'erro', 'mensagem': 'Não é permitido desistir de funções de giras passadas.'}, status=403)
+    res = atribuicao.desistir(GiraFuncaoHistorico, filtro, medium.id, so_futuras=True, usuario_id=sess_user_id)
 
-    if funcao.pessoa_id != medium.id:
+    if res.motivo == atribuicao.NAO_RESPONSAVEL:
         # (Opcional: permitir superuser desistir por outros)
-        user = _get_user(request) # Assume que _get_user() está disponível
-        if not getattr(user, "is_superuser", False):
-             return JsonResponse({'status': 'erro', 'mensagem': 'Você não é responsável por esta função.'}, status=403)
-
-    funcao.pessoa_id = None
-    funcao.status = 'Vaga'
-    funcao.save()
+        user = _get_user(request)
+        if getattr(user, "is_superuser", False):
+            res = atribuicao.desistir(
+                GiraFuncaoHistorico, filtro, medium.id, qualquer_pessoa=True, so_futuras=True, usuario_id=sess_user_id
+            )
+
+    if not res:
+        return _resposta_falha(
+            res,
+            msg_passada='Não é permitido desistir de funções de giras passadas.',
+            msg_inexistente='Função (dev) inexistente.',
+        )
 
-    return JsonResponse({'status': 'ok', 'mensagem': f'Função liberada.', 'funcao_id': funcao.id})
+    return JsonResponse({'status': 'ok', 'mensagem': f'Função liberada.', 'funcao_id': res.funcao_id})
 
 # -------------------------------------------------------------------
 # 🔹 View da lista funções em desenvolvimento (AJUSTADA)
@@ -382,77 +447,23 @@ def lista_funcoes_dev(request, gira_id=None):
         return render(request, "gira/acesso_negado.html", {"mensagem": "Acesso restrito."})
 
     # 🔍 Obtém médium vinculado
-    try:
-        medium_logado = Medium.objects.filter(user_id=user.id).first()
-    except Medium.DoesNotExist:
-        medium_logado = None
+    medium_logado = _get_medium(request)
 
-    gira = Gira.objects.order_by('-data_hora').first() if not gira_id else Gira.objects.filter(id=gira_id).first()
+    gira = Gira.objects.filter(id=gira_id or quadro_cache.gira_atual_id()).first()
     if not gira:
         messages.info(request, 'Nenhuma gira cadastrada.')
         return render(request, 'gira/lista_funcoes.html', {'user': user})
 
-    # 🔹 Busca as funções do histórico
-    funcoes = list(
-        GiraFuncaoHistorico.objects.filter(gira_id=gira.id)
-        .select_related('medium_de_linha', 'pessoa')
-        .order_by('posicao')
-    )
+    eventos_desde = eventos.broker().cursor()
 
-    cambones, organizacao, limpeza = [], [], []
-    for f in funcoes:
-        tipo = (f.tipo or '').lower()
-        chave = (f.chave or '').lower()
-        descricao = (f.descricao or '').lower()
-
-        if 'cambone' in tipo or 'cambone' in chave or 'cambone' in descricao:
-            cambones.append(f)
-        elif any(k in tipo or k in chave or k in descricao for k in ['organ', 'senha', 'portão', 'portão', 'lojinh', 'chamar']):
-            organizacao.append(f)
-        elif 'limp' in tipo or 'limp' in chave or 'limp' in descricao:
-            limpeza.append(f)
-        else:
-            organizacao.append(f)
-
-    def _cambone_key(item):
-        nome = item.medium_de_linha.nome if item.medium_de_linha else ''
-        n = _normalize(nome)
-        if 'mae bruna' in n or ('mae' in n and 'bruna' in n):
-            return ('', '')
-        return (n, nome or '')
-    cambones.sort(key=_cambone_key)
-
-    ordem_fix = ['portao', 'distribuir senha', 'lojinha', 'chamar senha']
-    buckets = {k: [] for k in ordem_fix}
-    others = []
-    for f in organizacao:
-        descr = _normalize(f.descricao or f.tipo or '')
-        placed = False
-        for key in ordem_fix:
-            if key in descr:
-                buckets[key].append(f)
-                placed = True
-                break
-        if not placed:
-            others.append(f)
-
-    organizacao_ordered = []
-    for key in ordem_fix:
-        organizacao_ordered.extend(buckets[key])
-    organizacao_ordered.extend(others)
-
-    for f in limpeza:
-        descr = (f.descricao or f.tipo or '')
-        setattr(f, 'display_descricao', 'Limpeza' if 'limp' in descr.lower() else descr or f.tipo or 'Limpeza')
-
-    linha = _normalize(gira.linha or '')
-    tema = 'exu' if 'exu' in linha or 'pombag' in linha else 'padrao'
-
-    # 🧭 Carrossel: gira anterior e próxima
-    gira_anterior = Gira.objects.filter(data_hora__lt=gira.data_hora).order_by('-data_hora').first()
-    gira_proxima = Gira.objects.filter(data_hora__gt=gira.data_hora).order_by('data_hora').first()
-    giras = list(Gira.objects.all().order_by('data_hora').values('id', 'data_hora', 'linha'))
-    giras_json = json.dumps(giras, cls=DjangoJSONEncoder)
+    # 🔹 Quadro compacto (o mesmo de /funcoes/ e do get_gira_data)
+    dados = _quadro_da_gira(gira.id, gira.linha, gira.versao)
+    grupos = quadro.expandir(dados)
+
+    # 🧭 Carrossel: só uma janela em volta da gira atual; o JS busca as
+    # vizinhas em /funcoes_dev/giras/ conforme navega
+    # (vai para a página com json_script, lido pelo lista_funcoes_dev.js)
+    janela = carrossel.janela({'id': gira.id, 'data_hora': gira.data_hora, 'linha': gira.linha, 'versao': gira.versao})
 
     # --- 📌 INÍCIO DAS ALTERAÇÕES NO CONTEXTO 📌 ---
 
@@ -461,7 +472,7 @@ def lista_funcoes_dev(request, gira_id=None):
 
     # 2. Checar a data da gira atual (para a primeira carga)
     hoje = timezone.localdate()
-    is_gira_futura_ou_hoje = False 
+    is_gira_futura_ou_hoje = False
     if gira:
         is_gira_futura_ou_hoje = gira.data_hora.date() >= hoje
 
@@ -473,77 +484,416 @@ def lista_funcoes_dev(request, gira_id=None):
         'sess_user_id': user.id,
         'medium_logado': medium_logado,
         'gira': gira,
-        'cambones': cambones,
-        'organizacao': organizacao_ordered, # (usando seu nome de var)
-        'limpeza': limpeza,
-        'tema': tema,
-        'giras_json': giras_json,
-        
+        'cambones': grupos['cambones'],
+        'organizacao': grupos['organizacao'],
+        'limpeza': grupos['limpeza'],
+        'tema': dados['tema'],
+        'janela': janela,
+        'eventos_desde': eventos_desde,
+
         # --- ⬇️ ADICIONE ESTAS DUAS LINHAS ⬇️ ---
         'tem_permissao_base': tem_permissao_base,
         'pode_assumir': pode_assumir_final,
     }
     # --- 🏁 FIM DAS ALTERAÇÕES 🏁 ---
 
-    
-    return render(request, 'gira/lista_funcoes_dev.html', contexto)
 
+    return render(request, 'gira/lista_funcoes_dev.html', contexto)
 
-from django.http import JsonResponse
-from .models import Gira, GiraFuncaoHistorico
-from django.forms.models import model_to_dict
 
-from django.http import JsonResponse
-from django.forms.models import model_to_dict
-from .models import Gira, GiraFuncaoHistorico
+# gira congelada com ?v= da versão certa: o navegador guarda por 1 ano
+CACHE_CONGELADA = 60 * 60 * 24 * 365
 
 def get_gira_data(request, gira_id):
-    gira = Gira.objects.filter(id=gira_id).first()
+    """
+    Funções da gira (gira_funcao_historico) para o carrossel, no formato
+    compacto de gira/quadro.py (seções já agrupadas e ordenadas).
+    - Responde 304 para If-None-Match com a versão atual da gira;
+    - ?since=<versao> devolve só as funções alteradas depois dessa versão
+      e os ids removidos ('removidas');
+    - gira congelada (gira/snapshots.py): devolve o snapshot inteiro, com
+      cache immutable se ?v=<versao> for a versão do congelamento.
+    """
+    eventos_desde = eventos.broker().cursor()  # antes da query: o JS reaplica o que vier depois
+
+    # uma consulta indexada decide o 304: versão da gira + se está congelada
+    gira = (
+        Gira.objects.filter(id=gira_id)
+        .values('id', 'linha', 'data_hora', 'versao', 'snapshot__versao',
+                congelada=ExpressionWrapper(Q(snapshot__dados__isnull=False), output_field=BooleanField()))
+        .first()
+    )
     if not gira:
         return JsonResponse({'erro': 'Gira não encontrada'}, status=404)
+    if gira['congelada']:
+        resposta = _resposta_congelada(request, gira_id, gira['snapshot__versao'], eventos_desde)
+        if resposta is not None:
+            return resposta
+
+    etag = f'W/"gira-{gira_id}-v{gira["versao"]}"'
+    since = request.GET.get('since')
+    since = int(since) if since and since.isdigit() else None
+
+    if since is None and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        resposta = HttpResponseNotModified()
+        resposta['ETag'] = etag
+        return resposta
+
+    removidas = []
+    if since is None:
+        dados = _quadro_da_gira(gira_id, gira['linha'], gira['versao'], congelada=False)
+    else:
+        funcoes_qs = GiraFuncaoHistorico.objects.filter(gira_id=gira_id).for_board()
+        if since >= gira['versao']:
+            funcoes_qs = funcoes_qs.none()
+        else:
+            funcoes_qs = funcoes_qs.filter(versao__gt=since)
+            removidas = list(
+                FuncaoRemovida.objects.filter(gira_id=gira_id, versao__gt=since)
+                .values_list('funcao_id', flat=True)
+            )
+        dados = quadro.serializar(funcoes_qs, gira['linha'])
+
+    resposta = JsonResponse({
+        'gira': {'id': gira['id'], 'linha': gira['linha'], 'data_hora': gira['data_hora']},
+        'versao': gira['versao'],
+        'delta': since is not None,
+        **dados,
+        'removidas': removidas,
+        'eventos_desde': eventos_desde,
+    })
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
 
-    funcoes = list(
-        GiraFuncaoHistorico.objects.filter(gira_id=gira_id)
-        .select_related('medium_de_linha', 'pessoa')
-        .values(
-            'id',
-            'descricao',
-            'tipo',
-            'status',
-            'chave',
-            'pessoa_id',
-            'pessoa__nome',
-            'medium_de_linha_id',
-            'medium_de_linha__nome'
-        )
-    )
 
-    # Renomeia os campos para ficar mais limpo no frontend
-    funcoes_formatadas = []
-    for f in funcoes:
-        funcoes_formatadas.append({
-            'id': f['id'],
-            'descricao': f['descricao'],
-            'tipo': f['tipo'],
-            'status': f['status'],
-            'chave': f['chave'],
-
-            # pessoa responsável (quando existir)
-            'pessoa_id': f['pessoa_id'],
-            'pessoa_nome': f['pessoa__nome'],
-
-            # médium de linha para Cambones
-            'medium_de_linha_id': f['medium_de_linha_id'],
-            'medium_de_linha': {
-                'id': f['medium_de_linha_id'],
-                'nome': f['medium_de_linha__nome']
-            } if f['medium_de_linha_id'] else None,
+def _resposta_congelada(request, gira_id, versao, eventos_desde):
+    """
+    get_gira_data de uma gira congelada: o 304 sai só da versão; o snapshot
+    (uma busca por chave primária) só é lido quando o navegador não o tem.
+    None se a gira foi reaberta nesse meio-tempo.
+    """
+    etag = f'W/"gira-{gira_id}-v{versao}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        resposta = HttpResponseNotModified()
+    else:
+        dados = snapshots.obter(gira_id)
+        if dados is None:  # reaberta entre as duas consultas
+            return None
+        resposta = JsonResponse({
+            **dados,
+            'delta': False,
+            'removidas': [],
+            'congelada': True,
+            'eventos_desde': eventos_desde,
         })
+    resposta['ETag'] = etag
+    if request.GET.get('v') == str(versao):
+        resposta['Cache-Control'] = f'private, max-age={CACHE_CONGELADA}, immutable'
+    else:
+        resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
 
-    return JsonResponse({
-        'gira': model_to_dict(gira, fields=['id', 'linha', 'data_hora']),
-        'funcoes': funcoes_formatadas
+
+def giras_index(request):
+    """
+    Página de giras para o carrossel, por cursor:
+    ?before=<cursor> (anteriores), ?after=<cursor> (seguintes) ou
+    ?em=<gira_id> (janela em volta da gira).
+    """
+    if not _get_user(request):
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+
+    if request.GET.get('em', '').isdigit():
+        gira = Gira.objects.filter(id=int(request.GET['em'])).values(*carrossel.CAMPOS).first()
+        if not gira:
+            return JsonResponse({'erro': 'Gira não encontrada'}, status=404)
+        return JsonResponse(carrossel.janela(gira))
+
+    before = carrossel.ler_cursor(request.GET.get('before'))
+    after = carrossel.ler_cursor(request.GET.get('after'))
+    if before:
+        giras, mais = carrossel.antes(before)
+        return JsonResponse(carrossel.pagina(giras, mais, True))
+    if after:
+        giras, mais = carrossel.depois(after)
+        return JsonResponse(carrossel.pagina(giras, True, mais))
+    return JsonResponse({'erro': 'Informe before, after ou em.'}, status=400)
+
+
+# -------------------------------------------------------------------
+# 🔹 Minhas funções (todas as giras de hoje em diante)
+# -------------------------------------------------------------------
+def minhas_funcoes(request):
+    """Página com as funções do médium logado em todas as próximas giras."""
+    user = _get_user(request)
+    if not user:
+        return redirect('gira:login')
+
+    medium_logado = _get_medium(request)
+    itens = minhas.funcoes(medium_logado.id) if medium_logado else []
+    return render(request, 'gira/minhas_funcoes.html', {
+        'user': user,
+        'medium_logado': medium_logado,
+        'itens': itens,
     })
 
 
+def minhas_funcoes_data(request):
+    """JSON das funções do médium logado nas giras de hoje em diante (gira/minhas.py)."""
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+
+    medium_logado = _get_medium(request)
+    resposta = JsonResponse({
+        'medium_id': medium_logado.id if medium_logado else None,
+        'funcoes': minhas.funcoes(medium_logado.id) if medium_logado else [],
+    })
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
+
 
+# -------------------------------------------------------------------
+# 🔹 Autocompletar médium (índice em memória, gira/mediuns.py)
+# -------------------------------------------------------------------
+def mediuns_autocompletar(request):
+    """
+    ?q=<texto>&k=<quantos> → {'resultados': [{id, nome}]}, sem acentos nem
+    maiúsculas, só médiuns habilitados (?todos=1 inclui os demais, para
+    superusers).
+    """
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+
+    k = request.GET.get('k', '')
+    k = min(int(k), mediuns.LIMITE_MAXIMO) if k.isdigit() and int(k) > 0 else mediuns.LIMITE
+    so_habilitados = not (user.is_superuser and request.GET.get('todos'))
+    resposta = JsonResponse({'resultados': mediuns.buscar(request.GET.get('q', ''), k, so_habilitados)})
+    resposta['Cache-Control'] = 'private, max-age=60'
+    return resposta
+
+
+def pronto(request):
+    """
+    Prontidão do worker (health check do Render): 200 depois do
+    aquecimento (gira/aquecimento.py), 503 enquanto não. Se ele não rodou
+    ou falhou, tenta aqui mesmo. Sem login só diz se está pronto; tempos,
+    erros e pid só para staff (ou com DEBUG).
+    """
+    estado = aquecimento.estado()
+    if not estado['pronto']:
+        estado = aquecimento.aquecer()
+    user = _get_user(request)
+    if not (settings.DEBUG or (user and (user.is_staff or user.is_superuser))):
+        estado = aquecimento.publico(estado)
+    resposta = JsonResponse(estado, status=200 if estado['pronto'] else 503)
+    resposta['Cache-Control'] = 'no-store'
+    return resposta
+
+
+def metricas_view(request):
+    """Métricas do processo (tempo/SQL por view, consultas lentas). Só para superusers."""
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+    if not user.is_superuser:
+        return JsonResponse({'erro': 'Acesso restrito.'}, status=403)
+
+    if request.method == 'POST' and request.POST.get('zerar'):
+        metricas.registro.zerar()
+    return JsonResponse(metricas.registro.resumo())
+
+
+def auditoria_gira(request, gira_id):
+    """
+    Auditoria da gira (assumir/desistir e edições no admin), da mais nova
+    para a mais antiga, 50 por página: ?antes=<id> pega a próxima página.
+    Só para superusers.
+    """
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+    if not user.is_superuser:
+        return JsonResponse({'erro': 'Acesso restrito.'}, status=403)
+
+    antes = request.GET.get('antes', '')
+    return JsonResponse(auditoria.pagina(gira_id, antes=int(antes) if antes.isdigit() else None))
+
+
+def exportar_historico(request):
+    """
+    Exporta o histórico em streaming (gira/exportacao.py). Só para superusers.
+    ?fonte=funcoes|auditoria  ?formato=csv|jsonl  ?de=AAAA-MM-DD  ?ate=AAAA-MM-DD  ?linha=...
+    """
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+    if not user.is_superuser:
+        return JsonResponse({'erro': 'Acesso restrito.'}, status=403)
+
+    fonte = request.GET.get('fonte', 'funcoes')
+    formato = request.GET.get('formato', 'csv')
+    if fonte not in exportacao.FONTES or formato not in exportacao.FORMATOS:
+        return JsonResponse({'erro': 'Fonte ou formato inválido.'}, status=400)
+    datas = {}
+    for campo in ('de', 'ate'):
+        valor = request.GET.get(campo)
+        datas[campo] = parse_date(valor) if valor else None
+        if valor and datas[campo] is None:
+            return JsonResponse({'erro': f'Data inválida em {campo}; use AAAA-MM-DD.'}, status=400)
+
+    conteudo = exportacao.texto(fonte, formato, datas['de'], datas['ate'], request.GET.get('linha') or None)
+    if isinstance(request, ASGIRequest):
+        conteudo = exportacao.assincrono(conteudo)
+    tipo = 'text/csv; charset=utf-8' if formato == 'csv' else 'application/x-ndjson; charset=utf-8'
+    resposta = StreamingHttpResponse(conteudo, content_type=tipo)
+    resposta['Content-Disposition'] = f'attachment; filename="gira_{fonte}.{formato}"'
+    resposta['Cache-Control'] = 'no-store'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
+
+
+# -------------------------------------------------------------------
+# 🔹 Participação dos médiuns (lê só a tabela-resumo, gira/estatisticas.py)
+# -------------------------------------------------------------------
+def _filtros_participacao(request):
+    """?de / ?ate (AAAA-MM ou AAAA-MM-DD), ?linha, ?medium. Retorna (filtros, erro)."""
+    filtros = {'linha': request.GET.get('linha') or None}
+    for campo in ('de', 'ate'):
+        valor = request.GET.get(campo, '')
+        data = parse_date(f'{valor}-01' if len(valor) == 7 else valor) if valor else None
+        if valor and data is None:
+            return None, f'Data inválida em {campo}; use AAAA-MM.'
+        filtros[campo] = data
+    medium = request.GET.get('medium', '')
+    filtros['medium_id'] = int(medium) if medium.isdigit() else None
+    return filtros, None
+
+
+def participacao(request):
+    """Painel de participação por médium (só superusers)."""
+    user = _get_user(request)
+    if not user:
+        return redirect('gira:login')
+    if not user.is_superuser:
+        return redirect('gira:lista_funcoes')
+
+    filtros, erro = _filtros_participacao(request)
+    return render(request, 'gira/participacao.html', {
+        'user': user,
+        'resumo': estatisticas.resumo(**(filtros or {})),
+        'filtros': request.GET,
+        'erro': erro,
+    })
+
+
+def participacao_data(request):
+    """JSON do painel de participação (só superusers)."""
+    user = _get_user(request)
+    if not user:
+        return JsonResponse({'erro': 'Usuário não autenticado.'}, status=401)
+    if not user.is_superuser:
+        return JsonResponse({'erro': 'Acesso restrito.'}, status=403)
+
+    filtros, erro = _filtros_participacao(request)
+    if erro:
+        return JsonResponse({'erro': erro}, status=400)
+    resposta = JsonResponse(estatisticas.resumo(**filtros))
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+
+# -------------------------------------------------------------------
+# 🔹 Eventos do quadro em tempo real (SSE + long-poll)
+# -------------------------------------------------------------------
+SSE_PING_SEGUNDOS = 15
+LONG_POLL_SEGUNDOS = 25
+
+
+def _seq_inicial(request, broker):
+    """
+    (seq, mesma_instancia): de onde continuar. Na reconexão automática o
+    EventSource manda Last-Event-ID (mais novo que ?desde=). Um cursor de
+    outra instância do broker (worker reiniciado ou outro worker) não diz
+    nada sobre o seq daqui: continua do último e o cliente relê o quadro.
+    """
+    valor = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    instancia, seq = eventos.ler_cursor(valor)
+    if instancia == broker.instancia or (instancia is None and seq == 0):
+        return seq, True
+    return broker.ultimo(), False
+
+
+def _formatar_sse(instancia, seq, evento, tipo='funcao'):
+    return f"id: {eventos.formatar_cursor(instancia, seq)}\nevent: {tipo}\ndata: {json.dumps(evento)}\n\n"
+
+
+async def eventos_gira(request, gira_id):
+    """
+    Stream SSE com as mudanças das funções da gira. Requer o servidor
+    ASGI (templo_project.asgi): sob WSGI use o long-poll abaixo.
+    """
+    if not getattr(request, 'gira_user', None):
+        return JsonResponse({'status': 'erro', 'mensagem': 'Usuário não autenticado.'}, status=401)
+
+    broker = eventos.broker()
+    desde, mesma_instancia = _seq_inicial(request, broker)
+
+    async def stream():
+        fila = broker.assinar(gira_id)  # assina antes de reenviar: o JS ignora seq repetido
+        try:
+            yield "retry: 3000\n\n"
+            if not mesma_instancia:
+                yield _formatar_sse(broker.instancia, desde, {'instancia': broker.instancia, 'ultimo': desde}, 'recarregar')
+            for seq, evento in broker.desde(gira_id, desde):
+                yield _formatar_sse(broker.instancia, seq, evento)
+            while True:
+                try:
+                    seq, evento = await asyncio.wait_for(fila.get(), timeout=SSE_PING_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _formatar_sse(broker.instancia, seq, evento)
+        finally:
+            broker.cancelar(gira_id, fila)
+
+    resposta = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
+
+
+async def eventos_gira_poll(request, gira_id):
+    """
+    Long-poll: devolve os eventos após `desde`, esperando até
+    LONG_POLL_SEGUNDOS. Cursor de outra instância do broker responde na
+    hora, com recarregar=True.
+    """
+    if not getattr(request, 'gira_user', None):
+        return JsonResponse({'status': 'erro', 'mensagem': 'Usuário não autenticado.'}, status=401)
+
+    broker = eventos.broker()
+    desde, mesma_instancia = _seq_inicial(request, broker)
+
+    pendentes = broker.desde(gira_id, desde)
+    if not pendentes and mesma_instancia:
+        fila = broker.assinar(gira_id)
+        try:
+            pendentes = broker.desde(gira_id, desde)
+            if not pendentes:
+                pendentes = [await asyncio.wait_for(fila.get(), timeout=LONG_POLL_SEGUNDOS)]
+                while not fila.empty():
+                    pendentes.append(fila.get_nowait())
+        except asyncio.TimeoutError:
+            pendentes = []
+        finally:
+            broker.cancelar(gira_id, fila)
+
+    return JsonResponse({
+        'instancia': broker.instancia,
+        'ultimo': pendentes[-1][0] if pendentes else desde,
+        'recarregar': not mesma_instancia,
+        'eventos': [evento for _, evento in pendentes],
+    })
@@ -0,0 +1,13 @@
+# gunicorn.conf.py — lido automaticamente pelo gunicorn (e passado com -c no Procfile/render.yaml)
+
+
+# -------------------------------------------------------------------
+# 🔹 Aquecimento antes de aceitar requisições (gira/aquecimento.py)
+# -------------------------------------------------------------------
+# Roda em cada worker, depois de carregar a aplicação e antes do loop
+# que aceita conexões: o primeiro acesso depois do cold start do Render
+# já encontra templates compilados, o banco validado e o quadro em cache.
+def post_worker_init(worker):
+    from gira import aquecimento
+
+    aquecimento.aquecer()
@@ -8,11 +8,27 @@ echo "🚀 Iniciando build no Render..."
 echo "📦 Instalando dependências..."
 pip install -r requirements.txt
 
-# echo "🧱 Aplicando migrações..."
-# python manage.py migrate --noinput
+echo "🧱 Aplicando migrações..."
+# gira/migrations está no repositório: 0001 é o schema que já existia no
+# banco (--fake-initial marca como aplicada sem recriar as tabelas); as
+# seguintes criam colunas, tabelas e índices novos. A 0003 remove as
+# funções repetidas (gira, chave) antes de criar a restrição única; a 0005
+# copia gira_funcao para gira_funcao_historico (consolidar_funcoes), que é
+# a tabela que os quadros passam a ler — por isso o build para se falhar.
+# Se ela mudar quem está nas funções, esvazia gira_participacao e o passo
+# reconstruir_participacao --se-vazia, abaixo, recalcula.
+python manage.py migrate --fake-initial --noinput || exit 1
 
-echo "🧱 Rodando migrações..."
-python manage.py makemigrations gira --noinput || echo "⚠️ Nenhuma migração necessária"
-python manage.py migrate --noinput
+# só grava o que mudou (regras de gira/classificacao.py alteradas no deploy);
+# as giras tocadas ganham versão nova, então ETag / ?since enxergam a mudança
+echo "🏷️ Reclassificando funções (categoria/ordem) e nomes dos médiuns..."
+python manage.py backfill_classificacao
+
+echo "📊 Preenchendo o resumo de participação (só na primeira vez)..."
+python manage.py reconstruir_participacao --se-vazia || echo "⚠️ Não foi possível preencher gira_participacao"
+
+# também vale rodar uma vez por dia (cron): congela as giras que passaram
+echo "🧊 Congelando o quadro das giras encerradas..."
+python manage.py congelar_giras || echo "⚠️ Não foi possível congelar as giras encerradas"
 
 echo "✅ Build concluído com sucesso!"
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import socket
 import psycopg2.extensions
 
@@ -11,8 +12,11 @@ psycopg2.extensions.set_wait_callback(None)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
 DEBUG = os.environ.get('DEBUG', 'False').lower() in ('true', '1', 'yes')
+# 🔑 Sem SECRET_KEY no ambiente só sobe em DEBUG (a chave de dev é pública)
+SECRET_KEY = os.environ.get('SECRET_KEY') or ('dev-secret-key' if DEBUG else None)
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Defina SECRET_KEY no ambiente (ou DEBUG=True para desenvolvimento).')
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
 
 AUTH_USER_MODEL = 'gira.User'
@@ -40,10 +44,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'gira.metricas.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gira.middleware.IdentidadeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
 ]
 
@@ -67,10 +73,42 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'templo_project.wsgi.application'
 
+# 🔌 Conexões persistentes: a conexão aberta (no aquecimento ou numa
+# requisição) fica aberta por até CONN_MAX_AGE segundos em vez de uma
+# conexão nova por requisição; CONN_HEALTH_CHECKS descarta a que o
+# Postgres derrubou (plano free dorme) antes de usá-la.
 DATABASES = {
-    'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'))
+    'default': dj_database_url.config(
+        default=os.environ.get('DATABASE_URL'),
+        conn_max_age=int(os.environ.get('CONN_MAX_AGE', 60)),
+        conn_health_checks=True,
+    )
 }
 
+# 🗄️ Cache (quadro de funções, gira atual). LocMemCache é por processo:
+# com mais de um worker do gunicorn, defina CACHE_DIR para usar um cache
+# em arquivo compartilhado entre eles.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'templo-gira',
+        }
+    }
+
+# 🍪 Sessão no servidor, lida do cache (o banco só no cache miss); revogação
+# por usuário em User.sessao_geracao. Ver gira/sessao.py.
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_COOKIE_AGE = 60 * 60 * 24 * 14
+SESSION_COOKIE_HTTPONLY = True
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'pt-br'
@@ -80,6 +118,30 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Nomes com hash do conteúdo (js/quadro.3f2a9c.js): o WhiteNoise serve
+# esses arquivos com cache "para sempre" e gera .gz/.br no collectstatic
+# (.br com o pacote Brotli instalado).
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# 📝 Logs: GIRA_LOG_LEVEL=DEBUG liga o diagnóstico das views (amostrado por
+# GIRA_LOG_AMOSTRA, de 0 a 1). No nível padrão os logs de debug não custam nada.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simples': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simples'},
+    },
+    'loggers': {
+        'gira': {
+            'handlers': ['console'],
+            'level': os.environ.get('GIRA_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+GIRA_LOG_AMOSTRA = float(os.environ.get('GIRA_LOG_AMOSTRA', '1'))